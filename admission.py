@@ -0,0 +1,159 @@
+# admission.py
+"""Admission control and backpressure for the model calls behind the extraction API.
+
+`AdmissionController` lets at most `max_concurrent` model calls run at once.
+Up to `max_queue` more wait their turn, for at most `max_wait_s`; beyond that a
+call fails fast with `Overloaded`, which the API turns into 429 + Retry-After.
+The Retry-After estimate is the time the queue ahead needs to drain at the
+recent average call duration. Background work that has nobody to send a 429 to
+(the durable extraction jobs) uses `slot(wait=True)` instead: it waits for a
+slot however long that takes, outside the bounded queue.
+
+`TokenBucket` is an optional per-client rate limit (CLIENT_RATE requests per
+second, bursts of CLIENT_BURST), keyed by the X-Client-Id header or the client
+address.
+"""
+import asyncio
+import math
+import os
+import time
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+
+from api_metrics import Counter, Gauge, Histogram
+
+MODEL_CONCURRENCY = int(os.getenv("AROGYA_MODEL_CONCURRENCY", "8"))
+MODEL_QUEUE_SIZE = int(os.getenv("AROGYA_MODEL_QUEUE_SIZE", "32"))
+MODEL_QUEUE_TIMEOUT = float(os.getenv("AROGYA_MODEL_QUEUE_TIMEOUT_SECONDS", "30"))
+# Per-client limit on POST /extract* requests; 0 disables it
+CLIENT_RATE = float(os.getenv("AROGYA_CLIENT_RATE", "0"))
+CLIENT_BURST = int(os.getenv("AROGYA_CLIENT_BURST", "10"))
+# Clients tracked by the token bucket (least recently seen are forgotten)
+MAX_CLIENTS = 10_000
+
+QUEUE_DEPTH = Gauge("arogya_model_queue_depth", "Model calls waiting for a slot.")
+IN_USE = Gauge("arogya_model_slots_in_use", "Model calls running.")
+QUEUE_WAIT = Histogram("arogya_model_queue_wait_seconds", "Time model calls waited for a slot.")
+REJECTED = Counter("arogya_extract_rejected", "Requests turned away by admission control.", ("reason",))
+
+
+class Overloaded(Exception):
+    """No model slot is available; retry after `retry_after` seconds."""
+
+    def __init__(self, reason: str, retry_after: int):
+        super().__init__(f"Server is busy ({reason}); retry after {retry_after}s.")
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class AdmissionController:
+    """A concurrency limit with a bounded, time-limited FIFO wait queue."""
+
+    def __init__(self, max_concurrent=MODEL_CONCURRENCY, max_queue=MODEL_QUEUE_SIZE, max_wait_s=MODEL_QUEUE_TIMEOUT):
+        self.max_concurrent = max_concurrent
+        self.max_queue = max_queue
+        self.max_wait_s = max_wait_s
+        self._slots = asyncio.Semaphore(max_concurrent)
+        self.in_use = 0
+        self.waiting = 0
+        # Background calls waiting with slot(wait=True); not part of the bounded queue
+        self.waiting_background = 0
+        # Moving average of a call's duration, for Retry-After
+        self._avg_call_s = 1.0
+        self._set_gauges()
+
+    @property
+    def queue_full(self) -> bool:
+        return self.in_use >= self.max_concurrent and self.waiting >= self.max_queue
+
+    def retry_after(self) -> int:
+        """Seconds until the current queue has likely drained."""
+        rounds = (self.waiting + 1) / self.max_concurrent
+        return max(1, math.ceil(rounds * self._avg_call_s))
+
+    def reject(self, reason: str) -> Overloaded:
+        """Count a rejection and return the Overloaded error to raise or report."""
+        REJECTED.inc(reason)
+        return Overloaded(reason, self.retry_after())
+
+    def _set_gauges(self):
+        QUEUE_DEPTH.set(self.waiting)
+        IN_USE.set(self.in_use)
+
+    @asynccontextmanager
+    async def slot(self, wait=False):
+        """Hold one model slot for the duration of the block, or raise Overloaded.
+
+        With wait=True the call is never rejected: it waits for a slot without
+        a time limit and without taking a place in the bounded queue.
+        """
+        start = time.perf_counter()
+        if wait:
+            self.waiting_background += 1
+            try:
+                await self._slots.acquire()
+            finally:
+                self.waiting_background -= 1
+        else:
+            if self.queue_full:
+                raise self.reject("queue_full")
+            self.waiting += 1
+            self._set_gauges()
+            try:
+                await asyncio.wait_for(self._slots.acquire(), self.max_wait_s)
+            except asyncio.TimeoutError:
+                raise self.reject("queue_timeout") from None
+            finally:
+                self.waiting -= 1
+        QUEUE_WAIT.observe(time.perf_counter() - start)
+        self.in_use += 1
+        self._set_gauges()
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self._avg_call_s = 0.8 * self._avg_call_s + 0.2 * (time.perf_counter() - started)
+            self.in_use -= 1
+            self._slots.release()
+            self._set_gauges()
+
+    def stats(self) -> dict:
+        return {
+            "max_concurrent": self.max_concurrent,
+            "max_queue": self.max_queue,
+            "in_use": self.in_use,
+            "waiting": self.waiting,
+            "waiting_background": self.waiting_background,
+            "avg_call_seconds": round(self._avg_call_s, 3),
+        }
+
+
+class TokenBucket:
+    """Per-client token buckets: `rate` tokens per second, up to `burst` saved."""
+
+    def __init__(self, rate=CLIENT_RATE, burst=CLIENT_BURST, max_clients=MAX_CLIENTS):
+        self.rate = rate
+        self.burst = burst
+        self.max_clients = max_clients
+        self._buckets = OrderedDict()   # client -> (tokens, last refill, monotonic)
+
+    @property
+    def enabled(self) -> bool:
+        return self.rate > 0
+
+    def take(self, client: str) -> float:
+        """Spend a token for `client`: 0 if allowed, else seconds until a token is available."""
+        now = time.monotonic()
+        tokens, last = self._buckets.pop(client, (self.burst, now))
+        tokens = min(self.burst, tokens + (now - last) * self.rate)
+        wait = 0.0
+        if tokens >= 1:
+            tokens -= 1
+        else:
+            wait = (1 - tokens) / self.rate
+        self._buckets[client] = (tokens, now)
+        if len(self._buckets) > self.max_clients:
+            self._buckets.popitem(last=False)
+        if wait:
+            REJECTED.inc("rate_limited")
+        return wait
@@ -0,0 +1,272 @@
+# api_chat.py
+"""Multi-user chat API for the Arogya Mitra orchestrator.
+
+Serves the conversation that main.py runs in a terminal to any number of users,
+over HTTP and WebSocket:
+
+    POST /chat/sessions                                   {"user_id", "user_context"?} -> {"user_id", "session_id"}
+    GET  /chat/sessions/{user_id}/{session_id}            user_context and interaction_history
+    POST /chat/sessions/{user_id}/{session_id}/messages   {"message"} -> {"agent", "reply"}
+    WS   /chat/sessions/{user_id}/{session_id}/ws         send {"message"}; receive "text" events, then "reply"
+
+Each turn runs like main.py: the local intent router picks the sub-agent's
+runner when it is confident and the orchestrator's otherwise, and the turn is
+recorded in the interaction history. Turns of one session are serialized by a
+per-session asyncio.Lock, so history updates and ADK's event log never
+interleave. A turn's SQLite reads and writes stay off the event loop (see
+SqliteSessionService.turn), so one slow write never stalls the other sessions.
+Different sessions run fully in parallel, up to the model admission limit
+(429 + Retry-After beyond it, see admission.py). Sessions are kept in
+SqliteSessionService, so they survive restarts and are shared between workers:
+
+    uvicorn api_chat:app --workers 4
+
+With several workers, the per-session lock only covers the worker it runs in.
+Clients keep one session on one connection (or use sticky routing) for strict
+ordering across workers.
+"""
+import asyncio
+import os
+import time
+import weakref
+from contextlib import asynccontextmanager
+from typing import Optional
+
+import uvicorn
+from dotenv import load_dotenv
+from fastapi import FastAPI, HTTPException, WebSocket, WebSocketDisconnect
+from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
+from google.adk.runners import Runner
+from google.adk.sessions.base_session_service import GetSessionConfig
+from google.genai import types
+from pydantic import BaseModel
+
+from admission import AdmissionController, Overloaded
+from orchestrator_agent.agent import root_agent as orchestrator_agent
+from orchestrator_agent.intent_router import IntentRouter
+from orchestrator_agent.sub_agents.faq_bot.answer_cache import answer_cache
+from session_db import SqliteSessionService
+from utils import add_agent_response_to_history, add_user_query_to_history
+
+load_dotenv()
+
+APP_NAME = "Arogya Mitra"
+# Longest user message accepted, in characters
+CHAT_MESSAGE_MAX_CHARS = int(os.getenv("AROGYA_CHAT_MESSAGE_MAX_CHARS", "4000"))
+
+
+class SessionLocks:
+    """One asyncio.Lock per session, dropped once no turn holds or waits for it."""
+
+    def __init__(self):
+        self._locks = weakref.WeakValueDictionary()
+        self.waited = 0
+
+    @asynccontextmanager
+    async def hold(self, key):
+        lock = self._locks.get(key)
+        if lock is None:
+            lock = self._locks[key] = asyncio.Lock()
+        if lock.locked():
+            self.waited += 1
+        async with lock:
+            yield
+
+    def stats(self):
+        return {"active_sessions": len(self._locks), "turns_waited": self.waited}
+
+
+class NewSession(BaseModel):
+    user_id: str
+    user_context: Optional[dict] = None
+
+
+class ChatMessage(BaseModel):
+    message: str
+
+
+class ChatReply(BaseModel):
+    session_id: str
+    agent: Optional[str] = None
+    reply: Optional[str] = None
+
+
+class SessionNotFound(LookupError):
+    pass
+
+
+app = FastAPI(
+    title="Arogya Mitra Chat API",
+    description="Chat with the Arogya Mitra health assistant, one session per conversation.",
+)
+app.add_middleware(
+    CORSMiddleware,
+    allow_origins=["*"],
+    allow_credentials=True,
+    allow_methods=["*"],
+    allow_headers=["*"],
+)
+
+session_service = SqliteSessionService()
+runner = Runner(agent=orchestrator_agent, app_name=APP_NAME, session_service=session_service)
+# A confident local route runs the sub-agent directly, skipping the orchestrator's model call
+router = IntentRouter.from_orchestrator(orchestrator_agent)
+direct_runners = {
+    agent.name: Runner(agent=agent, app_name=APP_NAME, session_service=session_service)
+    for agent in orchestrator_agent.sub_agents
+}
+session_locks = SessionLocks()
+# Turns running model calls at once / waiting for a slot (429 beyond that)
+model_admission = AdmissionController()
+chat_stats = {"turns": 0, "routed_locally": 0, "failed": 0, "turn_seconds": 0.0}
+
+
+def _check_message(text: str) -> str:
+    text = (text or "").strip()
+    if not text:
+        raise HTTPException(status_code=400, detail="Message is empty.")
+    if len(text) > CHAT_MESSAGE_MAX_CHARS:
+        raise HTTPException(status_code=413, detail=f"Message exceeds {CHAT_MESSAGE_MAX_CHARS} characters.")
+    return text
+
+
+async def run_turn(user_id: str, session_id: str, text: str, on_text=None):
+    """Run one user turn and return (agent name, final reply text).
+
+    `on_text(author, text)` is awaited for every text part as the agents produce it.
+    """
+    async with session_locks.hold((user_id, session_id)):
+        started = time.perf_counter()
+        # Loaded in a worker thread; the turn's SQLite writes run on the service's writer thread
+        async with session_service.turn(APP_NAME, user_id, session_id) as session:
+            if session is None:
+                raise SessionNotFound(session_id)
+            decision = router.route(text)
+            turn_runner = direct_runners.get(decision.agent, runner)
+            agent_name, reply = None, None
+            try:
+                async with model_admission.slot():
+                    # On a direct route, authored by the sub-agent so its runner starts from it (see utils)
+                    add_user_query_to_history(session_service, APP_NAME, user_id, session_id, text,
+                                              author=decision.agent or "user")
+                    content = types.Content(role="user", parts=[types.Part(text=text)])
+                    async for event in turn_runner.run_async(user_id=user_id, session_id=session_id, new_message=content):
+                        if not (event.content and event.content.parts):
+                            continue
+                        texts = [part.text for part in event.content.parts if part.text and not part.text.isspace()]
+                        if texts and on_text is not None:
+                            await on_text(event.author, "".join(texts))
+                        if texts and event.is_final_response():
+                            agent_name, reply = event.author, "".join(texts).strip()
+            except Exception as e:
+                if not isinstance(e, Overloaded):
+                    chat_stats["failed"] += 1
+                raise
+
+            if reply:
+                add_agent_response_to_history(session_service, APP_NAME, user_id, session_id, agent_name, reply)
+        chat_stats["turns"] += 1
+        chat_stats["routed_locally"] += decision.agent is not None
+        chat_stats["turn_seconds"] += time.perf_counter() - started
+        return agent_name, reply
+
+
+@app.post("/chat/sessions", status_code=201)
+def create_chat_session(body: NewSession):
+    """Start a conversation for `user_id`, optionally with the user_context of a parsed report."""
+    session = session_service.create_session(
+        app_name=APP_NAME,
+        user_id=body.user_id,
+        state={"user_context": body.user_context or {}, "interaction_history": []},
+    )
+    return {"user_id": body.user_id, "session_id": session.id}
+
+
+@app.get("/chat/sessions/{user_id}/{session_id}")
+def get_chat_session(user_id: str, session_id: str):
+    session = session_service.get_session(
+        app_name=APP_NAME, user_id=user_id, session_id=session_id, config=GetSessionConfig(num_recent_events=1)
+    )
+    if session is None:
+        raise HTTPException(status_code=404, detail="Session not found.")
+    return {
+        "session_id": session_id,
+        "user_context": session.state.get("user_context", {}),
+        "interaction_history": session.state.get("interaction_history", []),
+    }
+
+
+@app.post("/chat/sessions/{user_id}/{session_id}/messages", response_model=ChatReply)
+async def post_chat_message(user_id: str, session_id: str, body: ChatMessage):
+    """Run one turn and return the answering agent and its reply."""
+    text = _check_message(body.message)
+    try:
+        agent_name, reply = await run_turn(user_id, session_id, text)
+    except SessionNotFound:
+        raise HTTPException(status_code=404, detail="Session not found.")
+    except Overloaded as e:
+        return JSONResponse(status_code=429, content={"detail": str(e)}, headers={"Retry-After": str(e.retry_after)})
+    except Exception as e:
+        print(f"❌ Chat turn failed: {e}")
+        raise HTTPException(status_code=500, detail="The assistant could not answer this message.")
+    return ChatReply(session_id=session_id, agent=agent_name, reply=reply)
+
+
+@app.websocket("/chat/sessions/{user_id}/{session_id}/ws")
+async def chat_socket(websocket: WebSocket, user_id: str, session_id: str):
+    """Streams each turn: {"type": "text", "author", "text"} per agent output, then {"type": "reply", ...}."""
+    await websocket.accept()
+
+    async def send_text(author, text):
+        await websocket.send_json({"type": "text", "author": author, "text": text})
+
+    try:
+        while True:
+            data = await websocket.receive_json()
+            try:
+                text = _check_message(data.get("message", "") if isinstance(data, dict) else "")
+                agent_name, reply = await run_turn(user_id, session_id, text, on_text=send_text)
+            except HTTPException as e:
+                await websocket.send_json({"type": "error", "status": e.status_code, "detail": e.detail})
+                continue
+            except SessionNotFound:
+                await websocket.send_json({"type": "error", "status": 404, "detail": "Session not found."})
+                await websocket.close(code=4404)
+                return
+            except Overloaded as e:
+                await websocket.send_json({"type": "error", "status": 429, "detail": str(e),
+                                           "retry_after": e.retry_after})
+                continue
+            except Exception as e:
+                print(f"❌ Chat turn failed: {e}")
+                await websocket.send_json({"type": "error", "status": 500,
+                                           "detail": "The assistant could not answer this message."})
+                continue
+            await websocket.send_json({"type": "reply", "session_id": session_id, "agent": agent_name, "reply": reply})
+    except WebSocketDisconnect:
+        pass
+
+
+@app.get("/chat/stats")
+def chat_path_stats():
+    """Turns served, how many skipped the orchestrator, and the state of the locks, queue and caches."""
+    turns = chat_stats["turns"]
+    return {
+        **chat_stats,
+        "mean_turn_seconds": chat_stats["turn_seconds"] / turns if turns else 0.0,
+        "routed_locally_ratio": chat_stats["routed_locally"] / turns if turns else 0.0,
+        "sessions": session_locks.stats(),
+        "admission": model_admission.stats(),
+        "faq_cache": answer_cache.stats(),
+        "session_store": session_service.stats(),
+    }
+
+
+@app.get("/")
+def read_root():
+    return {"status": "ok", "message": "Arogya Mitra Chat API is running."}
+
+
+if __name__ == "__main__":
+    uvicorn.run(app, host="0.0.0.0", port=8001)
@@ -0,0 +1,197 @@
+# api_metrics.py
+"""Per-stage timing and Prometheus metrics for the extraction API.
+
+`stage(name)` times one stage of a request (upload read, cache lookup, model
+round trip, JSON parsing, serialization...). Each stage is
+
+  * an OpenTelemetry span (a no-op unless a tracer provider is configured),
+  * an observation in the `arogya_extract_stage_seconds{stage=...}` histogram,
+  * an entry in the request's Server-Timing header (see `request_timings`).
+
+The metric types are a minimal in-process implementation of the Prometheus text
+format (counter, gauge, histogram with labels): recording is a dict lookup, a
+bisect and two additions under a lock, so it stays off the hot path's profile.
+"""
+import bisect
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from opentelemetry import trace
+
+_tracer = trace.get_tracer("arogya.extract")
+
+# Seconds: from a cache hit (~0.1 ms) to a long model call on a scanned report
+LATENCY_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+# Bytes: 16 KB .. 64 MB
+SIZE_BUCKETS = tuple(16 * 1024 * 4 ** i for i in range(7))
+
+
+def _escape(value, quote=True) -> str:
+    """Escape a label value (or, with quote=False, HELP text) for the exposition format."""
+    text = str(value).replace("\\", "\\\\").replace("\n", "\\n")
+    return text.replace('"', '\\"') if quote else text
+
+
+def _label_text(names, values) -> str:
+    if not names:
+        return ""
+    pairs = ",".join(f'{name}="{_escape(value)}"' for name, value in zip(names, values))
+    return "{" + pairs + "}"
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+        REGISTRY.append(self)
+
+    def _header(self):
+        return [f"# HELP {self.name} {_escape(self.documentation, quote=False)}", f"# TYPE {self.name} {self.kind}"]
+
+    def _snapshot(self):
+        """(labels, value) pairs copied under the lock, so rendering never races an update."""
+        with self._lock:
+            items = list(self._values.items())
+        return sorted(items)
+
+
+class Counter(_Metric):
+    """A monotonically increasing count, per label values."""
+    kind = "counter"
+
+    def inc(self, *labels, amount=1.0):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0.0) + amount
+
+    def render(self):
+        lines = self._header()
+        for labels, value in self._snapshot():
+            lines.append(f"{self.name}_total{_label_text(self.labelnames, labels)} {value:g}")
+        return lines
+
+
+class Gauge(_Metric):
+    """A value that goes up and down, per label values."""
+    kind = "gauge"
+
+    def inc(self, *labels, amount=1.0):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0.0) + amount
+
+    def dec(self, *labels, amount=1.0):
+        self.inc(*labels, amount=-amount)
+
+    def set(self, value: float, *labels):
+        with self._lock:
+            self._values[labels] = float(value)
+
+    def render(self):
+        lines = self._header()
+        for labels, value in self._snapshot():
+            lines.append(f"{self.name}{_label_text(self.labelnames, labels)} {value:g}")
+        return lines
+
+
+class Histogram(_Metric):
+    """Observations counted into cumulative buckets, per label values."""
+    kind = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets=LATENCY_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value: float, *labels):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._values.get(labels)
+            if state is None:
+                # per-bucket counts (last one is +Inf), sum
+                state = self._values[labels] = [[0] * (len(self.buckets) + 1), 0.0]
+            state[0][index] += 1
+            state[1] += value
+
+    def _snapshot(self):
+        with self._lock:
+            items = [(labels, (list(counts), total)) for labels, (counts, total) in self._values.items()]
+        return sorted(items)
+
+    def render(self):
+        lines = self._header()
+        for labels, (counts, total) in self._snapshot():
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                le = "+Inf" if bound == float("inf") else f"{bound:g}"
+                label_text = _label_text(self.labelnames + ("le",), labels + (le,))
+                lines.append(f"{self.name}_bucket{label_text} {cumulative}")
+            label_text = _label_text(self.labelnames, labels)
+            lines.append(f"{self.name}_sum{label_text} {total:g}")
+            lines.append(f"{self.name}_count{label_text} {cumulative}")
+        return lines
+
+
+REGISTRY = []
+
+REQUEST_SECONDS = Histogram(
+    "arogya_extract_request_seconds", "Extraction API request latency.", ("endpoint", "status")
+)
+STAGE_SECONDS = Histogram(
+    "arogya_extract_stage_seconds", "Time spent in each stage of an extraction.", ("stage",)
+)
+IN_FLIGHT = Gauge("arogya_extract_requests_in_flight", "Extraction API requests being handled.", ("endpoint",))
+UPLOAD_BYTES = Histogram(
+    "arogya_extract_upload_bytes", "Size of uploaded PDF reports.", ("endpoint",), buckets=SIZE_BUCKETS
+)
+MODEL_PAYLOAD_BYTES = Histogram(
+    "arogya_extract_model_payload_bytes", "Size of the PDF sent to the model after pruning and recompression.",
+    buckets=SIZE_BUCKETS,
+)
+ERRORS = Counter("arogya_extract_errors", "Failed extractions by error type.", ("endpoint", "type"))
+
+
+def render() -> str:
+    """All metrics in the Prometheus text exposition format."""
+    lines = []
+    for metric in REGISTRY:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+
+# --- Per-request stage timings ---
+
+# (stage, seconds) recorded during the current request, for its Server-Timing header
+request_timings: ContextVar = ContextVar("request_timings", default=None)
+
+
+def record(name: str, elapsed: float):
+    """Record a stage timed by the caller."""
+    STAGE_SECONDS.observe(elapsed, name)
+    timings = request_timings.get()
+    if timings is not None:
+        timings.append((name, elapsed))
+
+
+@contextmanager
+def stage(name: str):
+    """Time one stage of an extraction as a span, a histogram observation and a Server-Timing entry."""
+    start = time.perf_counter()
+    with _tracer.start_as_current_span(f"extract.{name}"):
+        try:
+            yield
+        finally:
+            record(name, time.perf_counter() - start)
+
+
+def server_timing(timings) -> str:
+    """Server-Timing header value for a request's stage timings (repeated stages are summed)."""
+    totals = {}
+    for name, elapsed in timings:
+        totals[name] = totals.get(name, 0.0) + elapsed
+    return ", ".join(f"{name};dur={elapsed * 1000:.1f}" for name, elapsed in totals.items())
@@ -1,38 +1,113 @@
 # main.py
 
 import asyncio
+import hashlib
+import io
 import json
+import math
+import os
+import time
 import uvicorn
+from contextlib import asynccontextmanager, nullcontext
+from contextvars import ContextVar
 from pathlib import Path
 
-from fastapi import FastAPI, File, UploadFile, HTTPException
+from fastapi import FastAPI, File, Query, Request, UploadFile, HTTPException
+from fastapi.responses import JSONResponse, PlainTextResponse, Response, StreamingResponse
+from sse_starlette.sse import EventSourceResponse
 from fastapi.middleware.cors import CORSMiddleware
 
 from google.adk.runners import Runner
-from google.adk.sessions import InMemorySessionService
 from google.genai import types
 from dotenv import load_dotenv
 
 # --- 1. Import your custom report_parser_agent ---
 from report_parser_agent.agent import report_parser_agent, ExpectedOutput
+from report_parser_agent.chunked_extraction import CHUNK_PAGES, extract_chunked
+from report_parser_agent.extraction_cache import ExtractionCache
+from report_parser_agent.local_extractor import MIN_CONFIDENCE, extract_locally
+from report_parser_agent.output_repair import OutputRepairError, parse_output, repair_stats
+from report_parser_agent.page_selection import prune_pdf
+from report_parser_agent import scan_compression
+import api_metrics
+from admission import AdmissionController, Overloaded, TokenBucket
+from api_metrics import ERRORS, IN_FLIGHT, MODEL_PAYLOAD_BYTES, REQUEST_SECONDS, UPLOAD_BYTES, stage
+from extraction_jobs import JobQueue
+from pdf_upload import (
+    INLINE_MAX_BYTES, MAX_UPLOAD_BYTES, InvalidPdf, SpooledPdf, UploadTooLarge, pdf_part, spool_pdf,
+    uploads_by_reference,
+)
+from session_store import BoundedSessionService, ephemeral_session
 
 # Load environment variables (e.g., for API keys)
 load_dotenv()
 
 # --- 2. Initialize FastAPI App & ADK Runner ---
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Start the extraction job workers (re-queues jobs interrupted by a restart)
+    await job_queue.start()
+    yield
+    await job_queue.stop()
+    scan_compression.shutdown()
+
+
 app = FastAPI(
     title="Medical Report Parser API",
     description="Upload a PDF medical report to extract structured JSON data.",
+    lifespan=lifespan,
 )
 
-# Use a single, shared session service and runner for the app's lifecycle
-session_service = InMemorySessionService()
+# Use a single, shared session service and runner for the app's lifecycle.
+# Extraction sessions are ephemeral; the TTL/LRU bound is a backstop against leaks.
+session_service = BoundedSessionService()
 runner = Runner(
     agent=report_parser_agent,
     app_name="report_parser_app",
     session_service=session_service,
 )
 
+# Parsed reports, keyed by PDF content: re-uploads of the same report skip the model call
+extraction_cache = ExtractionCache()
+
+# How often the local text-layer stage answered without a model call
+extraction_stats = {"local": 0, "model": 0, "chunked": 0}
+
+# Follow-up message when the agent's reply is beyond local repair (see output_repair)
+REPROMPT = (
+    "Your previous reply was not valid JSON for the required schema ({error}). "
+    "Reply again with only the corrected JSON object."
+)
+
+# Scanned-image recompression before upload, and time spent uploading to the model
+scan_stats = {"recompressed": 0, "bytes_in": 0, "bytes_out": 0, "preprocess_seconds": 0.0, "upload_seconds": 0.0}
+
+# /extract/batch: agent runs in flight per batch, files per batch and total request size
+BATCH_CONCURRENCY = int(os.getenv("AROGYA_BATCH_CONCURRENCY", "4"))
+BATCH_MAX_FILES = int(os.getenv("AROGYA_BATCH_MAX_FILES", "50"))
+BATCH_MAX_BYTES = int(os.getenv("AROGYA_BATCH_MAX_BYTES", str(200 * 1024 * 1024)))
+
+# Model calls run at once / wait for a slot (429 beyond that), and optional per-client rate limits
+model_admission = AdmissionController()
+client_limits = TokenBucket()
+
+# Set while a durable job runs: its model calls wait for a slot instead of getting Overloaded,
+# which would only burn the job's retry attempts
+_background_extraction = ContextVar("background_extraction", default=False)
+
+
+async def run_job(pdf, filename: str) -> ExpectedOutput:
+    """extract_report for a durable job (see extraction_jobs)."""
+    token = _background_extraction.set(True)
+    try:
+        return await extract_report(pdf, filename)
+    finally:
+        _background_extraction.reset(token)
+
+
+# /extract/jobs: durable submit/poll/fetch extraction, drained by in-process workers
+job_queue = JobQueue(handler=run_job)
+
 # --- 3. Configure CORS ---
 # This allows your React frontend (e.g., running on http://localhost:3000)
 # to communicate with this backend.
@@ -45,70 +120,435 @@ app.add_middleware(
 )
 
 
+@app.middleware("http")
+async def reject_oversized_uploads(request: Request, call_next):
+    """Refuse uploads whose declared size is over the limit before reading the body."""
+    if request.url.path.startswith("/extract"):
+        limit = BATCH_MAX_BYTES if request.url.path.startswith("/extract/batch") else MAX_UPLOAD_BYTES
+        declared = request.headers.get("content-length")
+        # Allow some room for the multipart framing around the file
+        if declared and declared.isdigit() and int(declared) > limit + 64 * 1024:
+            ERRORS.inc(metrics_endpoint(request.url.path), "upload_too_large")
+            return JSONResponse(
+                status_code=413,
+                content={"detail": f"Upload exceeds the {limit // (1024 * 1024)} MB limit."},
+            )
+    return await call_next(request)
+
+
+def metrics_endpoint(path: str) -> str:
+    """Route template for a request path, so job ids don't become metric labels."""
+    if path.startswith("/extract/jobs/"):
+        return "/extract/jobs/{job_id}/result" if path.endswith("/result") else "/extract/jobs/{job_id}"
+    return path
+
+
+@app.middleware("http")
+async def admit_extract_requests(request: Request, call_next):
+    """429 + Retry-After before the upload is read, for clients over their rate or when the model queue is full."""
+    if request.method == "POST" and request.url.path.startswith("/extract"):
+        if client_limits.enabled:
+            client = request.headers.get("x-client-id") or (request.client.host if request.client else "unknown")
+            wait = client_limits.take(client)
+            if wait:
+                return JSONResponse(
+                    status_code=429,
+                    content={"detail": "Too many requests from this client."},
+                    headers={"Retry-After": str(max(1, math.ceil(wait)))},
+                )
+        # Job submissions are only stored here (their model calls wait for a slot in the
+        # job workers); synchronous requests are turned away
+        if not request.url.path.startswith("/extract/jobs") and model_admission.queue_full:
+            error = model_admission.reject("queue_full")
+            return JSONResponse(
+                status_code=429, content={"detail": str(error)}, headers={"Retry-After": str(error.retry_after)}
+            )
+    return await call_next(request)
+
+
+# Registered after the middlewares above, so it wraps them and sees their 413s and 429s
+@app.middleware("http")
+async def record_request_metrics(request: Request, call_next):
+    """Latency, in-flight count and stage timings (Server-Timing header) of /extract requests."""
+    if not request.url.path.startswith("/extract"):
+        return await call_next(request)
+    endpoint = metrics_endpoint(request.url.path)
+    timings = []
+    api_metrics.request_timings.set(timings)
+    request.state.started = time.perf_counter()
+    IN_FLIGHT.inc(endpoint)
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        if timings:
+            response.headers["Server-Timing"] = api_metrics.server_timing(timings)
+        return response
+    finally:
+        IN_FLIGHT.dec(endpoint)
+        REQUEST_SECONDS.observe(time.perf_counter() - request.state.started, endpoint, str(status))
+
+
 # --- 4. Create the Final PDF Processing Endpoint ---
 @app.post("/extract/", response_model=ExpectedOutput)
-async def extract_data_from_pdf(file: UploadFile = File(...)):
+async def extract_data_from_pdf(request: Request, file: UploadFile = File(...)):
     """
     Accepts a PDF file from a frontend, processes it with the
     report_parser_agent, and returns the structured JSON data.
     """
+    # Receiving and parsing the multipart body happens before the endpoint runs
+    api_metrics.record("receive", time.perf_counter() - request.state.started)
+
     # Verify the uploaded file is a PDF
     if file.content_type != "application/pdf":
+        ERRORS.inc("/extract/", "invalid_type")
         raise HTTPException(status_code=400, detail="Invalid file type. Please upload a PDF.")
 
     print(f"🚀 Received file: {file.filename} ({file.content_type})")
 
+    # Stream the upload to a spooled temp file, hashing and validating it on the way
     try:
-        # Read the file content directly from the upload
-        pdf_bytes = await file.read()
-
-        # Construct the multimodal message for the agent, just like in test_parser.py
-        message_with_pdf = types.Content(
-            role="user",
-            parts=[
-                types.Part(text="Extract the health information from the attached medical report."),
-                types.Part(
-                    inline_data={
-                        "mime_type": "application/pdf",
-                        "data": pdf_bytes
-                    }
+        with stage("upload_read"):
+            pdf = await spool_pdf(file)
+    except UploadTooLarge as e:
+        ERRORS.inc("/extract/", "upload_too_large")
+        raise HTTPException(status_code=413, detail=str(e))
+    except InvalidPdf as e:
+        ERRORS.inc("/extract/", "invalid_pdf")
+        raise HTTPException(status_code=400, detail=str(e))
+    UPLOAD_BYTES.observe(pdf.size, "/extract/")
+
+    try:
+        with pdf:
+            output = await extract_report(pdf, file.filename)
+        with stage("serialize"):
+            body = output.model_dump_json()
+        return Response(content=body, media_type="application/json")
+
+    except Overloaded as e:
+        # Every model slot is busy and the wait queue is full (or timed out)
+        raise HTTPException(status_code=429, detail=str(e), headers={"Retry-After": str(e.retry_after)})
+    except UploadTooLarge as e:
+        # A single page too large to send inline, on Vertex AI without an upload bucket
+        ERRORS.inc("/extract/", "upload_too_large")
+        raise HTTPException(status_code=413, detail=str(e))
+    except HTTPException as e:
+        # Already carries its status and detail (e.g. the re-prompted reply was still invalid)
+        ERRORS.inc("/extract/", type(e).__name__)
+        raise
+    except Exception as e:
+        ERRORS.inc("/extract/", type(e).__name__)
+        print(f"❌ An error occurred: {e}")
+        # Handle potential errors during agent processing
+        raise HTTPException(status_code=500, detail=f"Failed to process the document: {str(e)}")
+
+
+async def extract_report(pdf, filename: str) -> ExpectedOutput:
+    """Return the parsed report for a spooled PDF, from the extraction cache when possible."""
+    with stage("cache_lookup"):
+        cached = await asyncio.to_thread(extraction_cache.get, pdf.sha256, pdf.size)
+    if cached is not None:
+        print(f"⚡ Cache hit for {filename} ({pdf.sha256[:12]})")
+        return cached
+
+    # Machine-readable reports are usually answered from their text layer alone
+    with stage("local_extract"):
+        local = await asyncio.to_thread(extract_locally, pdf.file)
+    if local.confidence >= MIN_CONFIDENCE:
+        print(f"📄 Parsed {filename} locally (confidence {local.confidence:.2f})")
+        extraction_stats["local"] += 1
+        output = local.output
+    else:
+        extraction_stats["model"] += 1
+        # Long reports: only send the pages likely to hold the UserContext fields
+        with stage("prune"):
+            pruned = await asyncio.to_thread(prune_pdf, pdf.file, local.pages)
+        if pruned.data is not None:
+            print(f"✂️ Sending {len(pruned.kept_pages)} of {pruned.total_pages} pages of {filename}")
+            pdf = SpooledPdf(io.BytesIO(pruned.data), len(pruned.data), pdf.sha256)
+        scanned = None
+        # Scanned reports: downsample and recompress the page images (in a worker process,
+        # which reads and writes temp files rather than receiving the whole PDF)
+        if scan_compression.SCAN_COMPRESSION and pdf.size >= scan_compression.SCAN_MIN_BYTES:
+            with stage("scan_compress"):
+                compressed = await scan_compression.compress_scan(pdf.file, pdf.size)
+            if compressed.file is not None:
+                print(
+                    f"🗜️ Recompressed {compressed.images} images of {filename}: {compressed.original_bytes / 1e6:.1f}MB -> "
+                    f"{compressed.compressed_bytes / 1e6:.1f}MB in {compressed.seconds:.2f}s"
                 )
-            ]
-        )
+                scan_stats["recompressed"] += 1
+                scan_stats["bytes_in"] += compressed.original_bytes
+                scan_stats["bytes_out"] += compressed.compressed_bytes
+                scan_stats["preprocess_seconds"] += compressed.seconds
+                pdf = scanned = SpooledPdf(compressed.file, compressed.compressed_bytes, pdf.sha256)
+        # Closing the recompressed report deletes its temp file
+        with scanned or nullcontext():
+            # Vertex AI without an upload bucket: large reports only fit inline in pieces
+            inline_only = pdf.size > INLINE_MAX_BYTES and not uploads_by_reference()
+            if len(pruned.kept_pages) > CHUNK_PAGES or inline_only:
+                # Very long (usually scanned) reports: extract page chunks concurrently and merge
+                print(f"🧩 Extracting {filename} in chunks of up to {CHUNK_PAGES} pages")
+                extraction_stats["chunked"] += 1
+                with stage("chunked_extract"):
+                    output = await extract_chunked(
+                        pdf.file, extract_chunk, max_bytes=INLINE_MAX_BYTES if inline_only else None
+                    )
+            else:
+                async with timed_pdf_part(pdf, filename) as part:
+                    output = await parse_report(part)
+    with stage("cache_store"):
+        await asyncio.to_thread(extraction_cache.put, pdf.sha256, output)
+    print(f"✅ Extraction successful for {filename}!")
+    return output
+
+
+@asynccontextmanager
+async def timed_pdf_part(pdf: SpooledPdf, label: str):
+    """pdf_upload.pdf_part, recording how long the upload (if any) took."""
+    start = time.perf_counter()
+    async with pdf_part(pdf) as part:
+        elapsed = time.perf_counter() - start
+        scan_stats["upload_seconds"] += elapsed
+        api_metrics.record("model_upload", elapsed)
+        MODEL_PAYLOAD_BYTES.observe(pdf.size)
+        if part.file_data is not None:
+            print(f"⬆️ Uploaded {label} ({pdf.size / 1e6:.1f}MB) in {elapsed:.2f}s")
+        yield part
 
-        # Create a temporary session for this single request
-        session = session_service.create_session(user_id="api_user", app_name="report_parser_app")
+
+async def extract_chunk(data: bytes, first_page: int, last_page: int, total_pages: int) -> ExpectedOutput:
+    """Partial extraction from pages first_page..last_page of a report (see chunked_extraction)."""
+    chunk = SpooledPdf(io.BytesIO(data), len(data), hashlib.sha256(data).hexdigest())
+    prompt = (
+        f"Extract the health information from the attached pages {first_page}-{last_page} of a "
+        f"{total_pages}-page medical report. Only report what appears on these pages; "
+        "leave fields that are not on them empty."
+    )
+    with chunk:
+        async with timed_pdf_part(chunk, f"pages {first_page}-{last_page}") as part:
+            return await parse_report(part, prompt)
+
+
+async def parse_report(
+    pdf: types.Part, prompt: str = "Extract the health information from the attached medical report."
+) -> ExpectedOutput:
+    """Run report_parser_agent on one PDF (see pdf_upload.pdf_part) and return its validated output."""
+    # Construct the multimodal message for the agent, just like in test_parser.py
+    message_with_pdf = types.Content(
+        role="user",
+        parts=[
+            types.Part(text=prompt),
+            pdf,
+        ]
+    )
+
+    # Use a temporary session for this single request, deleted (with the PDF bytes
+    # in its events) as soon as the agent is done
+    # At most MODEL_CONCURRENCY model calls at once; the rest queue briefly or get Overloaded
+    # (durable jobs wait for their slot instead)
+    async with model_admission.slot(wait=_background_extraction.get()):
+        return await _run_parser(message_with_pdf)
+
+
+async def _run_parser(message_with_pdf: types.Content) -> ExpectedOutput:
+    started = time.perf_counter()
+    with ephemeral_session(session_service, user_id="api_user", app_name="report_parser_app") as session:
+        api_metrics.record("session_create", time.perf_counter() - started)
         print(f"Processing in temporary session: {session.id}")
+        with stage("model"):
+            reply = await final_reply(session, message_with_pdf)
+        try:
+            # Validated straight from the raw reply; common JSON defects are repaired locally
+            with stage("parse_output"):
+                return parse_output(reply)
+        except OutputRepairError as e:
+            # Last resort: ask again in the same session, which still holds the report
+            print(f"🔧 Agent reply could not be repaired ({e}); re-prompting")
+            repair_stats["reprompts"] += 1
+            retry = types.Content(role="user", parts=[types.Part(text=REPROMPT.format(error=e))])
+            with stage("model"):
+                reply = await final_reply(session, retry)
 
-        final_json_response = None
-        # Asynchronously call the runner
-        async for chunk in runner.run_async(
-            user_id=session.user_id, session_id=session.id, new_message=message_with_pdf
-        ):
-            # The agent is designed to return the full JSON in the final response
-            if chunk.is_final_response and chunk.content and chunk.content.parts:
-                json_string = chunk.content.parts[0].text
-                final_json_response = json.loads(json_string)
-                break  # Exit after getting the final response
+    try:
+        return parse_output(reply)
+    except OutputRepairError as e:
+        raise HTTPException(status_code=500, detail=f"Agent failed to return a valid JSON response: {e}")
 
-        if not final_json_response:
-            raise HTTPException(status_code=500, detail="Agent failed to return a final JSON response.")
 
-        print("✅ Extraction successful!")
-        # FastAPI will automatically serialize this dict to a JSON response
-        return final_json_response
+async def final_reply(session, message: types.Content) -> str:
+    """Text of the agent's final response to `message` in `session` (None if there was none)."""
+    reply = None
+    # Asynchronously call the runner. The run is drained rather than left with
+    # `break`: an abandoned run stays suspended, with the PDF in its frames,
+    # until the garbage collector gets to it.
+    async for chunk in runner.run_async(user_id=session.user_id, session_id=session.id, new_message=message):
+        # The agent is designed to return the full JSON in the final response
+        if chunk.is_final_response() and chunk.content and chunk.content.parts and reply is None:
+            reply = chunk.content.parts[0].text
+    return reply
 
-    except Exception as e:
-        print(f"❌ An error occurred: {e}")
-        # Handle potential errors during agent processing
-        raise HTTPException(status_code=500, detail=f"Failed to process the document: {str(e)}")
+
+# --- 5. Batch Endpoint: many PDFs per request, results streamed as they complete ---
+@app.post("/extract/batch")
+async def extract_batch(
+    files: list[UploadFile] = File(...),
+    stream_format: str = Query("ndjson", alias="format", pattern="^(ndjson|sse)$"),
+):
+    """
+    Accepts many PDF files and runs up to BATCH_CONCURRENCY extractions at a time.
+    Each result is streamed back as soon as it is ready, as NDJSON lines (default)
+    or Server-Sent Events, in completion order; `index` refers to the upload order.
+    """
+    if len(files) > BATCH_MAX_FILES:
+        raise HTTPException(status_code=413, detail=f"A batch can contain at most {BATCH_MAX_FILES} files.")
+    print(f"🚀 Received batch of {len(files)} files")
+
+    # Spool every upload before responding: the request's own upload files are
+    # closed once the endpoint returns, while the response keeps streaming
+    spooled = []
+    for file in files:
+        try:
+            if file.content_type != "application/pdf":
+                raise InvalidPdf("Invalid file type. Please upload a PDF.")
+            spooled.append(await spool_pdf(file))
+            UPLOAD_BYTES.observe(spooled[-1].size, "/extract/batch")
+        except ValueError as e:
+            ERRORS.inc("/extract/batch", "upload_too_large" if isinstance(e, UploadTooLarge) else "invalid_pdf")
+            spooled.append(e)
+
+    records = _batch_results(files, spooled)
+    if stream_format == "sse":
+        return EventSourceResponse(
+            ({"event": "result", "data": json.dumps(record)} async for record in records)
+        )
+    return StreamingResponse(
+        (json.dumps(record) + "\n" async for record in records), media_type="application/x-ndjson"
+    )
+
+
+async def _batch_results(files, spooled):
+    """Yield one result record per file, in completion order."""
+    slots = asyncio.Semaphore(BATCH_CONCURRENCY)
+
+    async def run(index, file, pdf):
+        record = {"index": index, "filename": file.filename}
+        if isinstance(pdf, Exception):
+            return {**record, "status": "error", "detail": str(pdf)}
+        try:
+            with pdf:
+                async with slots:
+                    output = await extract_report(pdf, file.filename)
+            return {**record, "status": "ok", "result": output.model_dump()}
+        except Exception as e:
+            ERRORS.inc("/extract/batch", type(e).__name__)
+            print(f"❌ An error occurred for {file.filename}: {e}")
+            return {**record, "status": "error", "detail": f"Failed to process the document: {e}"}
+
+    tasks = [asyncio.create_task(run(index, file, pdf)) for index, (file, pdf) in enumerate(zip(files, spooled))]
+    try:
+        for finished in asyncio.as_completed(tasks):
+            yield await finished
+    finally:
+        # The client went away: don't keep paying for model calls nobody will read
+        for task in tasks:
+            task.cancel()
+        for pdf in spooled:
+            if not isinstance(pdf, Exception):
+                pdf.close()
+
+
+# --- 6. Job Endpoints: submit now, poll, fetch the result later ---
+@app.post("/extract/jobs", status_code=202)
+async def submit_extraction_job(file: UploadFile = File(...)):
+    """
+    Accepts a PDF and queues it for extraction, returning a job id immediately.
+    Poll /extract/jobs/{job_id} and fetch /extract/jobs/{job_id}/result when it succeeds.
+    """
+    if file.content_type != "application/pdf":
+        ERRORS.inc("/extract/jobs", "invalid_type")
+        raise HTTPException(status_code=400, detail="Invalid file type. Please upload a PDF.")
+    try:
+        with stage("upload_read"):
+            pdf = await spool_pdf(file)
+    except UploadTooLarge as e:
+        ERRORS.inc("/extract/jobs", "upload_too_large")
+        raise HTTPException(status_code=413, detail=str(e))
+    except InvalidPdf as e:
+        ERRORS.inc("/extract/jobs", "invalid_pdf")
+        raise HTTPException(status_code=400, detail=str(e))
+    UPLOAD_BYTES.observe(pdf.size, "/extract/jobs")
+
+    with pdf:
+        job_id = await job_queue.submit(pdf, file.filename)
+    print(f"📥 Queued extraction job {job_id} for {file.filename}")
+    return {
+        "job_id": job_id,
+        "status": "queued",
+        "status_url": f"/extract/jobs/{job_id}",
+        "result_url": f"/extract/jobs/{job_id}/result",
+    }
+
+
+@app.get("/extract/jobs/{job_id}")
+async def get_extraction_job(job_id: str):
+    """Status, attempt count and last error of a job."""
+    job = await asyncio.to_thread(job_queue.get, job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found.")
+    return job
+
+
+@app.get("/extract/jobs/{job_id}/result", response_model=ExpectedOutput)
+async def get_extraction_job_result(job_id: str):
+    """The extracted data once the job has succeeded; 202 with the job status while it is pending."""
+    job = await asyncio.to_thread(job_queue.get, job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found.")
+    if job["status"] == "failed":
+        raise HTTPException(status_code=409, detail=f"Job failed: {job['error']}")
+    if job["status"] != "succeeded":
+        return JSONResponse(status_code=202, content=job, headers={"Retry-After": "2"})
+    _, result = await asyncio.to_thread(job_queue.result, job_id)
+    return json.loads(result)
+
+
+@app.get("/extract/cache/stats")
+def extraction_cache_stats():
+    """Hit ratio and bytes saved by the extraction cache."""
+    return extraction_cache.stats()
+
+
+@app.get("/extract/stats")
+def extraction_path_stats():
+    """Cache misses answered by the local text-layer stage vs by the model."""
+    total = extraction_stats["local"] + extraction_stats["model"]
+    return {
+        **extraction_stats,
+        "local_ratio": extraction_stats["local"] / total if total else 0.0,
+        "admission": model_admission.stats(),
+        "scan": {**scan_stats, "bytes_saved": scan_stats["bytes_in"] - scan_stats["bytes_out"]},
+        "output_repair": {
+            **repair_stats,
+            # Replies fixed locally, out of those that were not valid as returned
+            "repair_success_rate": repair_stats["repaired"] / (repair_stats["repaired"] + repair_stats["failed"])
+            if repair_stats["repaired"] + repair_stats["failed"] else 0.0,
+            "model_calls_avoided": repair_stats["repaired"],
+        },
+    }
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+def metrics():
+    """Latency and payload-size histograms, in-flight requests and error counters, in Prometheus format."""
+    return PlainTextResponse(api_metrics.render(), media_type="text/plain; version=0.0.4")
 
 
-# --- 5. Root Endpoint for Health Check ---
+# --- 7. Root Endpoint for Health Check ---
 @app.get("/")
 def read_root():
     return {"status": "ok", "message": "Arogya Mitra Parser API is running."}
 
-# --- 6. Make the App Runnable (for development) ---
+# --- 8. Make the App Runnable (for development) ---
 if __name__ == "__main__":
     uvicorn.run(app, host="0.0.0.0", port=8000)
\ No newline at end of file
@@ -0,0 +1,111 @@
+# benchmarks/bench_admission.py
+"""Latency and failures of /extract/ as offered load exceeds model capacity.
+
+The model is a stub "upstream" with room for --capacity concurrent calls of
+--call-ms each: beyond that, calls slow down in proportion to the overload
+(processor sharing), and past twice the capacity they fail like a provider's
+rate limit. Requests arrive open loop at each --rps for --seconds and go through
+the real API in-process, first with admission control off (every request calls
+the model at once), then on (--capacity slots, --queue waiting, 429 beyond).
+
+For each load the script prints successes, 429s, errors and the p50/p99 latency
+of the successful requests; with admission control p99 stays bounded by the
+queue while the excess is turned away quickly.
+
+    python -m benchmarks.bench_admission --rps 8,16,32,64
+"""
+import argparse
+import asyncio
+import json
+import random
+import tempfile
+import time
+from typing import AsyncGenerator
+
+import httpx
+
+import api_pdf
+from admission import AdmissionController
+from benchmarks.common import percentile
+from benchmarks.sample_reports import pdf_bytes, random_truth, report_pages
+from benchmarks.stub_llm import StubLlm
+from google.adk.models.llm_request import LlmRequest
+from google.adk.models.llm_response import LlmResponse
+from google.genai import types
+from report_parser_agent.agent import report_parser_agent
+from report_parser_agent.extraction_cache import ExtractionCache
+
+
+class UpstreamLlm(StubLlm):
+    """StubLlm with finite capacity: slower when overloaded, failing when far over."""
+
+    capacity: int = 8
+    in_flight: int = 0
+
+    async def generate_content_async(self, llm_request: LlmRequest, stream: bool = False) -> AsyncGenerator[LlmResponse, None]:
+        self.in_flight += 1
+        try:
+            if self.in_flight > 2 * self.capacity:
+                raise RuntimeError("429 RESOURCE_EXHAUSTED: upstream rate limit")
+            await asyncio.sleep(self.delay_s * max(1.0, self.in_flight / self.capacity))
+            yield LlmResponse(content=types.Content(role="model", parts=[types.Part(text=self.reply)]))
+        finally:
+            self.in_flight -= 1
+
+
+async def offer_load(reports, rps, seconds):
+    """Send rps requests per second for `seconds`; return [(status, latency)]."""
+    results = []
+    transport = httpx.ASGITransport(app=api_pdf.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=600) as client:
+        async def one(data, index):
+            start = time.perf_counter()
+            response = await client.post("/extract/", files={"file": (f"r{index}.pdf", data, "application/pdf")})
+            results.append((response.status_code, time.perf_counter() - start))
+
+        tasks = []
+        begin = time.perf_counter()
+        for index in range(int(rps * seconds)):
+            await asyncio.sleep(max(0.0, begin + index / rps - time.perf_counter()))
+            tasks.append(asyncio.create_task(one(reports[index % len(reports)], index)))
+        await asyncio.gather(*tasks)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rps", default="8,16,32,64")
+    parser.add_argument("--seconds", type=float, default=5.0)
+    parser.add_argument("--capacity", type=int, default=8)
+    parser.add_argument("--call-ms", type=float, default=500.0)
+    parser.add_argument("--queue", type=int, default=16)
+    parser.add_argument("--queue-timeout", type=float, default=5.0)
+    parser.add_argument("--seed", type=int, default=4)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    reply = json.dumps(random_truth(rng))
+    loads = [float(value) for value in args.rps.split(",")]
+    count = int(max(loads) * args.seconds)
+    reports = [pdf_bytes(report_pages("scanned", random_truth(rng), rng), scanned=True) for _ in range(count)]
+    print(f"model capacity ~{args.capacity / (args.call_ms / 1000):.0f} req/s "
+          f"({args.capacity} concurrent x {args.call_ms:.0f}ms)")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for label, slots, queue in (("admission off", 100_000, 0), ("admission on", args.capacity, args.queue)):
+            for rps in loads:
+                report_parser_agent.model = UpstreamLlm(reply=reply, delay_s=args.call_ms / 1000, capacity=args.capacity)
+                # Fresh limiter and cache per run (a new event loop, no cache hits from earlier runs)
+                api_pdf.model_admission = AdmissionController(slots, queue, args.queue_timeout)
+                api_pdf.extraction_cache = ExtractionCache(directory=f"{tmp}/{label}-{rps}", fingerprint="bench")
+                results = asyncio.run(offer_load(reports, rps, args.seconds))
+                ok = [latency for status, latency in results if status == 200]
+                rejected = [latency for status, latency in results if status == 429]
+                failed = len(results) - len(ok) - len(rejected)
+                print(f"{label:<14} offered={rps:>5.0f}/s  ok={len(ok):<4} 429={len(rejected):<4} errors={failed:<4} "
+                      f"ok p50={percentile(ok, 50) * 1000:7.0f}ms p99={percentile(ok, 99) * 1000:7.0f}ms  "
+                      f"429 p99={percentile(rejected, 99) * 1000:6.0f}ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+# benchmarks/bench_async_tools.py
+"""Event-loop responsiveness while a slow database query runs inside a tool call.
+
+A heartbeat task ticks every 10 ms on the event loop while one long-running query
+is issued, first by calling a tool synchronously on the loop (the old behaviour),
+then through its thread-offloaded async variant. The script fails if the loop
+stalls for more than --max-lag-ms in the async case.
+
+    python -m benchmarks.bench_async_tools --rows 3000000
+"""
+import argparse
+import asyncio
+import time
+
+from benchmarks.common import temp_db_copy
+from orchestrator_agent.sub_agents.appointment_agent import database
+
+TICK_S = 0.01
+
+
+def slow_query(rows):
+    """A stand-in for a slow tool query: count through `rows` rows in SQLite."""
+    with database.get_pool().connection() as conn:
+        return conn.execute(
+            "WITH RECURSIVE n(i) AS (SELECT 1 UNION ALL SELECT i + 1 FROM n WHERE i < ?) SELECT COUNT(*) FROM n",
+            (rows,),
+        ).fetchone()[0]
+
+
+async def heartbeat(stop, lags):
+    """Record how late each 10 ms tick fires."""
+    while not stop.is_set():
+        expected = time.perf_counter() + TICK_S
+        await asyncio.sleep(TICK_S)
+        lags.append(time.perf_counter() - expected)
+
+
+async def measure(call):
+    """Run `call` alongside the heartbeat and return (elapsed, worst tick lag)."""
+    stop, lags = asyncio.Event(), []
+    beat = asyncio.create_task(heartbeat(stop, lags))
+    await asyncio.sleep(TICK_S * 3)
+    started = time.perf_counter()
+    await call()
+    elapsed = time.perf_counter() - started
+    stop.set()
+    await beat
+    return elapsed, max(lags)
+
+
+async def run(rows, max_lag_ms):
+    async def blocking():
+        slow_query(rows)
+
+    async def offloaded():
+        await database._offloaded(slow_query)(rows)
+
+    for label, call in (("sync tool on the event loop", blocking), ("async (offloaded) tool", offloaded)):
+        elapsed, lag = await measure(call)
+        print(f"{label:<32} query={elapsed * 1000:8.1f}ms  worst loop stall={lag * 1000:8.1f}ms")
+
+    # The shipped async tools must also keep the loop free (after warming up the executor threads)
+    def burst():
+        return asyncio.gather(*(database._find_doctors_in_db_async("Cardiologist", "Pune") for _ in range(200)))
+    await burst()
+    _, lag = await measure(burst)
+    print(f"{'200 concurrent find_doctors':<32} worst loop stall={lag * 1000:8.1f}ms")
+
+    elapsed, lag = await measure(offloaded)
+    assert lag * 1000 < max_lag_ms, f"event loop stalled for {lag * 1000:.1f}ms"
+    print("OK: event loop stayed responsive")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=3_000_000)
+    parser.add_argument("--max-lag-ms", type=float, default=50.0)
+    args = parser.parse_args()
+
+    with temp_db_copy() as db_path:
+        database.configure_pool(db_path)
+        asyncio.run(run(args.rows, args.max_lag_ms))
+        database.get_pool().close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+# benchmarks/bench_batch_extract.py
+"""Throughput of /extract/batch against its concurrency limit.
+
+Posts one batch of --files small synthetic PDFs per concurrency level to the app
+served by uvicorn on a local port, with the model call replaced by a fixed
+--model-ms delay, and reads the NDJSON stream.
+Reports time to the first streamed result, total time and files/s; throughput
+should grow with the concurrency limit while a single connection is used.
+
+    python -m benchmarks.bench_batch_extract --files 32 --levels 1 4 16
+"""
+import argparse
+import asyncio
+import json
+import os
+import socket
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+import httpx
+import uvicorn
+from google.genai import types
+
+import api_pdf
+from report_parser_agent.agent import ExpectedOutput
+from report_parser_agent.extraction_cache import ExtractionCache
+
+PARSED = ExpectedOutput.model_validate({
+    "user_context": {
+        "user_name": "Benchmark Patient",
+        "personal_info": {"age": 40, "sex": "Female"},
+        "diagnosed_conditions": ["Hypertension"],
+        "current_medications": [],
+    },
+    "interaction_history": [],
+})
+
+
+def fake_parse_report(model_s):
+    async def parse_report(part: types.Part) -> ExpectedOutput:
+        """Stand-in for the model call."""
+        await asyncio.sleep(model_s)
+        return PARSED
+    return parse_report
+
+
+def serve_in_background():
+    """Start the app on a free local port and return (server, base URL)."""
+    with socket.socket() as probe:
+        probe.bind(("127.0.0.1", 0))
+        port = probe.getsockname()[1]
+    server = uvicorn.Server(uvicorn.Config(api_pdf.app, host="127.0.0.1", port=port, log_level="warning"))
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.05)
+    return server, f"http://127.0.0.1:{port}"
+
+
+async def post_batch(base_url, count):
+    """Send one batch of `count` distinct PDFs; return (first result s, total s, records)."""
+    files = [
+        ("files", (f"report-{index}.pdf", b"%PDF-1.4\n" + os.urandom(32 * 1024) + b"\n%%EOF\n", "application/pdf"))
+        for index in range(count)
+    ]
+    async with httpx.AsyncClient(base_url=base_url, timeout=None) as client:
+        started = time.perf_counter()
+        first, records = None, []
+        async with client.stream("POST", "/extract/batch", files=files) as response:
+            async for line in response.aiter_lines():
+                if line:
+                    first = first or time.perf_counter() - started
+                    records.append(json.loads(line))
+        return first, time.perf_counter() - started, records
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--files", type=int, default=32)
+    parser.add_argument("--levels", type=int, nargs="+", default=[1, 2, 4, 8, 16])
+    parser.add_argument("--model-ms", type=float, default=200.0)
+    args = parser.parse_args()
+
+    api_pdf.parse_report = fake_parse_report(args.model_ms / 1000)
+    server, base_url = serve_in_background()
+    with tempfile.TemporaryDirectory() as tmp:
+        for level in args.levels:
+            api_pdf.BATCH_CONCURRENCY = level
+            api_pdf.extraction_cache = ExtractionCache(Path(tmp) / f"cache-{level}")
+            first, total, records = asyncio.run(post_batch(base_url, args.files))
+            assert sorted(r["index"] for r in records) == list(range(args.files)), records
+            assert all(r["status"] == "ok" for r in records), records
+            print(f"concurrency={level:<4} first result={first * 1000:8.1f}ms  total={total * 1000:8.1f}ms  "
+                  f"throughput={args.files / total:6.1f} files/s")
+    server.should_exit = True
+
+
+if __name__ == "__main__":
+    main()
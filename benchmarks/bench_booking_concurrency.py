@@ -0,0 +1,119 @@
+# benchmarks/bench_booking_concurrency.py
+"""Concurrency stress test for slot booking.
+
+Many threads race to book the same small set of doctor slots (including retried
+calls with the same idempotency key). The script fails if any slot ends up booked
+twice and reports successful bookings per second. A last check makes a retried
+call miss the idempotency-key lookup, so only the unique key index catches it,
+and expects the original booking back rather than a failure.
+
+    python -m benchmarks.bench_booking_concurrency --threads 32 --attempts 200
+"""
+import argparse
+import json
+import random
+import threading
+import time
+from datetime import date, timedelta
+from unittest import mock
+
+from benchmarks.common import generated_db
+from orchestrator_agent.sub_agents.appointment_agent import database
+from orchestrator_agent.sub_agents.appointment_agent.schedule import format_minutes, slot_starts
+
+
+def candidate_slots(doctors, days):
+    """Every (doctor_id, date, 'HH:MM') slot of the first `doctors` doctors over the next `days` days."""
+    with database.get_pool().connection() as conn:
+        schedule = conn.execute(
+            "SELECT doctor_id, weekday, start_minute, end_minute FROM doctor_schedule WHERE doctor_id <= ?",
+            (doctors,),
+        ).fetchall()
+    slots = []
+    for offset in range(1, days + 1):
+        day = date.today() + timedelta(days=offset)
+        for doctor_id, weekday, start, end in schedule:
+            if weekday == day.weekday():
+                slots.extend((doctor_id, day.isoformat(), format_minutes(m)) for m in slot_starts(start, end))
+    return slots
+
+
+def check_key_collision(doctors, days):
+    """A retry that reaches the INSERT (the key lookup missed it) returns the original booking."""
+    last_contended = (date.today() + timedelta(days=days)).isoformat()
+    first, second = [slot for slot in candidate_slots(doctors, days + 7) if slot[1] > last_contended][:2]
+    original = json.loads(database._book_appointment_in_db(first[0], "Key Patient", first[1], first[2], "retry-key"))
+    assert original["status"] == "Success", original
+
+    real_lookup = database._booking_by_key
+    misses = [None]
+    with mock.patch.object(database, "_booking_by_key",
+                           lambda conn, key: misses.pop() if misses else real_lookup(conn, key)):
+        retried = json.loads(database._book_appointment_in_db(second[0], "Key Patient", second[1], second[2], "retry-key"))
+    assert retried["status"] == "Success", retried
+    assert retried["appointment_id"] == original["appointment_id"], retried
+    print("idempotency key check: a retry caught by the unique key index returns the original booking")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--threads", type=int, default=32)
+    parser.add_argument("--attempts", type=int, default=200, help="Booking attempts per thread")
+    parser.add_argument("--doctors", type=int, default=50, help="Doctors whose slots are contended")
+    parser.add_argument("--days", type=int, default=7)
+    args = parser.parse_args()
+
+    with generated_db(1000) as db_path:
+        database.configure_pool(db_path, max_size=args.threads)
+        slots = candidate_slots(args.doctors, args.days)
+        outcomes = {"Success": 0, "Failed": 0, "Error": 0, "Replayed": 0}
+        lock = threading.Lock()
+        barrier = threading.Barrier(args.threads)
+
+        def booker(worker):
+            rng = random.Random(worker)
+            barrier.wait()
+            for attempt in range(args.attempts):
+                doctor_id, day, time_text = rng.choice(slots)
+                # Every 5th call replays the previous request key, like a retried tool call
+                key = f"w{worker}-{attempt - (attempt % 5 == 4)}"
+                result = database._book_appointment_in_db(doctor_id, f"Patient {worker}", day, time_text, key)
+                try:
+                    payload = json.loads(result)
+                    status = payload["status"]
+                    if payload.get("message") == "Appointment already booked.":
+                        status = "Replayed"
+                except ValueError:
+                    status = "Error"
+                with lock:
+                    outcomes[status] += 1
+
+        threads = [threading.Thread(target=booker, args=(i,)) for i in range(args.threads)]
+        started = time.perf_counter()
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        elapsed = time.perf_counter() - started
+
+        with database.get_pool().connection() as conn:
+            doubles = conn.execute("""
+                SELECT doctor_id, appointment_date, slot_minute, COUNT(*) FROM appointments
+                WHERE status = 'Booked' AND slot_minute IS NOT NULL
+                GROUP BY doctor_id, appointment_date, slot_minute HAVING COUNT(*) > 1
+            """).fetchall()
+            booked = conn.execute("SELECT COUNT(*) FROM appointments").fetchone()[0]
+        check_key_collision(args.doctors, args.days)
+        database.get_pool().close()
+
+    total = args.threads * args.attempts
+    print(f"{len(slots)} contended slots, {args.threads} threads x {args.attempts} attempts = {total} calls in {elapsed:.2f}s")
+    print(f"outcomes: {outcomes}, rows booked: {booked}")
+    print(f"throughput: {total / elapsed:,.0f} calls/s, {outcomes['Success'] / elapsed:,.0f} bookings/s")
+    assert not doubles, f"Double-booked slots: {doubles[:10]}"
+    assert outcomes["Success"] == booked, "Successful calls and booked rows disagree"
+    print("OK: zero double bookings")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,189 @@
+# benchmarks/bench_chat_api.py
+"""Throughput and latency of the chat API as concurrent sessions scale.
+
+Every level of --sessions creates that many sessions through the real API
+in-process (api_chat.app over httpx's ASGI transport, with a throwaway session
+database) and plays --turns turns in each, closed loop: a session sends its
+next message once the previous reply is back. Messages come from the labeled
+set of bench_intent_router, so turns take the same paths as in production:
+routed locally or through the orchestrator, with a transfer. The model is a
+stub answering after --model-ms milliseconds; the faq_bot answer cache is off
+so every turn reaches it.
+
+For each level the script prints turns per second, model calls per turn, the
+CPU time per turn (API and client share one process and one event loop, so
+turns/s levels off at about 1 / CPU per turn; more workers scale it), and the
+p50/p99 turn latency. It then checks the serialization of one session:
+--burst messages posted to it at once must reach the model one at a time, in
+the order they were sent, and land in its history in that order (the history
+keeps only the latest turns, after a summary). Finally, while another
+connection holds the database's write lock, turns in two sessions must keep
+reaching the model without stalling the event loop.
+
+    python -m benchmarks.bench_chat_api --sessions 10,100,500,1000 --turns 5
+"""
+import argparse
+import asyncio
+import os
+import random
+import sqlite3
+import tempfile
+import time
+from typing import AsyncGenerator
+
+import httpx
+
+from benchmarks.bench_intent_router import LABELED, OracleLlm
+from benchmarks.common import percentile
+from google.adk.models.llm_request import LlmRequest
+from google.adk.models.llm_response import LlmResponse
+
+
+class ChatLlm(OracleLlm):
+    """OracleLlm that records how many calls run at once."""
+
+    in_flight: int = 0
+    peak: int = 0
+
+    async def generate_content_async(self, llm_request: LlmRequest, stream: bool = False) -> AsyncGenerator[LlmResponse, None]:
+        self.in_flight += 1
+        self.peak = max(self.peak, self.in_flight)
+        try:
+            responses = [response async for response in super().generate_content_async(llm_request, stream)]
+        finally:
+            self.in_flight -= 1
+        for response in responses:
+            yield response
+
+
+async def load(api_chat, sessions, turns, rng):
+    """Play `turns` turns in each of `sessions` sessions; return (turn latencies, failures, seconds)."""
+    routable = [text for text, label in LABELED if label]
+    latencies, failures = [], 0
+    transport = httpx.ASGITransport(app=api_chat.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=600) as client:
+        created = await asyncio.gather(*(client.post("/chat/sessions", json={"user_id": f"user-{index}"})
+                                         for index in range(sessions)))
+        conversations = [(body["user_id"], body["session_id"], rng.sample(routable, turns))
+                         for body in (response.json() for response in created)]
+
+        async def converse(user_id, session_id, messages):
+            nonlocal failures
+            for message in messages:
+                start = time.perf_counter()
+                response = await client.post(f"/chat/sessions/{user_id}/{session_id}/messages",
+                                             json={"message": message})
+                if response.status_code == 200:
+                    latencies.append(time.perf_counter() - start)
+                else:
+                    failures += 1
+
+        begin = time.perf_counter()
+        await asyncio.gather(*(converse(*conversation) for conversation in conversations))
+        return latencies, failures, time.perf_counter() - begin
+
+
+async def burst(api_chat, count, rng):
+    """Post `count` messages to one session at once; return (seconds, history user turns, sent order)."""
+    messages = rng.sample([text for text, label in LABELED if label], count)
+    transport = httpx.ASGITransport(app=api_chat.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=600) as client:
+        session = (await client.post("/chat/sessions", json={"user_id": "burst"})).json()
+        url = f"/chat/sessions/burst/{session['session_id']}"
+        tasks = []
+        begin = time.perf_counter()
+        for message in messages:
+            tasks.append(asyncio.create_task(client.post(f"{url}/messages", json={"message": message})))
+            # Let each request reach the session lock before the next one is sent
+            await asyncio.sleep(0)
+        responses = await asyncio.gather(*tasks)
+        seconds = time.perf_counter() - begin
+        assert all(response.status_code == 200 for response in responses), [r.text for r in responses]
+        history = (await client.get(url)).json()["interaction_history"]
+    return seconds, [entry["content"] for entry in history if entry.get("role") == "user"], messages
+
+
+async def stalled_writes(api_chat, model, hold_s=1.0):
+    """Turns in two sessions while another connection holds the database's write lock.
+
+    Returns (max event loop lag, model calls made while the lock was held, response statuses).
+    """
+    transport = httpx.ASGITransport(app=api_chat.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=600) as client:
+        sessions = [(await client.post("/chat/sessions", json={"user_id": f"stall-{index}"})).json()
+                    for index in range(2)]
+        blocker = sqlite3.connect(api_chat.session_service.db_file, isolation_level=None)
+        blocker.execute("BEGIN IMMEDIATE")
+        lag, calls_before = 0.0, model.calls
+        tasks = [asyncio.create_task(client.post(f"/chat/sessions/{body['user_id']}/{body['session_id']}/messages",
+                                                 json={"message": "What are the side effects of Metformin?"}))
+                 for body in sessions]
+        deadline = time.perf_counter() + hold_s
+        while time.perf_counter() < deadline:
+            tick = time.perf_counter()
+            await asyncio.sleep(0.01)
+            lag = max(lag, time.perf_counter() - tick - 0.01)
+        calls_while_locked = model.calls - calls_before
+        blocker.execute("ROLLBACK")
+        blocker.close()
+        responses = await asyncio.gather(*tasks)
+    return lag, calls_while_locked, [response.status_code for response in responses]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sessions", default="10,100,500,1000")
+    parser.add_argument("--turns", type=int, default=5, help="turns per session")
+    parser.add_argument("--model-ms", type=float, default=200.0)
+    parser.add_argument("--burst", type=int, default=8, help="concurrent messages sent to one session")
+    parser.add_argument("--seed", type=int, default=25)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        os.environ["AROGYA_SESSION_DB"] = f"{tmp}/sessions.db"
+        import api_chat
+        from admission import AdmissionController
+        from orchestrator_agent.agent import root_agent
+        from orchestrator_agent.sub_agents.faq_bot import answer_cache
+
+        answer_cache.FAQ_CACHE = False
+        labels = {text: label for text, label in LABELED}
+        rng = random.Random(args.seed)
+        print(f"stub model call {args.model_ms:.0f}ms, {args.turns} turns per session, closed loop")
+        for sessions in (int(value) for value in args.sessions.split(",")):
+            model = ChatLlm(labels=labels, delay_s=args.model_ms / 1000)
+            root_agent.model = model
+            # A fresh limiter per run (a new event loop), with room for every session
+            api_chat.model_admission = AdmissionController(sessions, sessions, 600)
+            cpu = time.process_time()
+            latencies, failures, seconds = asyncio.run(load(api_chat, sessions, args.turns, rng))
+            turns = len(latencies) + failures
+            cpu = time.process_time() - cpu
+            print(f"sessions={sessions:<5} turns={turns:<5} failed={failures:<3} {len(latencies) / seconds:7.1f} turns/s  "
+                  f"model calls/turn {model.calls / turns:.2f} (peak {model.peak} at once)  cpu/turn {cpu / turns * 1000:4.1f}ms  "
+                  f"turn p50={percentile(latencies, 50) * 1000:6.0f}ms p99={percentile(latencies, 99) * 1000:6.0f}ms")
+
+        model = ChatLlm(labels=labels, delay_s=args.model_ms / 1000)
+        root_agent.model = model
+        api_chat.model_admission = AdmissionController(args.burst, args.burst, 600)
+        seconds, history, sent = asyncio.run(burst(api_chat, args.burst, rng))
+        print(f"one session, {args.burst} messages at once: {seconds:.2f}s for {model.calls} model calls "
+              f"({model.calls * args.model_ms / 1000:.2f}s back to back), peak model calls at once {model.peak}, "
+              f"history in send order: {bool(history) and history == sent[-len(history):]}")
+        print(f"session locks: {api_chat.session_locks.stats()}")
+
+        # A write waiting on SQLite's lock (e.g. another worker's) must not stall other sessions
+        model = ChatLlm(labels=labels, delay_s=args.model_ms / 1000)
+        root_agent.model = model
+        api_chat.model_admission = AdmissionController(2, 2, 600)
+        lag, calls, statuses = asyncio.run(stalled_writes(api_chat, model))
+        print(f"database write-locked for 1s: {calls} model calls made meanwhile in 2 sessions, "
+              f"max event loop lag {lag * 1000:.0f}ms, statuses {statuses}")
+        assert statuses == [200, 200], statuses
+        assert calls >= 2, "the sessions made no progress while a write waited for the lock"
+        assert lag < 0.2, f"event loop stalled for {lag * 1000:.0f}ms"
+        api_chat.session_service.close()
+
+
+if __name__ == "__main__":
+    main()
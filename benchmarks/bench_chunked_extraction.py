@@ -0,0 +1,176 @@
+# benchmarks/bench_chunked_extraction.py
+"""Wall-clock scaling and merge accuracy of chunked extraction on very large reports.
+
+Builds long synthetic reports (--filler-pages pages around the UserContext
+fields) and runs chunked_extraction.extract_chunked through api_pdf.extract_chunk
+and the real ADK runner, for several chunk sizes. The model is StubLlm: it
+answers each chunk with the rule-based extraction of that chunk's pages only,
+after --ms-per-page ms per page (plus jitter, so chunks finish out of order).
+
+Reports the mean wall-clock time per report, the speed-up over a single call,
+how many merged outputs equal the ground truth, and whether the merge gave the
+same answer on a repeated run.
+
+    python -m benchmarks.bench_chunked_extraction --count 6 --filler-pages 190
+"""
+import argparse
+import asyncio
+import json
+import random
+import re
+import io
+import tempfile
+import time
+from types import SimpleNamespace
+
+import api_pdf
+import pdf_upload
+from benchmarks.sample_reports import make_corpus
+from benchmarks.stub_llm import StubLlm
+from report_parser_agent.agent import report_parser_agent
+from report_parser_agent.chunked_extraction import extract_chunked, merge_outputs
+from report_parser_agent.local_extractor import extract_fields, read_text_pages
+
+_PAGES = re.compile(r"pages (\d+)-(\d+) of")
+
+# Text layer of the report being extracted, read once outside the timed runs
+current_pages = []
+
+
+def _page_range(llm_request):
+    prompt = " ".join(
+        part.text for content in llm_request.contents for part in content.parts or [] if part.text
+    )
+    match = _PAGES.search(prompt)
+    return (int(match.group(1)), int(match.group(2))) if match else (1, len(current_pages))
+
+
+def stub_reply(llm_request):
+    first, last = _page_range(llm_request)
+    output = extract_fields("\n".join(current_pages[first - 1:last])).output
+    return output.model_dump_json() if output else "{}"
+
+
+def stub_delay(ms_per_page, rng):
+    def delay(llm_request):
+        first, last = _page_range(llm_request)
+        return (last - first + 1) * ms_per_page / 1000 * rng.uniform(0.8, 1.2)
+    return delay
+
+
+def check_merge():
+    """Merge rules on hand-written partials."""
+    def partial(name="", age=0, sex="", conditions=(), medications=()):
+        return api_pdf.ExpectedOutput.model_validate({
+            "user_context": {
+                "user_name": name, "personal_info": {"age": age, "sex": sex},
+                "diagnosed_conditions": list(conditions),
+                "current_medications": [{"name": n, "dosage": d} for n, d in medications],
+            },
+            "interaction_history": [],
+        })
+
+    merged = merge_outputs([
+        partial("Rahul Sharma", 54, "Male", ["Hypertension"], [("Metformin", "")]),
+        partial("", 0, "", ["hypertension.", "Type 2 Diabetes"], [("metformin", "500 mg"), ("Aspirin", "75mg")]),
+        partial("Rahul Sharma", 45, "Male", [], [("METFORMIN", "500mg"), ("Metformin", "1000mg")]),
+        partial("R. Sharma", 54, "Male"),
+    ]).user_context
+    assert merged.user_name == "Rahul Sharma"
+    assert (merged.personal_info.age, merged.personal_info.sex) == (54, "Male")
+    assert merged.diagnosed_conditions == ["Hypertension", "Type 2 Diabetes"]
+    assert [(m.name, m.dosage) for m in merged.current_medications] == [
+        ("metformin", "500 mg"), ("Metformin", "1000mg"), ("Aspirin", "75mg")
+    ]
+    # Age and sex voted separately: neither is lost when a chunk has only one of them
+    merged = merge_outputs([
+        partial("Asha Verma", 61, ""),
+        partial("", 0, "Female"),
+        partial("", 61, "Other"),
+        partial("", 0, "female"),
+    ]).user_context
+    assert (merged.personal_info.age, merged.personal_info.sex) == (61, "Female"), merged.personal_info
+    merged = merge_outputs([partial("", 0, "Other"), partial("", 38, "")]).user_context
+    assert (merged.personal_info.age, merged.personal_info.sex) == (38, "Other"), merged.personal_info
+    print("merge rules: OK")
+
+
+def check_inline_limit(data, truth):
+    """Chunks cut for inline-only sending (Vertex AI without a bucket) fit max_bytes, cover every page once."""
+    pages = read_text_pages(data)
+    max_bytes = len(data) // 5
+    chunks = []
+
+    async def extract(chunk, first, last, total):
+        chunks.append((first, last, len(chunk)))
+        return extract_fields("\n".join(pages[first - 1:last])).output
+
+    output = asyncio.run(extract_chunked(data, extract, max_bytes=max_bytes))
+    assert json.loads(output.model_dump_json()) == truth
+    assert all(size <= max_bytes or first == last for first, last, size in chunks), chunks
+    covered = [page for first, last, _ in sorted(chunks) for page in range(first, last + 1)]
+    assert covered == list(range(1, len(pages) + 1)), chunks
+
+    # pdf_part never inlines a report over the limit there; it refuses instead
+    client, pdf_upload._files_client = pdf_upload._files_client, SimpleNamespace(vertexai=True)
+    try:
+        big = pdf_upload.SpooledPdf(io.BytesIO(data), pdf_upload.INLINE_MAX_BYTES + 1, "0" * 64)
+        assert not pdf_upload.uploads_by_reference()
+
+        async def send():
+            async with pdf_upload.pdf_part(big):
+                raise AssertionError("an oversized report was inlined")
+        try:
+            asyncio.run(send())
+        except pdf_upload.UploadTooLarge:
+            pass
+    finally:
+        pdf_upload._files_client = client
+    print(f"inline limit check: {len(chunks)} chunks of at most {max_bytes} bytes, merge correct")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--count", type=int, default=6)
+    parser.add_argument("--filler-pages", type=int, default=190)
+    parser.add_argument("--chunk-pages", default="0,100,50,25,10", help="0 = one call for the whole report")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--ms-per-page", type=float, default=20.0)
+    parser.add_argument("--seed", type=int, default=5)
+    args = parser.parse_args()
+
+    check_merge()
+    global current_pages
+    rng = random.Random(args.seed)
+    report_parser_agent.model = StubLlm(reply=stub_reply, delay_s=stub_delay(args.ms_per_page, rng))
+
+    with tempfile.TemporaryDirectory() as tmp:
+        corpus = [item for item in make_corpus(tmp, args.count * 3, args.seed, args.filler_pages)
+                  if item[2] in ("lab_report", "discharge_summary")][:args.count]
+        reports = [(path.read_bytes(), truth) for path, truth, _ in corpus]
+
+    check_inline_limit(*reports[0])
+
+    baseline = None
+    for chunk_pages in (int(value) for value in args.chunk_pages.split(",")):
+        elapsed = correct = stable = 0
+        for data, truth in reports:
+            current_pages = read_text_pages(data)
+            size = chunk_pages or len(current_pages)
+            runs = []
+            for _ in range(2):
+                start = time.perf_counter()
+                output = asyncio.run(extract_chunked(data, api_pdf.extract_chunk, size, args.concurrency))
+                elapsed += time.perf_counter() - start
+                runs.append(output)
+            correct += json.loads(runs[0].model_dump_json()) == truth
+            stable += runs[0] == runs[1]
+        mean = elapsed / (2 * len(reports))
+        baseline = baseline or mean
+        label = f"chunks of {chunk_pages}" if chunk_pages else "single call"
+        print(f"{label:<16} mean={mean * 1000:8.1f}ms  speed-up={baseline / mean:5.2f}x  "
+              f"correct={correct}/{len(reports)}  deterministic={stable}/{len(reports)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+# benchmarks/bench_db_pool.py
+"""Tool-call latency of the appointment tools with and without the connection pool.
+
+"before" opens and closes a plain sqlite3 connection on every call (the old
+create_connection() behaviour); "after" uses the pooled, WAL-tuned connections.
+
+    python -m benchmarks.bench_db_pool --calls 2000 --doctors 1000000 --appointments 10000000
+
+Without --doctors the seeded doctors.db shipped with the repo is used.
+"""
+import argparse
+import sqlite3
+from contextlib import contextmanager
+from datetime import date, timedelta
+
+from benchmarks.common import generated_db, summarize, temp_db_copy, timed
+from orchestrator_agent.sub_agents.appointment_agent import database
+
+
+class UnpooledConnections:
+    """Stand-in for ConnectionPool that connects and closes on every call."""
+
+    def __init__(self, db_file):
+        self.db_file = db_file
+
+    @contextmanager
+    def connection(self):
+        conn = sqlite3.connect(self.db_file, check_same_thread=False)
+        try:
+            yield conn
+        finally:
+            conn.close()
+
+    def close(self):
+        pass
+
+
+def run_calls(calls):
+    """Exercise the three tools and return their latency samples.
+
+    The uncached query bodies are timed, so the result cache doesn't hide the
+    connection cost being measured.
+    """
+    tomorrow = (date.today() + timedelta(days=1)).isoformat()
+    samples = {"find_doctors": [], "book_appointment": [], "view_my_appointments": []}
+    for i in range(calls):
+        _, elapsed = timed(database._search_doctors, "Cardiologist", "Pune")
+        samples["find_doctors"].append(elapsed)
+        _, elapsed = timed(database._query_appointments, "Bench Patient")
+        samples["view_my_appointments"].append(elapsed)
+        if i % 10 == 0:
+            _, elapsed = timed(
+                database._book_appointment_in_db, 1 + i % 1000, "Bench Patient", tomorrow, "10:00"
+            )
+            samples["book_appointment"].append(elapsed)
+    return samples
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--calls", type=int, default=2000)
+    parser.add_argument("--doctors", type=int, default=0, help="Generate a dataset of this size")
+    parser.add_argument("--appointments", type=int, default=0)
+    args = parser.parse_args()
+
+    for label, make_pool in (
+        ("before (connect per call)", UnpooledConnections),
+        ("after (pooled)", lambda path: database.ConnectionPool(path, max_size=database.POOL_SIZE)),
+    ):
+        dataset = generated_db(args.doctors, args.appointments) if args.doctors else temp_db_copy()
+        with dataset as db_path:
+            previous = database._pool
+            database._pool = make_pool(db_path)
+            try:
+                samples = run_calls(args.calls)
+            finally:
+                database._pool.close()
+                database._pool = previous
+        print(f"\n== {label}")
+        for tool, values in samples.items():
+            summarize(tool, values)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+# benchmarks/bench_doctor_search.py
+"""Doctor search latency as the doctors table grows, plus query-plan checks.
+
+Every search shape used by find_doctors is run through EXPLAIN QUERY PLAN and the
+script fails if SQLite would scan the doctors table instead of using an index.
+The uncached search is timed, so the result cache doesn't hide query latency.
+
+    python -m benchmarks.bench_doctor_search --sizes 1000 100000 1000000
+"""
+import argparse
+
+from benchmarks.common import generated_db, summarize, timed
+from orchestrator_agent.sub_agents.appointment_agent import database
+
+SEARCHES = [
+    ("Cardiologist", "Pune"),
+    ("cardiologist", " pune "),
+    ("physician", "Mumbai"),
+    ("Cardio", "Delhi"),
+    ("Neurologist", ""),
+    ("", "Chennai"),
+    ("", ""),
+]
+
+
+def assert_no_full_scan(conn):
+    """Fail if any search shape makes SQLite walk the whole doctors table."""
+    for specialization, location in SEARCHES:
+        query, params = database._build_doctor_search(specialization, location)
+        plan = [row[3] for row in conn.execute(f"EXPLAIN QUERY PLAN {query}", params)]
+        scans = [step for step in plan if step.startswith("SCAN doctors") and "INDEX" not in step]
+        assert not scans, f"Full scan for {(specialization, location)}: {plan}"
+        print(f"plan {(specialization, location)!r:<36} {' | '.join(plan)}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--repeat", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    for size in sorted(args.sizes):
+        with generated_db(size, seed=args.seed) as db_path:
+            database.configure_pool(db_path)
+            with database.get_pool().connection() as conn:
+                assert_no_full_scan(conn)
+
+            samples = []
+            for _ in range(args.repeat):
+                for specialization, location in SEARCHES:
+                    _, elapsed = timed(database._search_doctors, specialization, location)
+                    samples.append(elapsed)
+            summarize(f"find_doctors @ {size} doctors", samples)
+            database.get_pool().close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+# benchmarks/bench_earliest_slots.py
+"""Latency of find_earliest_available on a large generated dataset.
+
+Also cross-checks the bitmap-based answer against a brute-force search over the
+appointments table and asserts the query plan never scans doctors or appointments.
+
+    python -m benchmarks.bench_earliest_slots --doctors 1000000 --appointments 10000000
+"""
+import argparse
+from datetime import date, datetime, timedelta
+
+from benchmarks.common import generated_db, summarize, timed
+from orchestrator_agent.sub_agents.appointment_agent import database
+from orchestrator_agent.sub_agents.appointment_agent.result_format import decode_records
+from orchestrator_agent.sub_agents.appointment_agent.schedule import format_minutes
+
+SEARCHES = [("Cardiologist", "Pune"), ("physician", "Mumbai"), ("Neurologist", ""), ("Oncologist", "Delhi")]
+
+
+def assert_indexed(conn):
+    params = (date.today().isoformat(), "cardiologist", "pune", 0)
+    plan = [row[3] for row in conn.execute(f"EXPLAIN QUERY PLAN {database._EARLIEST_SLOTS_QUERY}", params)]
+    print("plan:", " | ".join(plan))
+    assert not any(step.startswith("SCAN") or "TEMP B-TREE" in step for step in plan), plan
+
+
+def brute_force(conn, specialization, location, count):
+    """Earliest (date, time) pairs computed from the appointments rows themselves."""
+    clause, params = database._doctor_filters(specialization, location)
+    doctor_ids = [row[0] for row in conn.execute(f"SELECT id FROM doctors WHERE 1=1{clause}", params)]
+    now = datetime.now()
+    for offset in range(database.EARLIEST_SEARCH_DAYS):
+        day = (now.date() + timedelta(days=offset)).isoformat()
+        minutes = sorted(m for doctor_id in doctor_ids for m in database._free_slots(conn, doctor_id, day))
+        if minutes:
+            return [(day, format_minutes(m)) for m in minutes[:count]]
+    return []
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--doctors", type=int, default=100_000)
+    parser.add_argument("--appointments", type=int, default=1_000_000)
+    parser.add_argument("--repeat", type=int, default=50)
+    parser.add_argument("--count", type=int, default=5)
+    args = parser.parse_args()
+
+    with generated_db(args.doctors, args.appointments) as db_path:
+        database.configure_pool(db_path)
+        with database.get_pool().connection() as conn:
+            assert_indexed(conn)
+            if args.doctors <= 200_000:
+                for specialization, location in SEARCHES[:2]:
+                    fast = decode_records(database._find_earliest_slots_in_db(specialization, location, args.count))
+                    expected = brute_force(conn, specialization, location, args.count)
+                    # Only the first day's slots are compared; brute_force stops at the first day too
+                    got = [(s["date"], s["time"]) for s in fast if s["date"] == fast[0]["date"]]
+                    assert got == expected[:len(got)], (specialization, location, got, expected)
+                print("cross-check against brute force: OK")
+
+        for specialization, location in SEARCHES:
+            samples = [
+                timed(database._find_earliest_slots_in_db, specialization, location, args.count)[1]
+                for _ in range(args.repeat)
+            ]
+            summarize(f"earliest {specialization or '*'}/{location or '*'}", samples)
+        database.get_pool().close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+# benchmarks/bench_extract_metrics.py
+"""Overhead of per-stage instrumentation, and what it reports.
+
+1. Micro: the cost of one `api_metrics.stage()` span + histogram observation.
+2. End to end: --requests /extract/ uploads of small scanned reports (model path,
+   StubLlm as the model) sent in-process, with instrumentation on and then
+   replaced by no-ops, comparing mean latency.
+3. The Server-Timing header of one request and the stage sums from /metrics.
+
+    python -m benchmarks.bench_extract_metrics --requests 300
+"""
+import argparse
+import asyncio
+import json
+import random
+import statistics
+import tempfile
+import time
+from contextlib import nullcontext
+
+import httpx
+
+import api_metrics
+import api_pdf
+from benchmarks.sample_reports import pdf_bytes, random_truth, report_pages
+from benchmarks.stub_llm import StubLlm
+from report_parser_agent.agent import report_parser_agent
+from report_parser_agent.extraction_cache import ExtractionCache
+
+
+def micro(iterations=100_000):
+    start = time.perf_counter()
+    for _ in range(iterations):
+        with api_metrics.stage("bench"):
+            pass
+    return (time.perf_counter() - start) / iterations
+
+
+async def run_requests(reports):
+    latencies, last = [], None
+    transport = httpx.ASGITransport(app=api_pdf.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        for index, data in enumerate(reports):
+            files = {"file": (f"report-{index}.pdf", data, "application/pdf")}
+            start = time.perf_counter()
+            last = await client.post("/extract/", files=files)
+            latencies.append(time.perf_counter() - start)
+            assert last.status_code == 200, last.text
+        metrics = (await client.get("/metrics")).text
+    return latencies, last, metrics
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--requests", type=int, default=300)
+    parser.add_argument("--seed", type=int, default=2)
+    args = parser.parse_args()
+
+    per_stage = micro()
+    print(f"stage() span + observation: {per_stage * 1e6:.2f}us")
+
+    rng = random.Random(args.seed)
+    truth = random_truth(rng)
+    report_parser_agent.model = StubLlm(reply=json.dumps(truth))
+    # Distinct scanned (image-only) reports: no cache hits, no local answer
+    reports = [pdf_bytes(report_pages("scanned", random_truth(rng), rng), scanned=True) for _ in range(args.requests)]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        # Warm up imports, the runner and the stub before timing anything
+        api_pdf.extraction_cache = ExtractionCache(directory=f"{tmp}/warm", fingerprint="bench")
+        asyncio.run(run_requests(reports[:20]))
+        api_pdf.extraction_cache = ExtractionCache(directory=f"{tmp}/on", fingerprint="bench")
+        on, response, metrics = asyncio.run(run_requests(reports))
+
+        api_pdf.extraction_cache = ExtractionCache(directory=f"{tmp}/off", fingerprint="bench")
+        api_pdf.stage = lambda name: nullcontext()
+        api_metrics.record = lambda name, elapsed: None
+        for metric in api_metrics.REGISTRY:
+            for method in ("observe", "inc", "dec"):
+                if hasattr(metric, method):
+                    setattr(metric, method, lambda *args, **kwargs: None)
+        off, _, _ = asyncio.run(run_requests(reports))
+
+    on_ms, off_ms = statistics.fmean(on) * 1000, statistics.fmean(off) * 1000
+    stages = len(response.headers.get("server-timing", "").split(","))
+    print(f"/extract/ mean latency: instrumented {on_ms:.2f}ms, no-op {off_ms:.2f}ms "
+          f"({(on_ms - off_ms) / off_ms:+.1%}); ~{stages} stages x {per_stage * 1e6:.1f}us = "
+          f"{stages * per_stage * 1000:.3f}ms per request")
+    print(f"Server-Timing: {response.headers.get('server-timing')}")
+    for line in metrics.splitlines():
+        if 'stage="bench"' not in line and line.startswith(("arogya_extract_stage_seconds_sum", "arogya_extract_requests_in_flight",
+                            "arogya_extract_request_seconds_count", "arogya_extract_errors_total")):
+            print(line)
+
+
+if __name__ == "__main__":
+    main()
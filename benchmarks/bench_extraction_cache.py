@@ -0,0 +1,73 @@
+# benchmarks/bench_extraction_cache.py
+"""Repeat-upload workload against the /extract/ result cache.
+
+Uploads are drawn from a pool of distinct synthetic reports with a skewed
+(Zipf-like) popularity, like clinics re-uploading the same reports. A miss
+stands in for the model call with a fixed --model-ms delay and stores a result;
+a hit is served from the on-disk cache. Reports hit latency, hit ratio and
+bytes saved.
+
+    python -m benchmarks.bench_extraction_cache --uploads 2000 --reports 300
+"""
+import argparse
+import hashlib
+import random
+import tempfile
+import time
+
+from benchmarks.common import summarize, timed
+from report_parser_agent.agent import ExpectedOutput
+from report_parser_agent.extraction_cache import ExtractionCache
+
+
+def fake_output(index):
+    """A plausible parsed report for synthetic report `index`."""
+    return ExpectedOutput.model_validate({
+        "user_context": {
+            "user_name": f"Patient {index}",
+            "personal_info": {"age": 20 + index % 60, "sex": "Female" if index % 2 else "Male"},
+            "diagnosed_conditions": ["Type 2 Diabetes", "Hypertension"][: 1 + index % 2],
+            "current_medications": [{"name": "Metformin", "dosage": "500mg"}],
+        },
+        "interaction_history": [],
+    })
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--uploads", type=int, default=2000)
+    parser.add_argument("--reports", type=int, default=300)
+    parser.add_argument("--pdf-kb", type=int, default=512, help="size of each synthetic report")
+    parser.add_argument("--max-kb", type=int, default=32, help="cache size bound")
+    parser.add_argument("--model-ms", type=float, default=5.0, help="simulated model latency on a miss")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    weights = [1 / (rank + 1) for rank in range(args.reports)]
+    # Only the digests matter to the cache; --pdf-kb just sizes the bytes saved
+    digests = [hashlib.sha256(rng.randbytes(64)).hexdigest() for _ in range(args.reports)]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = ExtractionCache(tmp, max_bytes=args.max_kb * 1024)
+        hits, misses = [], []
+        for index in rng.choices(range(args.reports), weights, k=args.uploads):
+            output, elapsed = timed(cache.get, digests[index], args.pdf_kb * 1024)
+            if output is None:
+                time.sleep(args.model_ms / 1000)
+                cache.put(digests[index], fake_output(index))
+                misses.append(elapsed)
+            else:
+                hits.append(elapsed)
+        stats = cache.stats()
+
+    summarize("cache hit (read + validate)", hits)
+    summarize("cache miss (lookup only)", misses)
+    print(
+        f"hit ratio={stats['hit_ratio']:.1%}  entries={stats['entries']}  size={stats['size_bytes']}B  "
+        f"evictions={stats['evictions']}  bytes saved={stats['bytes_saved'] / 1024 / 1024:.1f}MB"
+    )
+
+
+if __name__ == "__main__":
+    main()
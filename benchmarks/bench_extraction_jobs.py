@@ -0,0 +1,160 @@
+# benchmarks/bench_extraction_jobs.py
+"""Submit latency, retries and crash recovery of the extraction job queue.
+
+Submits --jobs small synthetic PDFs to POST /extract/jobs in-process, with the
+model call replaced by a --model-ms delay that fails --fail-rate of attempts.
+Halfway through, the workers are stopped (a simulated crash) and a fresh queue
+on the same job table takes over. Checks that every job ends up succeeded, and
+reports submit latency and time to drain. A second check runs a queue with a
+short retention and confirms finished jobs and their PDFs are purged while it
+keeps running, and that nothing is created on disk before start(). A third
+restarts a queue over a job left running on its last attempt (a report that
+killed the process) and expects it failed, not re-queued again.
+
+    python -m benchmarks.bench_extraction_jobs --jobs 200 --workers 8
+"""
+import argparse
+import asyncio
+import hashlib
+import io
+import os
+import random
+import tempfile
+import time
+from pathlib import Path
+
+import httpx
+
+import api_pdf
+from benchmarks.common import summarize
+from extraction_jobs import JobQueue
+from pdf_upload import SpooledPdf
+from report_parser_agent.agent import ExpectedOutput
+
+PARSED = ExpectedOutput.model_validate({
+    "user_context": {
+        "user_name": "Benchmark Patient",
+        "personal_info": {"age": 52, "sex": "Male"},
+        "diagnosed_conditions": ["Type 2 Diabetes"],
+        "current_medications": [{"name": "Metformin", "dosage": "500mg"}],
+    },
+    "interaction_history": [],
+})
+
+
+def flaky_handler(model_s, fail_rate, rng):
+    async def handler(pdf, filename):
+        """Stand-in for extract_report that sometimes fails like a transient upstream error."""
+        await asyncio.sleep(model_s)
+        if rng.random() < fail_rate:
+            raise ConnectionError("simulated upstream error")
+        return PARSED
+    return handler
+
+
+async def drain(queue, total, timeout):
+    """Wait until `total` jobs have finished; return the status counts."""
+    deadline = time.perf_counter() + timeout
+    while time.perf_counter() < deadline:
+        counts = await asyncio.to_thread(queue.counts)
+        if counts.get("succeeded", 0) + counts.get("failed", 0) >= total:
+            return counts
+        await asyncio.sleep(0.05)
+    raise TimeoutError(f"jobs did not finish: {counts}")
+
+
+async def check_purge(tmp):
+    """Finished jobs are purged by the running queue, and the table is only created by start()."""
+    root = Path(tmp) / "purge"
+    queue = JobQueue(flaky_handler(0, 0, random.Random(0)), db_file=root / "jobs.db", spool_dir=root / "spool",
+                     workers=2, retention_seconds=0.1, purge_interval=0.05)
+    assert not root.exists(), "JobQueue() created files before start()"
+    root.mkdir()
+    await queue.start()
+    body = b"%PDF-1.4\n" + os.urandom(1024) + b"\n%%EOF\n"
+    for index in range(5):
+        await queue.submit(SpooledPdf(io.BytesIO(body), len(body), hashlib.sha256(body).hexdigest()), f"p{index}.pdf")
+    deadline = time.perf_counter() + 5
+    while time.perf_counter() < deadline:
+        counts = await asyncio.to_thread(queue.counts)
+        if not counts and not any((root / "spool").iterdir()):
+            break
+        await asyncio.sleep(0.05)
+    await queue.stop()
+    assert not counts, f"expired jobs were not purged: {counts}"
+    print("purge check: finished jobs and their PDFs purged while the queue runs")
+
+
+async def check_interrupted(tmp):
+    """A job interrupted on its last attempt is failed by recovery; one with attempts left is re-queued."""
+    root = Path(tmp) / "interrupted"
+    queue = JobQueue(flaky_handler(0, 0, random.Random(0)), db_file=root / "jobs.db", spool_dir=root / "spool",
+                     max_attempts=3)
+    body = b"%PDF-1.4\n" + os.urandom(1024) + b"\n%%EOF\n"
+    poison, retried = [await queue.submit(SpooledPdf(io.BytesIO(body), len(body), hashlib.sha256(body).hexdigest()),
+                                          name) for name in ("poison.pdf", "retried.pdf")]
+    # As left by a crash mid-extraction: the poison job on its 3rd attempt, the other on its 1st
+    for job_id, attempts in ((poison, 3), (retried, 1)):
+        queue._execute("UPDATE jobs SET status = 'running', attempts = ? WHERE id = ?", (attempts, job_id))
+    assert queue.recover() == (1, 1)
+    assert queue.get(poison)["status"] == "failed" and queue.get(poison)["error"].startswith("Interrupted")
+    assert queue.get(retried)["status"] == "queued"
+    assert not (root / "spool" / f"{poison}.pdf").exists()
+    print("interrupted job check: a job out of attempts is failed on restart instead of crash-looping")
+
+
+async def run(args, tmp):
+    rng = random.Random(42)
+    handler = flaky_handler(args.model_ms / 1000, args.fail_rate, rng)
+
+    def new_queue():
+        return JobQueue(handler, db_file=Path(tmp) / "jobs.db", spool_dir=Path(tmp) / "spool",
+                        workers=args.workers, max_attempts=5, backoff_seconds=0.05)
+
+    api_pdf.job_queue = new_queue()
+    await api_pdf.job_queue.start()
+    transport = httpx.ASGITransport(app=api_pdf.app)
+    submits, job_ids = [], []
+    started = time.perf_counter()
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        for index in range(args.jobs):
+            body = b"%PDF-1.4\n" + os.urandom(16 * 1024) + b"\n%%EOF\n"
+            t0 = time.perf_counter()
+            response = await client.post("/extract/jobs", files={"file": (f"r{index}.pdf", body, "application/pdf")})
+            submits.append(time.perf_counter() - t0)
+            assert response.status_code == 202, response.text
+            job_ids.append(response.json()["job_id"])
+            if index == args.jobs // 2:
+                # Simulated crash: workers die with jobs in flight; a new process recovers them
+                await api_pdf.job_queue.stop()
+                api_pdf.job_queue = new_queue()
+                await api_pdf.job_queue.start()
+
+        counts = await drain(api_pdf.job_queue, args.jobs, timeout=60)
+        elapsed = time.perf_counter() - started
+        result = await client.get(f"/extract/jobs/{job_ids[0]}/result")
+        assert result.status_code == 200 and result.json()["user_context"]["user_name"] == "Benchmark Patient"
+    await api_pdf.job_queue.stop()
+
+    summarize("POST /extract/jobs", submits)
+    attempts = sum(row[0] for row in api_pdf.job_queue._execute("SELECT attempts FROM jobs"))
+    print(f"statuses={counts}  attempts={attempts} for {args.jobs} jobs  drained in {elapsed:.2f}s")
+    assert counts.get("succeeded") == args.jobs, counts
+    print("OK: every job succeeded across retries and the simulated crash")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--jobs", type=int, default=200)
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--model-ms", type=float, default=50.0)
+    parser.add_argument("--fail-rate", type=float, default=0.2)
+    args = parser.parse_args()
+    with tempfile.TemporaryDirectory() as tmp:
+        asyncio.run(check_purge(tmp))
+        asyncio.run(check_interrupted(tmp))
+        asyncio.run(run(args, tmp))
+
+
+if __name__ == "__main__":
+    main()
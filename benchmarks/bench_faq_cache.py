@@ -0,0 +1,232 @@
+# benchmarks/bench_faq_cache.py
+"""Hit rate and latency saved by the shared faq_bot answer cache.
+
+--requests questions from --users users go through a real ADK Runner on
+faq_bot (as main.py runs it when the router picks faq_bot). The stub model
+answers after --model-ms milliseconds. Questions are drawn from TOPICS with
+Zipf-like popularity and asked in several phrasings. --personal of them are
+about the user ("what are my medications?") and must bypass the cache. For a
+user with that condition, the stub sometimes tailors a general answer ("Since
+you have hypertension..."); such answers must not be stored.
+
+The run is played with the cache off, then on, and prints:
+- hits, near-duplicate hits, bypasses and answers not stored;
+- model calls;
+- turn latency for each run;
+- two correctness checks: cached answers served for the wrong topic, and
+  cached answers carrying another user's context.
+
+Before the run, pairs of similar questions with different meanings
+(hyperkalemia/hypokalemia, a negated question, type 1/type 2) must not answer
+each other, while rephrasings of one question must.
+
+    python -m benchmarks.bench_faq_cache --requests 600 --model-ms 200
+"""
+import argparse
+import asyncio
+import random
+import re
+import time
+from typing import AsyncGenerator
+
+from benchmarks.common import percentile
+from benchmarks.stub_llm import StubLlm
+from google.adk.models.llm_request import LlmRequest
+from google.adk.models.llm_response import LlmResponse
+from google.adk.runners import Runner
+from google.adk.sessions import InMemorySessionService
+from google.genai import types
+from orchestrator_agent.agent import root_agent
+from orchestrator_agent.sub_agents.faq_bot import answer_cache
+from orchestrator_agent.sub_agents.faq_bot.agent import faq_bot
+from report_parser_agent.agent import ExpectedOutput
+
+TOPICS = ["hypertension", "type 2 diabetes", "type 1 diabetes", "metformin", "amlodipine", "asthma",
+          "migraine", "thyroid disorders", "anemia", "vitamin d deficiency", "high cholesterol", "dengue",
+          "malaria", "kidney stones", "arthritis", "gastritis", "insulin", "atorvastatin", "obesity", "psoriasis"]
+PHRASINGS = [
+    "What are the symptoms of {topic}?",
+    "symptoms of {topic}",
+    "Can you tell me the symptoms of {topic} please?",
+    "What are the side effects of {topic}?",
+    "side effects of {topic}?",
+    "Tell me more about {topic}.",
+    "Tell me about {topic}",
+    "How is {topic} treated?",
+    "{topic} symptoms",
+    "What are the common symptoms of {topic}?",
+    "{topic} side effects",
+    "Tell me about {topic}!!",
+]
+PERSONAL = ["What are my current medications?", "Summarize my medical history.",
+            "Should I be worried about my {topic}?", "Is my {topic} under control?"]
+CONDITIONS = ["Hypertension", "Asthma", "Anemia", "Migraine"]
+NAMES = ["Ravi Kumar", "Asha Verma", "Imran Sheikh", "Meera Nair", "Joseph Dsouza", "Priya Patel"]
+_TAG = re.compile(r"\[(\w[^\]]*)\]")
+
+
+class FaqLlm(StubLlm):
+    """Answers with the asked intent and topic tagged; sometimes tailored to the user's condition."""
+
+    calls: int = 0
+
+    async def generate_content_async(self, llm_request: LlmRequest, stream: bool = False) -> AsyncGenerator[LlmResponse, None]:
+        self.calls += 1
+        await asyncio.sleep(self.delay_s)
+        question = llm_request.contents[-1].parts[0].text
+        instruction = str(llm_request.config.system_instruction)
+        answer = f"[{question_key(question)}] General information about this topic."
+        condition = next((c for c in CONDITIONS if f"'{c}'" in instruction), None)
+        if condition and len(question) % 3 == 0:
+            answer += f" Since you have {condition}, keep an eye on it."
+        yield LlmResponse(content=types.Content(role="model", parts=[types.Part(text=answer)]))
+
+
+def question_key(question):
+    """What a correct answer must be about: the phrasing's intent and the topic."""
+    text = question.lower()
+    topic = next((t for t in sorted(TOPICS, key=len, reverse=True) if t in text), "none")
+    intent = "side effects" if "side effects" in text else "symptoms" if "symptoms" in text else \
+        "treatment" if "treated" in text else "about"
+    return f"{intent}|{topic}"
+
+
+def traffic(requests, users, personal, rng):
+    weights = [1 / (rank + 1) for rank in range(len(TOPICS))]
+    profiles = [{"user_name": rng.choice(NAMES), "personal_info": {"age": 45, "sex": "Male"},
+                 "diagnosed_conditions": [rng.choice(CONDITIONS)],
+                 "current_medications": [{"name": "Metformin", "dosage": "500mg"}]} for _ in range(users)]
+    for _ in range(requests):
+        user = rng.randrange(users)
+        topic = rng.choices(TOPICS, weights)[0]
+        template = rng.choice(PERSONAL if rng.random() < personal else PHRASINGS)
+        yield user, profiles[user], template.format(topic=topic)
+
+
+async def play(turns, model):
+    service = InMemorySessionService()
+    runner = Runner(agent=faq_bot, app_name="bench", session_service=service)
+    sessions, results = {}, []
+    for user, profile, question in turns:
+        if user not in sessions:
+            sessions[user] = service.create_session(app_name="bench", user_id=str(user),
+                                                    state={"user_context": profile, "interaction_history": []}).id
+        start, before = time.perf_counter(), model.calls
+        content = types.Content(role="user", parts=[types.Part(text=question)])
+        answer = ""
+        async for event in runner.run_async(user_id=str(user), session_id=sessions[user], new_message=content):
+            if event.is_final_response() and event.content and event.content.parts:
+                answer = event.content.parts[0].text or ""
+        results.append((profile, question, answer, model.calls > before, time.perf_counter() - start))
+    return results
+
+
+# (cached question, question that must not be answered with it)
+DIFFERENT_QUESTIONS = [
+    ("What are the common side effects and long term risks of hyperkalemia treatment in elderly patients",
+     "What are the common side effects and long term risks of hypokalemia treatment in elderly patients"),
+    ("What are the symptoms of hypertension?", "what are not the symptoms of hypertension"),
+    ("What are the symptoms of hypertension?", "What are the symptoms of hypotension?"),
+    ("What are the symptoms of type 1 diabetes?", "What are the symptoms of type 2 diabetes?"),
+    ("Can asthma be treated with steroids?", "Can asthma be treated without steroids?"),
+    ("Is there a cure for hepatitis?", "Is there no cure for hepatitis?"),
+]
+# (cached question, rephrasing that should be answered with it)
+SAME_QUESTIONS = [
+    ("What are the symptoms of hypertension?", "What are the common symptoms of hypertension?"),
+    ("What are the symptoms of hypertension?", "hypertension symptoms"),
+    ("side effects of metformin", "Can you tell me the side effects of Metformin please?"),
+    ("What are the long term complications of untreated kidney stones?",
+     "What are the long term complications of an untreated kidney stone?"),
+]
+
+
+def check_wrong_topic_pairs():
+    """Similar questions with a different meaning miss; rephrasings of the same question hit."""
+    for cached, asked in DIFFERENT_QUESTIONS:
+        cache = answer_cache.AnswerCache()
+        cache.put(cached, f"answer to: {cached}")
+        assert cache.get(asked) is None, f"{asked!r} was answered with the answer to {cached!r}"
+    for cached, asked in SAME_QUESTIONS:
+        cache = answer_cache.AnswerCache()
+        cache.put(cached, f"answer to: {cached}")
+        assert cache.get(asked) == f"answer to: {cached}", f"{asked!r} missed {cached!r}"
+    print(f"wrong-topic pairs: {len(DIFFERENT_QUESTIONS)} look-alike questions missed, "
+          f"{len(SAME_QUESTIONS)} rephrasings hit")
+
+
+def check_context_not_shared():
+    """An answer drawing on a parsed report's conditions or medications is never stored or served."""
+    parsed = ExpectedOutput.model_validate({
+        "user_context": {
+            "user_name": "Anita Desai",
+            "personal_info": {"age": 61, "sex": "Female"},
+            "diagnosed_conditions": ["Chronic Kidney Disease"],
+            "current_medications": [{"name": "Tacrolimus", "dosage": "1mg"}],
+        },
+        "interaction_history": [],
+    }).model_dump()
+    question = "What are the symptoms of hypertension?"
+    answers = ["High blood pressure is often silent. With Chronic Kidney Disease and Tacrolimus, check it more often.",
+               "Headaches and dizziness; tacrolimus can raise blood pressure.",
+               "Headaches and dizziness, and it can worsen kidney function."]
+    for context in (parsed, parsed["user_context"]):
+        cache = answer_cache.AnswerCache()
+        for answer in answers:
+            assert not cache.put(question, answer, context), answer
+        assert cache.get(question) is None
+        assert cache.put(question, "Headaches, dizziness and nosebleeds.", context)
+    print("user_context check: answers mentioning a parsed report's conditions/medications are not shared")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--requests", type=int, default=600)
+    parser.add_argument("--users", type=int, default=100)
+    parser.add_argument("--personal", type=float, default=0.25, help="share of personalized questions")
+    parser.add_argument("--model-ms", type=float, default=200.0)
+    parser.add_argument("--seed", type=int, default=23)
+    args = parser.parse_args()
+
+    check_wrong_topic_pairs()
+    check_context_not_shared()
+    turns = list(traffic(args.requests, args.users, args.personal, random.Random(args.seed)))
+    runs = {}
+    for enabled in (False, True):
+        answer_cache.FAQ_CACHE = enabled
+        answer_cache.answer_cache = answer_cache.AnswerCache()
+        model = FaqLlm(delay_s=args.model_ms / 1000)
+        root_agent.model = model
+        runs[enabled] = asyncio.run(play(turns, model)), model.calls
+
+    (off, off_calls), (on, on_calls) = runs[False], runs[True]
+    stats = answer_cache.answer_cache.stats()
+    served = [(profile, question, answer) for profile, question, answer, called, _ in on if not called]
+    wrong = sum(_TAG.search(answer).group(1) != question_key(question) for _, question, answer in served)
+    leaked = sum("since you have" in answer.lower() for _, _, answer in served)
+    print(f"{args.requests} questions, {args.users} users, {args.personal:.0%} personalized")
+    print(f"cache: hits={stats['hits']} (near-duplicate {stats['near_hits']}) misses={stats['misses']} "
+          f"hit ratio={stats['hit_ratio']:.1%} of lookups, {stats['hits'] / args.requests:.1%} of all questions; "
+          f"bypassed={stats['bypassed']} not stored={stats['not_stored']} size={stats['size']}")
+    print(f"model calls: {off_calls} -> {on_calls} ({1 - on_calls / off_calls:.1%} fewer)")
+    print(f"served from cache: {len(served)}, wrong topic: {wrong}, carrying a user's own context: {leaked}")
+    for label, results in (("cache off", off), ("cache on", on)):
+        latencies = [latency for *_, latency in results]
+        print(f"{label:<10} turn p50={percentile(latencies, 50) * 1000:7.1f}ms "
+              f"p95={percentile(latencies, 95) * 1000:7.1f}ms mean={sum(latencies) / len(latencies) * 1000:7.1f}ms")
+    hits = [latency for *_, called, latency in on if not called]
+    if hits:
+        print(f"cache hit turn p50={percentile(hits, 50) * 1000:.2f}ms (vs {args.model_ms:.0f}ms model call)")
+
+    lookup = answer_cache.AnswerCache()
+    for index in range(2000):
+        lookup.put(f"What are the symptoms of condition number {index} variant {index * 7}?", "answer")
+    start = time.perf_counter()
+    for index in range(1000):
+        lookup.get(f"symptoms of condition number {index} variant {index * 7}")
+    per_lookup = (time.perf_counter() - start) / 1000
+    print(f"lookup in a 2000-entry cache: {per_lookup * 1000:.3f}ms per question")
+
+
+if __name__ == "__main__":
+    main()
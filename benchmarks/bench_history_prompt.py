@@ -0,0 +1,114 @@
+# benchmarks/bench_history_prompt.py
+"""Per-turn prompt size over a long conversation, with and without the history manager.
+
+Plays a --turns turn conversation (a user message and an agent reply per turn)
+through utils.add_*_to_history on a real InMemorySessionService, and after each
+turn renders the orchestrator's and the answering sub-agent's instructions from
+session state the way ADK does (`{var}` -> str(state[var])). The same
+conversation is replayed with an unbounded list (the old behaviour) for
+comparison. Prints the estimated prompt tokens at checkpoints and the cost of
+one history update.
+
+    python -m benchmarks.bench_history_prompt --turns 200
+"""
+import argparse
+import random
+import re
+import time
+
+import utils
+from benchmarks.common import summarize
+from conversation_history import HistoryManager, estimate_tokens
+from google.adk.sessions import InMemorySessionService
+from orchestrator_agent.agent import root_agent
+
+SUB_AGENTS = {agent.name: agent for agent in root_agent.sub_agents}
+
+USER_LINES = [
+    "I have had a mild headache since this morning and some neck stiffness.",
+    "What are the side effects of Metformin?",
+    "Log my lunch: dal, two rotis and a bowl of salad.",
+    "Can you book me an appointment with a cardiologist next week?",
+    "My blood pressure was 150/95 today, should I be worried?",
+    "Tell me more about managing hypertension with diet.",
+    "I walked for 40 minutes in the evening, please log it.",
+    "I feel dizzy when I stand up quickly.",
+]
+AGENT_SENTENCES = [
+    "Based on your history of hypertension, this is worth keeping an eye on.",
+    "Please make sure you stay hydrated and rest in a quiet, dark room.",
+    "If the symptoms get worse or you notice chest pain, seek care immediately.",
+    "Metformin can cause stomach upset, nausea and, rarely, vitamin B12 deficiency.",
+    "I have logged that for today; you are at about 1,450 kcal so far.",
+    "Dr. Mehta (Cardiology) has a slot on Tuesday at 10:30 at City Care Hospital.",
+    "Reducing salt, eating more vegetables and regular walks all help lower blood pressure.",
+    "Let me know if you would like me to set a reminder for your medication.",
+]
+ROUTES = ["symptom_bot", "faq_bot", "med_coach", "appointment_agent"]
+_VARIABLE = re.compile(r"{+[^{}]*}+")
+
+
+def render(instruction: str, state: dict) -> str:
+    """An instruction with `{var}` replaced by str(state[var]), as ADK injects session state."""
+    def replace(match):
+        name = match.group().lstrip("{").rstrip("}").strip()
+        return str(state[name]) if name in state else match.group()
+    return _VARIABLE.sub(replace, instruction)
+
+
+def conversation(turns, seed):
+    rng = random.Random(seed)
+    for _ in range(turns):
+        reply = " ".join(rng.sample(AGENT_SENTENCES, rng.randint(2, 5)))
+        yield rng.choice(USER_LINES), rng.choice(ROUTES), reply
+
+
+def play(turns, seed, bounded):
+    service = InMemorySessionService()
+    state = {
+        "user_context": {"user_name": "Ravi Kumar", "personalInfo": {"age": 45, "sex": "Male"},
+                         "diagnosedConditions": ["Hypertension"], "currentMedications": []},
+        "interaction_history": [],
+    }
+    session = service.create_session(app_name="bench", user_id="u", state=state)
+    utils.history_manager = HistoryManager() if bounded else _Unbounded()
+    sizes, updates = [], []
+    for query, route, reply in conversation(turns, seed):
+        start = time.perf_counter()
+        utils.add_user_query_to_history(service, "bench", "u", session.id, query)
+        utils.add_agent_response_to_history(service, "bench", "u", session.id, route, reply)
+        updates.append((time.perf_counter() - start) / 2)
+        current = service.get_session(app_name="bench", user_id="u", session_id=session.id).state
+        prompt = render(root_agent.instruction, current) + render(SUB_AGENTS[route].instruction, current)
+        sizes.append(estimate_tokens(prompt))
+    return sizes, updates
+
+
+class _Unbounded:
+    """The old behaviour: every turn appended forever."""
+
+    def add(self, history, entry):
+        return list(history) + [entry]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--turns", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=8)
+    args = parser.parse_args()
+
+    unbounded, unbounded_updates = play(args.turns, args.seed, bounded=False)
+    bounded, bounded_updates = play(args.turns, args.seed, bounded=True)
+    checkpoints = sorted({1, 10, 25, 50, 100, 150, args.turns} & set(range(1, args.turns + 1)))
+    print(f"{'turn':>6}{'unbounded tokens':>18}{'bounded tokens':>16}")
+    for turn in checkpoints:
+        print(f"{turn:>6}{unbounded[turn - 1]:>18}{bounded[turn - 1]:>16}")
+    tail = bounded[len(bounded) // 2:]
+    print(f"bounded: max {max(bounded)} tokens, second half {min(tail)}-{max(tail)} (flat); "
+          f"unbounded grows to {unbounded[-1]} ({unbounded[-1] / bounded[-1]:.1f}x)")
+    summarize("history update, unbounded", unbounded_updates)
+    summarize("history update, bounded", bounded_updates)
+
+
+if __name__ == "__main__":
+    main()
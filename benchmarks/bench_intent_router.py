@@ -0,0 +1,261 @@
+# benchmarks/bench_intent_router.py
+"""Accuracy of the local intent router, and the turn latency it saves.
+
+1. Accuracy: every message of LABELED (written for this benchmark, none of them
+   an orchestrator instruction example) goes through `IntentRouter.route`.
+   Prints the share routed locally (coverage), the accuracy of those local
+   routes, the top-1 accuracy ignoring the threshold, and how often the
+   router correctly abstained on the follow-ups (label None).
+2. Latency: a --turns turn conversation drawn from LABELED is played through
+   the real ADK runners, once the old way (every turn on the orchestrator
+   runner) and once as main.py does now (a confident route runs the sub-agent's
+   runner directly). The model is a stub that behaves like a perfect router:
+   called as the wrong agent for the message it answers with a transfer_to_agent
+   call, otherwise with text. Every call sleeps a log-normal time around
+   --model-ms, so the saving is in model round-trips, not in this stub.
+
+    python -m benchmarks.bench_intent_router --turns 300 --model-ms 800
+"""
+import argparse
+import asyncio
+import random
+import re
+import time
+from typing import AsyncGenerator
+
+from benchmarks.common import percentile
+from benchmarks.stub_llm import StubLlm
+from google.adk.models.llm_request import LlmRequest
+from google.adk.models.llm_response import LlmResponse
+from google.adk.runners import Runner
+from google.adk.sessions import InMemorySessionService
+from google.genai import types
+from orchestrator_agent.agent import root_agent
+from orchestrator_agent.intent_router import IntentRouter
+from utils import add_user_query_to_history
+
+LABELED = [
+    # faq_bot: general information, including about the user's own record
+    ("What is the normal range for fasting blood sugar?", "faq_bot"),
+    ("Tell me about thyroid disorders.", "faq_bot"),
+    ("What are the side effects of amlodipine?", "faq_bot"),
+    ("How does insulin work in the body?", "faq_bot"),
+    ("Explain what LDL cholesterol means.", "faq_bot"),
+    ("What causes high blood pressure?", "faq_bot"),
+    ("Is vitamin D deficiency common in India?", "faq_bot"),
+    ("What are the early signs of diabetes?", "faq_bot"),
+    ("Can you summarize my health reports?", "faq_bot"),
+    ("What medications am I currently taking?", "faq_bot"),
+    ("Which conditions have I been diagnosed with?", "faq_bot"),
+    ("What is the difference between type 1 and type 2 diabetes?", "faq_bot"),
+    ("How can I prevent heart disease?", "faq_bot"),
+    ("What does HbA1c measure?", "faq_bot"),
+    ("Tell me more about hypertension and salt.", "faq_bot"),
+    ("What are the symptoms of dengue?", "faq_bot"),
+    ("Is it safe to take paracetamol with metformin?", "faq_bot"),
+    ("Define BMI.", "faq_bot"),
+    ("What foods should I avoid with diabetes?", "faq_bot"),
+    ("Summarize my previous chats.", "faq_bot"),
+    ("Based on my conditions, am I healthy overall?", "faq_bot"),
+    ("What is a normal resting heart rate?", "faq_bot"),
+    ("What are the risk factors for stroke?", "faq_bot"),
+    ("How does stress affect blood pressure?", "faq_bot"),
+    ("What is the treatment for a vitamin B12 deficiency?", "faq_bot"),
+    # symptom_bot: personal, current complaints
+    ("I have had a fever since yesterday.", "symptom_bot"),
+    ("My knee hurts when I climb stairs.", "symptom_bot"),
+    ("I've been coughing all night.", "symptom_bot"),
+    ("I feel very tired even after sleeping eight hours.", "symptom_bot"),
+    ("There is a rash on my arm that itches.", "symptom_bot"),
+    ("I am feeling short of breath after climbing stairs.", "symptom_bot"),
+    ("My head is pounding and the light bothers me.", "symptom_bot"),
+    ("I keep vomiting after meals.", "symptom_bot"),
+    ("I'm having palpitations right now.", "symptom_bot"),
+    ("My feet feel numb and tingly.", "symptom_bot"),
+    ("I have a sore throat and chills.", "symptom_bot"),
+    ("My back has been aching for a week.", "symptom_bot"),
+    ("I feel really stressed and can't sleep.", "symptom_bot"),
+    ("I got a burning sensation when I urinate.", "symptom_bot"),
+    ("My blood sugar was 250 this morning and I feel weak.", "symptom_bot"),
+    ("I'm feeling low and depressed lately.", "symptom_bot"),
+    ("My ankle is swollen after I twisted it.", "symptom_bot"),
+    ("I have stomach cramps and diarrhea.", "symptom_bot"),
+    ("I feel dizzy whenever I stand up.", "symptom_bot"),
+    ("My eyes are itchy and watering today.", "symptom_bot"),
+    ("I have been feeling nauseous since lunch.", "symptom_bot"),
+    ("I've got a migraine again.", "symptom_bot"),
+    ("My chest feels tight when I breathe in.", "symptom_bot"),
+    ("I am having trouble breathing at night.", "symptom_bot"),
+    ("My hands are shaking and I'm sweating a lot.", "symptom_bot"),
+    # med_coach: logging and tracking activity, food and metrics
+    ("I walked 6,000 steps today.", "med_coach"),
+    ("Log my breakfast: two idlis and sambar.", "med_coach"),
+    ("I did 45 minutes of yoga this morning.", "med_coach"),
+    ("How many calories have I eaten today?", "med_coach"),
+    ("Please log a 5 km run.", "med_coach"),
+    ("I had dal and rice for dinner.", "med_coach"),
+    ("Track my water intake: 8 glasses.", "med_coach"),
+    ("Suggest a low-carb lunch.", "med_coach"),
+    ("What should I eat before a workout?", "med_coach"),
+    ("I weighed 78 kg this morning.", "med_coach"),
+    ("Log 30 minutes of cycling.", "med_coach"),
+    ("What did I have for lunch on Monday?", "med_coach"),
+    ("Recommend a healthy evening snack.", "med_coach"),
+    ("I skipped the gym today.", "med_coach"),
+    ("How many steps did I walk this week?", "med_coach"),
+    ("I ate two samosas as a snack.", "med_coach"),
+    ("Give me a diet plan for today.", "med_coach"),
+    ("Record my workout: 20 push-ups and 3 km jog.", "med_coach"),
+    ("How much protein should I eat daily?", "med_coach"),
+    ("I swam for half an hour.", "med_coach"),
+    ("Plan my meals for tomorrow.", "med_coach"),
+    ("Did I hit my calorie goal yesterday?", "med_coach"),
+    ("I burned 400 kcal on the treadmill.", "med_coach"),
+    ("Add oats with milk to my breakfast log.", "med_coach"),
+    ("How long should I exercise each day?", "med_coach"),
+    # appointment_agent: finding, booking and viewing appointments
+    ("Book me an appointment with a dermatologist.", "appointment_agent"),
+    ("Find a cardiologist near me.", "appointment_agent"),
+    ("I want to see a doctor tomorrow.", "appointment_agent"),
+    ("Show my upcoming appointments.", "appointment_agent"),
+    ("Cancel my appointment on Friday.", "appointment_agent"),
+    ("Which doctors are available this weekend?", "appointment_agent"),
+    ("Reschedule my appointment with Dr. Mehta.", "appointment_agent"),
+    ("I need a neurologist urgently.", "appointment_agent"),
+    ("Get me the earliest slot with an endocrinologist.", "appointment_agent"),
+    ("Can I consult a physician today?", "appointment_agent"),
+    ("Schedule a check-up for next week.", "appointment_agent"),
+    ("Is there a pediatrician available on Monday?", "appointment_agent"),
+    ("My chest hurts badly, get me a doctor right away.", "appointment_agent"),
+    ("Book the 10:30 slot please.", "appointment_agent"),
+    ("List the hospitals nearby with an orthopedic specialist.", "appointment_agent"),
+    ("I'd like to visit a dentist.", "appointment_agent"),
+    ("View my bookings.", "appointment_agent"),
+    ("Find me a gynecologist in my city.", "appointment_agent"),
+    ("When is my next doctor's appointment?", "appointment_agent"),
+    ("I need to see a specialist for my diabetes.", "appointment_agent"),
+    # Follow-ups with no routing signal of their own: left to the orchestrator
+    ("Yes, please.", None),
+    ("Okay, thanks!", None),
+    ("The second one.", None),
+    ("Sure, go ahead.", None),
+    ("No, that's all.", None),
+    ("Tuesday works.", None),
+    ("Ravi Kumar", None),
+    ("Hmm, not sure.", None),
+    ("Hello!", None),
+    ("Can you repeat that?", None),
+]
+
+_NAME = re.compile(r'Your internal name is "([^"]+)"')
+
+
+def accuracy(router):
+    routable = [(text, label) for text, label in LABELED if label]
+    followups = [text for text, label in LABELED if not label]
+    local = top1 = correct = 0
+    mistakes = []
+    for text, label in routable:
+        decision = router.route(text)
+        scores = decision.scores
+        top1 += max(scores, key=scores.get) == label
+        if decision.agent:
+            local += 1
+            correct += decision.agent == label
+            if decision.agent != label:
+                mistakes.append((text, label, decision.agent))
+    abstained = sum(router.route(text).agent is None for text in followups)
+    print(f"labeled messages: {len(routable)} routable, {len(followups)} follow-ups")
+    print(f"routed locally: {local}/{len(routable)} ({local / len(routable):.0%}); "
+          f"accuracy of local routes {correct}/{local} ({correct / max(local, 1):.1%})")
+    print(f"top-1 accuracy ignoring the threshold: {top1}/{len(routable)} ({top1 / len(routable):.1%})")
+    print(f"follow-ups left to the orchestrator: {abstained}/{len(followups)}")
+    for text, label, routed in mistakes:
+        print(f"  misrouted: {text!r} -> {routed} (expected {label})")
+
+
+class OracleLlm(StubLlm):
+    """A stub that routes perfectly: transfers to the labeled agent, or answers if it is that agent."""
+
+    labels: dict = {}
+    calls: int = 0
+
+    async def generate_content_async(self, llm_request: LlmRequest, stream: bool = False) -> AsyncGenerator[LlmResponse, None]:
+        self.calls += 1
+        await asyncio.sleep(self.delay_s(llm_request) if callable(self.delay_s) else self.delay_s)
+        agent = _NAME.search(str(llm_request.config.system_instruction)).group(1)
+        message = next(part.text for content in reversed(llm_request.contents) if content.role == "user"
+                       for part in content.parts if part.text and not part.text.startswith("For context:"))
+        target = self.labels.get(message)
+        if target and target != agent:
+            call = types.FunctionCall(name="transfer_to_agent", args={"agent_name": target})
+            yield LlmResponse(content=types.Content(role="model", parts=[types.Part(function_call=call)]))
+            return
+        yield LlmResponse(content=types.Content(role="model", parts=[types.Part(text=f"{agent} answering.")]))
+
+
+async def play(messages, routed, model):
+    service = InMemorySessionService()
+    session = service.create_session(app_name="bench", user_id="u",
+                                     state={"user_context": {}, "interaction_history": []})
+    orchestrator = Runner(agent=root_agent, app_name="bench", session_service=service)
+    router = IntentRouter.from_orchestrator(root_agent)
+    direct = {agent.name: Runner(agent=agent, app_name="bench", session_service=service)
+              for agent in root_agent.sub_agents}
+    latencies, calls = [], []
+    for text in messages:
+        start, before = time.perf_counter(), model.calls
+        agent = router.route(text).agent if routed else None
+        runner = direct.get(agent, orchestrator)
+        # Recorded as main.py does, which also tells a direct runner to start from its own agent
+        add_user_query_to_history(service, "bench", "u", session.id, text, author=agent or "user")
+        content = types.Content(role="user", parts=[types.Part(text=text)])
+        async for _ in runner.run_async(user_id="u", session_id=session.id, new_message=content):
+            pass
+        latencies.append(time.perf_counter() - start)
+        calls.append(model.calls - before)
+    return latencies, calls
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--turns", type=int, default=300)
+    parser.add_argument("--model-ms", type=float, default=800.0)
+    parser.add_argument("--sigma", type=float, default=0.4, help="log-normal spread of a model call")
+    parser.add_argument("--seed", type=int, default=12)
+    args = parser.parse_args()
+
+    accuracy(IntentRouter.from_orchestrator(root_agent))
+
+    rng = random.Random(args.seed)
+    labels = {text: label for text, label in LABELED}
+    # Runs of 1-3 turns on one topic, some followed by a follow-up
+    routable = [text for text, label in LABELED if label]
+    followups = [text for text, label in LABELED if not label]
+    messages = []
+    while len(messages) < args.turns:
+        topic = rng.choice(sorted({labels[text] for text in routable}))
+        messages += rng.sample([text for text in routable if labels[text] == topic], rng.randint(1, 3))
+        if rng.random() < 0.3:
+            messages.append(rng.choice(followups))
+    messages = messages[:args.turns]
+
+    results = {}
+    for routed in (False, True):
+        call_rng = random.Random(args.seed)
+        model = OracleLlm(labels=labels, delay_s=lambda _: call_rng.lognormvariate(0, args.sigma) * args.model_ms / 1000)
+        root_agent.model = model
+        results[routed] = asyncio.run(play(messages, routed, model))
+
+    (old, old_calls), (new, new_calls) = results[False], results[True]
+    saved = [before - after for before, after in zip(old, new)]
+    for label, latencies, calls in (("orchestrator every turn", old, old_calls), ("local router", new, new_calls)):
+        print(f"{label:<24} model calls/turn {sum(calls) / len(calls):.2f}  "
+              f"turn p50={percentile(latencies, 50) * 1000:6.0f}ms p95={percentile(latencies, 95) * 1000:6.0f}ms")
+    print(f"latency saved per turn: p50={percentile(saved, 50) * 1000:.0f}ms p95={percentile(saved, 95) * 1000:.0f}ms; "
+          f"turn p50 {percentile(old, 50) * 1000:.0f} -> {percentile(new, 50) * 1000:.0f}ms, "
+          f"p95 {percentile(old, 95) * 1000:.0f} -> {percentile(new, 95) * 1000:.0f}ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+# benchmarks/bench_local_extraction.py
+"""How many reports the local text-layer stage answers without a model call.
+
+Generates a corpus of synthetic reports (benchmarks/sample_reports.py: labelled
+lab reports and discharge summaries, free-text letters, scanned pages without a
+text layer) and runs the local stage on each. Reports answered locally are
+checked against their ground truth; the rest count a model call, simulated as
+--model-ms. Reports the fraction served locally, their accuracy, and mean
+latency with and without the local stage.
+
+    python -m benchmarks.bench_local_extraction --count 200 --model-ms 6000
+"""
+import argparse
+import statistics
+import tempfile
+from collections import Counter
+
+from benchmarks.common import summarize, timed
+from benchmarks.sample_reports import make_corpus
+from report_parser_agent.local_extractor import MIN_CONFIDENCE, extract_fields, extract_locally
+
+HEADER = "Patient Name: Ravi Kumar\nAge: 45\nSex: Male\n"
+
+
+def check_nil_values():
+    """Nil/negative section values and other people's "Name:" labels are never extracted as data."""
+    result = extract_fields(HEADER + "Medications: None\nImpression: No abnormality detected\n")
+    context = result.output.user_context
+    assert context.current_medications == [] and context.diagnosed_conditions == [], context
+    assert result.confidence < MIN_CONFIDENCE, result.confidence
+    for value in ("Nil", "NAD", "N/A", "Not applicable", "Normal study", "Within normal limits", "-"):
+        context = extract_fields(HEADER + f"Diagnosis: {value}\nMedications: {value}\n").output.user_context
+        assert context.diagnosed_conditions == [] and context.current_medications == [], (value, context)
+    # A single clinical section cannot carry a report over the threshold
+    result = extract_fields(HEADER + "Impression: Hypertension\n")
+    assert result.output.user_context.diagnosed_conditions == ["Hypertension"]
+    assert result.confidence < MIN_CONFIDENCE, result.confidence
+    result = extract_fields(HEADER + "Diagnosis: Hypertension\nMedications:\nTab Amlodipine 5mg OD\n")
+    assert result.confidence >= MIN_CONFIDENCE, result.confidence
+    for label in ("Doctor Name", "Referring name", "Consultant's Name"):
+        result = extract_fields(f"{label}: Dr Anand Rao\nAge: 45\nSex: Male\n")
+        assert result.output.user_context.user_name == "", (label, result.output.user_context.user_name)
+    assert extract_fields("Name: Ravi Kumar\nAge: 45\n").output.user_context.user_name == "Ravi Kumar"
+    print("nil values check: none/NAD/no abnormality and non-patient name labels are not extracted")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--count", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--model-ms", type=float, default=6000.0, help="typical latency of one model call")
+    args = parser.parse_args()
+    model_s = args.model_ms / 1000
+
+    check_nil_values()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        corpus = make_corpus(tmp, args.count, args.seed)
+        local_times, served, fallbacks, wrong = [], Counter(), Counter(), []
+        with_stage, without_stage = [], []
+        for path, truth, layout in corpus:
+            pdf = path.read_bytes()
+            result, elapsed = timed(extract_locally, pdf)
+            local_times.append(elapsed)
+            if result.confidence >= MIN_CONFIDENCE:
+                served[layout] += 1
+                with_stage.append(elapsed)
+                if result.output.model_dump() != truth:
+                    wrong.append(path.name)
+            else:
+                fallbacks[layout] += 1
+                with_stage.append(elapsed + model_s)
+            without_stage.append(model_s)
+
+    total = sum(served.values())
+    summarize("local stage (text layer + rules)", local_times)
+    print(f"served locally: {total}/{args.count} ({total / args.count:.0%})  by layout={dict(served)}")
+    print(f"sent to model:  {sum(fallbacks.values())}  by layout={dict(fallbacks)}")
+    print(f"local answers matching ground truth: {total - len(wrong)}/{total}" + (f"  wrong={wrong[:5]}" if wrong else ""))
+    print(f"mean latency per report: {statistics.fmean(with_stage) * 1000:.0f}ms with the local stage vs "
+          f"{statistics.fmean(without_stage) * 1000:.0f}ms always calling the model")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,152 @@
+# benchmarks/bench_output_repair.py
+"""Repair success rate and model calls avoided by output_repair.
+
+Generates --count agent replies from random ground truth and damages most of
+them with the defects seen from LLMs (fences, prose around the JSON, trailing
+commas, null/"45 years" ages, single quotes, truncation, missing wrapper...).
+Each reply is parsed twice:
+
+  * strict   - json.loads + ExpectedOutput.model_validate (the old behaviour:
+               any failure meant another model call)
+  * repaired - output_repair.parse_output
+
+and the repaired output is compared with the ground truth. Finally the same
+replies are sent through api_pdf.parse_report with StubLlm, which answers the
+re-prompt (if any) correctly, to count the model calls actually made.
+
+    python -m benchmarks.bench_output_repair --count 500
+"""
+import argparse
+import asyncio
+import json
+import random
+import time
+
+import api_pdf
+from benchmarks.common import summarize
+from benchmarks.sample_reports import random_truth
+from benchmarks.stub_llm import StubLlm
+from google.genai import types
+from report_parser_agent.agent import ExpectedOutput, report_parser_agent
+from report_parser_agent.output_repair import OutputRepairError, parse_output, repair_stats
+
+
+def _age_text(reply, truth):
+    return reply.replace(f'"age": {truth["user_context"]["personal_info"]["age"]}',
+                         f'"age": "{truth["user_context"]["personal_info"]["age"]} years"')
+
+
+# name -> (damage(reply, truth), whether the ground truth is still recoverable)
+DEFECTS = {
+    "none": (lambda reply, truth: reply, True),
+    "code fence": (lambda reply, truth: f"```json\n{reply}\n```", True),
+    "prose around": (lambda reply, truth: f"Here is the extracted data:\n{reply}\nLet me know if you need more.", True),
+    "trailing commas": (lambda reply, truth: reply.replace("]", ",]").replace("}", ",}"), True),
+    "age as text": (_age_text, True),
+    "sex as letter": (lambda reply, truth: reply.replace('"Male"', '"M"').replace('"Female"', '"F"'), True),
+    "single quotes": (lambda reply, truth: reply.replace('"', "'"), True),
+    "python literals": (lambda reply, truth: reply.replace('"interaction_history": []', '"interaction_history": None'), True),
+    "no wrapper": (lambda reply, truth: json.dumps(truth["user_context"]), True),
+    "null age": (lambda reply, truth: reply.replace(f'"age": {truth["user_context"]["personal_info"]["age"]}', '"age": null'), False),
+    "truncated": (lambda reply, truth: reply[:int(len(reply) * 0.85)], False),
+    "not json": (lambda reply, truth: "I could not read the attached document.", False),
+}
+
+
+def make_replies(count, seed):
+    rng = random.Random(seed)
+    names = list(DEFECTS)
+    weights = [40] + [5] * (len(names) - 1)
+    replies = []
+    for _ in range(count):
+        truth = random_truth(rng)
+        defect = rng.choices(names, weights)[0]
+        replies.append((defect, DEFECTS[defect][0](json.dumps(truth), truth), truth))
+    return replies
+
+
+def strict(reply):
+    try:
+        return ExpectedOutput.model_validate(json.loads(reply))
+    except Exception:
+        return None
+
+
+async def through_api(replies):
+    """Model calls made by api_pdf.parse_report for each reply (1, or 2 with a re-prompt)."""
+    calls = 0
+    queue = []
+
+    def reply_for(llm_request):
+        nonlocal calls
+        calls += 1
+        return queue.pop(0)
+
+    report_parser_agent.model = StubLlm(reply=reply_for)
+    part = types.Part(inline_data={"mime_type": "application/pdf", "data": b"%PDF-1.4 stub"})
+    for _, reply, truth in replies:
+        queue[:] = [reply, json.dumps(truth)]
+        try:
+            await api_pdf.parse_report(part)
+        except Exception:
+            pass
+    return calls
+
+
+def check_unusable_replies():
+    """JSON objects that carry no extraction raise OutputRepairError (and are re-prompted), not an empty output."""
+    for reply in ('{"error": "Unable to read the document"}', "{}", '{"user_context": null}',
+                  '{"user_context": {}}', 'Sorry, here is what I found: {"x": 1}', "```json\n{}\n```"):
+        try:
+            output = parse_output(reply)
+        except OutputRepairError:
+            continue
+        raise AssertionError(f"{reply!r} was accepted as {output.model_dump()}")
+    assert parse_output('{"user_name": "Asha Verma"}').user_context.user_name == "Asha Verma"
+    print("unusable replies check: error/empty objects raise OutputRepairError")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--count", type=int, default=500)
+    parser.add_argument("--seed", type=int, default=9)
+    args = parser.parse_args()
+
+    check_unusable_replies()
+    replies = make_replies(args.count, args.seed)
+    per_defect = {}
+    times = []
+    strict_ok = repaired_ok = exact = 0
+    for defect, reply, truth in replies:
+        strict_ok += strict(reply) is not None
+        start = time.perf_counter()
+        try:
+            output = parse_output(reply)
+        except OutputRepairError:
+            output = None
+        times.append(time.perf_counter() - start)
+        repaired_ok += output is not None
+        correct = output is not None and output.model_dump() == truth
+        exact += correct
+        stats = per_defect.setdefault(defect, [0, 0, 0])
+        stats[0] += 1
+        stats[1] += output is not None
+        stats[2] += correct
+
+    summarize("parse_output", times)
+    print(f"{'defect':<18}{'replies':>8}{'valid':>8}{'exact':>8}")
+    for defect, (n, ok, correct) in sorted(per_defect.items()):
+        expected = "" if DEFECTS[defect][1] else "   (ground truth not fully recoverable)"
+        print(f"{defect:<18}{n:>8}{ok:>8}{correct:>8}{expected}")
+    n = len(replies)
+    print(f"strict json.loads: {strict_ok}/{n} usable -> {n - strict_ok} extra model calls")
+    print(f"local repair:      {repaired_ok}/{n} usable, {exact} exactly right -> {n - repaired_ok} extra model calls")
+    print(f"repair stats: {repair_stats}")
+
+    calls = asyncio.run(through_api(replies))
+    print(f"parse_report model calls: {calls} for {n} reports "
+          f"(strict parsing with a retry would make {n + n - strict_ok}); re-prompts {repair_stats['reprompts']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+# benchmarks/bench_page_selection.py
+"""Payload reduction and field retention of relevant-page pruning.
+
+Builds a fixture set of long synthetic reports (the UserContext fields on one or
+two pages among --filler-pages results tables, vitals charts and progress notes)
+and prunes each one. Reports the payload size before and after, and two accuracy
+checks against the ground truth:
+
+  * field recall - every name/condition/medication/dosage is still in the kept pages
+  * extraction   - the rule-based extractor gives the same answer on the pruned PDF
+
+    python -m benchmarks.bench_page_selection --count 60 --filler-pages 40
+"""
+import argparse
+import re
+import tempfile
+
+from benchmarks.common import summarize, timed
+from benchmarks.sample_reports import make_corpus
+from report_parser_agent.local_extractor import extract_fields, read_text_pages
+from report_parser_agent.page_selection import prune_pdf
+
+
+def _normalized(text):
+    return re.sub(r"\s+", "", text).lower()
+
+
+def truth_values(truth):
+    context = truth["user_context"]
+    values = [context["user_name"], *context["diagnosed_conditions"]]
+    for medication in context["current_medications"]:
+        values += [medication["name"], medication["dosage"]]
+    return values
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--count", type=int, default=60)
+    parser.add_argument("--filler-pages", type=int, default=40)
+    parser.add_argument("--seed", type=int, default=11)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        corpus = [item for item in make_corpus(tmp, args.count, args.seed, args.filler_pages) if item[2] != "scanned"]
+        before = after = pages_before = pages_after = recalled = same_answer = 0
+        times = []
+        for path, truth, layout in corpus:
+            data = path.read_bytes()
+            pruned, elapsed = timed(prune_pdf, data)
+            times.append(elapsed)
+            payload = pruned.data if pruned.data is not None else data
+            before += len(data)
+            after += len(payload)
+            pages_before += pruned.total_pages
+            pages_after += len(pruned.kept_pages)
+
+            full_text = "\n".join(read_text_pages(data))
+            kept_text = "\n".join(read_text_pages(payload))
+            recalled += all(_normalized(value) in _normalized(kept_text) for value in truth_values(truth))
+            same_answer += extract_fields(full_text).output == extract_fields(kept_text).output
+
+    n = len(corpus)
+    summarize("prune_pdf", times)
+    print(f"reports={n}  pages {pages_before} -> {pages_after} ({1 - pages_after / pages_before:.0%} fewer)")
+    print(f"payload {before / 1024:.0f}KB -> {after / 1024:.0f}KB ({1 - after / before:.0%} smaller)")
+    print(f"field recall: {recalled}/{n} reports keep every ground-truth field")
+    print(f"extraction unchanged on pruned PDF: {same_answer}/{n}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+# benchmarks/bench_result_cache.py
+"""Hit ratio and latency of the find_doctors / view_my_appointments result cache.
+
+Replays a skewed (Zipf-like) mix of repeated searches and appointment views, with
+a booking every --book-every calls, for several cache sizes. Use the reported hit
+ratio to size AROGYA_TOOL_CACHE_SIZE.
+
+    python -m benchmarks.bench_result_cache --calls 20000 --sizes 16 64 256 1024
+"""
+import argparse
+import random
+from datetime import date, timedelta
+
+from benchmarks.common import generated_db, summarize, timed
+from orchestrator_agent.sub_agents.appointment_agent import database
+from orchestrator_agent.sub_agents.appointment_agent.datagen import LOCATIONS, SPECIALIZATIONS
+from orchestrator_agent.sub_agents.appointment_agent.result_cache import ResultCache
+
+
+def workload(calls, patients, seed, book_every):
+    """Yield (tool, args) calls; popular searches and patients repeat far more often."""
+    rng = random.Random(seed)
+    searches = [(s, l) for s in SPECIALIZATIONS for l in LOCATIONS]
+    weights = [1 / (rank + 1) for rank in range(len(searches))]
+    patient_weights = [1 / (rank + 1) for rank in range(patients)]
+    tomorrow = date.today() + timedelta(days=1)
+    for i in range(calls):
+        if book_every and i % book_every == book_every - 1:
+            day = (tomorrow + timedelta(days=rng.randrange(30))).isoformat()
+            patient = f"Patient {rng.choices(range(patients), patient_weights)[0]}"
+            yield "book", (rng.randrange(1, 1000), patient, day, f"{rng.randrange(9, 17)}:00")
+        elif rng.random() < 0.6:
+            yield "find", rng.choices(searches, weights)[0]
+        else:
+            yield "view", (f"Patient {rng.choices(range(patients), patient_weights)[0]}",)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--calls", type=int, default=20000)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[16, 64, 256, 1024])
+    parser.add_argument("--patients", type=int, default=2000)
+    parser.add_argument("--book-every", type=int, default=50)
+    parser.add_argument("--doctors", type=int, default=100_000)
+    parser.add_argument("--appointments", type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    tools = {
+        "find": database._find_doctors_in_db,
+        "view": database._get_appointments_for_user_db,
+        "book": database._book_appointment_in_db,
+    }
+    with generated_db(args.doctors, args.appointments) as db_path:
+        for size in [0] + sorted(args.sizes):
+            database.configure_pool(db_path)
+            # Size 0 keeps nothing, i.e. every call goes to the database
+            database._result_cache = ResultCache(max_entries=size, ttl_seconds=database.TOOL_CACHE_TTL)
+            samples = []
+            for tool, call_args in workload(args.calls, args.patients, 7, args.book_every):
+                _, elapsed = timed(tools[tool], *call_args)
+                if tool != "book":
+                    samples.append(elapsed)
+            stats = database.cache_stats()
+            summarize(f"cache size {size:<5} hit ratio {stats['hit_ratio']:.2%}", samples)
+        database.get_pool().close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+# benchmarks/bench_result_encoding.py
+"""Size of the tool results fed back to the model, per result encoding.
+
+Runs find_doctors and find_earliest_available for every specialization/location
+pair in the seeded database, plus view_my_appointments for every patient (after
+booking a few extra appointments), once per encoding. Reports total bytes and
+approximate tokens per tool and the reduction against the original pretty JSON.
+Tokens are counted with tiktoken's cl100k_base when it is installed, otherwise
+estimated as bytes / 4.
+
+    python -m benchmarks.bench_result_encoding
+"""
+import argparse
+from collections import defaultdict
+
+from benchmarks.common import temp_db_copy
+from orchestrator_agent.sub_agents.appointment_agent import database, result_format
+from orchestrator_agent.sub_agents.appointment_agent.result_format import FORMATS, decode_records
+
+
+def token_counter():
+    """Return (count_tokens, label)."""
+    try:
+        import tiktoken
+        encoding = tiktoken.get_encoding("cl100k_base")
+        return (lambda text: len(encoding.encode(text))), "cl100k_base tokens"
+    except Exception:
+        return (lambda text: (len(text.encode("utf-8")) + 3) // 4), "~tokens (bytes/4)"
+
+
+def book_sample_appointments(patients, per_patient):
+    """Give `patients` patients `per_patient` appointments each, using the earliest free slots."""
+    slots = decode_records(database._find_earliest_slots_in_db("Physician", "", patients * per_patient))
+    for index, slot in enumerate(slots):
+        database._book_appointment_in_db(slot["doctor_id"], f"Bench Patient {index % patients}", slot["date"], slot["time"])
+
+
+def workload():
+    """(tool name, uncached function, args) for every call of the benchmark."""
+    with database.get_pool().connection() as conn:
+        pairs = conn.execute("SELECT DISTINCT specialization, location FROM doctors ORDER BY 1, 2").fetchall()
+        patients = [row[0] for row in conn.execute("SELECT DISTINCT patient_name FROM appointments ORDER BY 1")]
+    calls = []
+    for specialization, location in pairs:
+        calls.append(("find_doctors", database._search_doctors, (specialization, location)))
+        calls.append(("find_earliest_available", database._find_earliest_slots_in_db, (specialization, location)))
+    for patient in patients:
+        calls.append(("view_my_appointments", database._query_appointments, (patient,)))
+    return calls
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--patients", type=int, default=20, help="extra patients to book appointments for")
+    parser.add_argument("--per-patient", type=int, default=4)
+    args = parser.parse_args()
+    count_tokens, token_label = token_counter()
+
+    with temp_db_copy() as db_path:
+        database.configure_pool(db_path)
+        book_sample_appointments(args.patients, args.per_patient)
+        calls = workload()
+
+        default_format = result_format.RESULT_FORMAT
+        totals = defaultdict(lambda: [0, 0, 0])    # (tool, format) -> [calls, bytes, tokens]
+        for fmt in FORMATS:
+            database.set_result_format(fmt)
+            for tool, func, call_args in calls:
+                result = func(*call_args)
+                total = totals[tool, fmt]
+                total[0] += 1
+                total[1] += len(result.encode("utf-8"))
+                total[2] += count_tokens(result)
+        database.set_result_format(default_format)
+        database.get_pool().close()
+
+    print(f"tokens: {token_label}")
+    for tool in dict.fromkeys(tool for tool, _, _ in calls):
+        base_bytes, base_tokens = totals[tool, "pretty"][1:]
+        for fmt in FORMATS:
+            n, size, tokens = totals[tool, fmt]
+            print(
+                f"{tool:<24} {fmt:<8} calls={n:<4} bytes={size:<8} tokens={tokens:<7} "
+                f"bytes -{1 - size / base_bytes:6.1%}  tokens -{1 - tokens / base_tokens:6.1%}"
+            )
+
+
+if __name__ == "__main__":
+    main()
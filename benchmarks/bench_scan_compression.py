@@ -0,0 +1,84 @@
+# benchmarks/bench_scan_compression.py
+"""Bytes saved, preprocessing time and upload time of scanned-image recompression.
+
+Builds --count scanned reports (full-colour --dpi page images, --pages pages
+each) and runs them through scan_compression.compress_scan concurrently, as the
+API would for simultaneous uploads. Per document it prints the size before and
+after, the preprocessing time and the upload time at --upload-mbps (simulated
+from the byte count, since no Files API is called).
+
+The event loop's longest stall during preprocessing is measured too: it stays
+small because the work runs in the process pool.
+
+    python -m benchmarks.bench_scan_compression --count 6 --pages 4
+"""
+import argparse
+import asyncio
+import io
+import random
+import time
+
+from benchmarks.sample_reports import random_truth, report_pages, scanned_image_pdf
+from report_parser_agent import scan_compression
+
+
+async def loop_lag(stop: asyncio.Event, interval=0.01):
+    """Longest delay of a 10 ms timer while `stop` is unset."""
+    worst = 0.0
+    while not stop.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(interval)
+        worst = max(worst, time.perf_counter() - start - interval)
+    return worst
+
+
+async def run(documents):
+    stop = asyncio.Event()
+    lag = asyncio.create_task(loop_lag(stop))
+    start = time.perf_counter()
+    results = await asyncio.gather(*(scan_compression.compress_scan(io.BytesIO(data), len(data)) for data in documents))
+    wall = time.perf_counter() - start
+    for result in results:
+        if result.file is not None:
+            result.file.close()
+    stop.set()
+    return results, wall, await lag
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--count", type=int, default=6)
+    parser.add_argument("--pages", type=int, default=4)
+    parser.add_argument("--dpi", type=int, default=300)
+    parser.add_argument("--upload-mbps", type=float, default=20.0, help="uplink in Mbit/s")
+    parser.add_argument("--seed", type=int, default=3)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    documents = []
+    for _ in range(args.count):
+        pages = report_pages("scanned", random_truth(rng), rng, filler_pages=args.pages - 1)
+        documents.append(scanned_image_pdf(pages, rng, dpi=args.dpi))
+
+    results, wall, lag = asyncio.run(run(documents))
+    scan_compression.shutdown()
+
+    def upload_s(size):
+        return size * 8 / (args.upload_mbps * 1e6)
+
+    print(f"{'doc':<5}{'before':>10}{'after':>10}{'saved':>8}{'preprocess':>12}{'upload before':>15}{'upload after':>14}")
+    total_before = total_after = 0
+    for index, result in enumerate(results):
+        after = result.compressed_bytes
+        total_before += result.original_bytes
+        total_after += after
+        print(f"{index:<5}{result.original_bytes / 1e6:>8.1f}MB{after / 1e6:>8.1f}MB{result.bytes_saved / result.original_bytes:>8.0%}"
+              f"{result.seconds:>11.2f}s{upload_s(result.original_bytes):>14.2f}s{upload_s(after):>13.2f}s")
+    print(f"total {total_before / 1e6:.1f}MB -> {total_after / 1e6:.1f}MB ({1 - total_after / total_before:.0%} saved); "
+          f"preprocessing wall time {wall:.2f}s with {scan_compression.SCAN_WORKERS} workers; "
+          f"upload {upload_s(total_before):.1f}s -> {upload_s(total_after):.1f}s at {args.upload_mbps:g} Mbit/s")
+    print(f"longest event-loop stall during preprocessing: {lag * 1000:.1f}ms")
+
+
+if __name__ == "__main__":
+    main()
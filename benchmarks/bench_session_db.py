@@ -0,0 +1,109 @@
+# benchmarks/bench_session_db.py
+"""Per-turn write cost and session load time of SqliteSessionService as a conversation grows.
+
+Plays --turns turns into one session the way main.py does:
+- utils.add_user_query_to_history;
+- the runner's user event;
+- the agent's reply event;
+- utils.add_agent_response_to_history.
+The interaction history is bounded by the history manager, and the events
+keep growing.
+
+Two stores are compared:
+- the shipped one, where interaction_history is written as splices;
+- "full writes", where every change writes the whole value (snapshot_every=0),
+  i.e. the state blob approach.
+
+At each checkpoint the script prints:
+- the bytes written and the time taken by the last turn's writes;
+- the load time of get_session on a fresh service, as after a restart;
+- the load time of get_session(num_recent_events=20).
+
+    python -m benchmarks.bench_session_db --turns 500
+"""
+import argparse
+import random
+import statistics
+import tempfile
+import time
+from pathlib import Path
+
+import utils
+from benchmarks.bench_history_prompt import AGENT_SENTENCES, ROUTES, USER_LINES
+from google.adk.events import Event
+from google.adk.sessions.base_session_service import GetSessionConfig
+from google.genai import types
+from session_db import SqliteSessionService
+
+STATE = {
+    "user_context": {"user_name": "Ravi Kumar", "personalInfo": {"age": 45, "sex": "Male"},
+                     "diagnosedConditions": ["Hypertension"],
+                     "currentMedications": [{"name": "Amlodipine", "dosage": "5mg"}]},
+    "interaction_history": [],
+}
+
+
+def turn(service, session, query, route, reply):
+    """One conversation turn's writes; returns (seconds, bytes written)."""
+    before = service.bytes_written
+    start = time.perf_counter()
+    utils.add_user_query_to_history(service, "bench", "u", session.id, query)
+    service.append_event(session, Event(invocation_id="i", author="user",
+                                        content=types.Content(role="user", parts=[types.Part(text=query)])))
+    service.append_event(session, Event(invocation_id="i", author=route,
+                                        content=types.Content(role="model", parts=[types.Part(text=reply)])))
+    utils.add_agent_response_to_history(service, "bench", "u", session.id, route, reply)
+    return time.perf_counter() - start, service.bytes_written - before
+
+
+def load_time(db_file, session_id, config=None, repeat=5):
+    samples = []
+    for _ in range(repeat):
+        fresh = SqliteSessionService(db_file)
+        start = time.perf_counter()
+        fresh.get_session(app_name="bench", user_id="u", session_id=session_id, config=config)
+        samples.append(time.perf_counter() - start)
+        fresh.close()
+    return statistics.median(samples)
+
+
+def play(db_file, turns, seed, snapshot_every, checkpoints):
+    rng = random.Random(seed)
+    service = SqliteSessionService(db_file, snapshot_every=snapshot_every)
+    session = service.create_session(app_name="bench", user_id="u", state=STATE)
+    rows = {}
+    window = []
+    for number in range(1, turns + 1):
+        reply = " ".join(rng.sample(AGENT_SENTENCES, rng.randint(2, 5)))
+        window.append(turn(service, session, rng.choice(USER_LINES), rng.choice(ROUTES), reply))
+        if number in checkpoints:
+            seconds = statistics.fmean(s for s, _ in window[-10:])
+            written = statistics.fmean(b for _, b in window[-10:])
+            rows[number] = (seconds, written, load_time(db_file, session.id),
+                            load_time(db_file, session.id, GetSessionConfig(num_recent_events=20)))
+    return rows, Path(db_file).stat().st_size
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--turns", type=int, default=500)
+    parser.add_argument("--seed", type=int, default=8)
+    args = parser.parse_args()
+    checkpoints = sorted({10, 50, 100, 250, args.turns} & set(range(1, args.turns + 1)))
+
+    with tempfile.TemporaryDirectory() as tmp:
+        spliced, spliced_size = play(f"{tmp}/splice.db", args.turns, args.seed, 32, checkpoints)
+        full, full_size = play(f"{tmp}/full.db", args.turns, args.seed, 0, checkpoints)
+
+    print(f"{'turn':>5} | {'spliced: write':>14} {'bytes':>7} {'load':>8} {'load-20':>8} | "
+          f"{'full writes: write':>18} {'bytes':>7} {'load':>8}")
+    for number in checkpoints:
+        s, f = spliced[number], full[number]
+        print(f"{number:>5} | {s[0] * 1000:12.2f}ms {s[1]:>7.0f} {s[2] * 1000:6.2f}ms {s[3] * 1000:6.2f}ms | "
+              f"{f[0] * 1000:16.2f}ms {f[1]:>7.0f} {f[2] * 1000:6.2f}ms")
+    print(f"database file after {args.turns} turns: spliced {spliced_size / 1024:.0f} KiB, "
+          f"full writes {full_size / 1024:.0f} KiB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+# benchmarks/bench_session_memory.py
+"""RSS of the parser API over many one-shot extractions.
+
+Drives api_pdf.parse_report --uploads times through the real ADK runner, with the
+model replaced by StubLlm and a --kb KB inline PDF per upload. The shipped
+ephemeral sessions are measured first, then the old behaviour (a plain
+InMemorySessionService whose sessions are never deleted) for a shorter run.
+Fails if RSS grows by more than --max-growth-mb with ephemeral sessions.
+
+    python -m benchmarks.bench_session_memory --uploads 10000
+"""
+import argparse
+import asyncio
+import gc
+import json
+import os
+from contextlib import contextmanager
+
+from google.adk.runners import Runner
+from google.adk.sessions import InMemorySessionService
+from google.genai import types
+
+import api_pdf
+from benchmarks.common import rss_bytes
+from benchmarks.stub_llm import StubLlm
+from report_parser_agent.agent import report_parser_agent
+
+REPLY = json.dumps({
+    "user_context": {
+        "user_name": "Benchmark Patient",
+        "personal_info": {"age": 61, "sex": "Female"},
+        "diagnosed_conditions": ["Hypertension"],
+        "current_medications": [{"name": "Amlodipine", "dosage": "5mg"}],
+    },
+    "interaction_history": [],
+})
+
+
+@contextmanager
+def leaky_session(session_service, *, app_name, user_id, state=None):
+    """The old behaviour: a fresh session per upload that is never deleted."""
+    yield session_service.create_session(app_name=app_name, user_id=user_id, state=state)
+
+
+async def run_uploads(count, kb, label):
+    """Parse `count` uploads and print RSS at ten checkpoints; return growth in MB."""
+    gc.collect()
+    baseline = rss_bytes()
+    for index in range(count):
+        part = types.Part(inline_data={"mime_type": "application/pdf", "data": os.urandom(kb * 1024)})
+        await api_pdf.parse_report(part)
+        if (index + 1) % max(1, count // 10) == 0:
+            gc.collect()
+            print(f"{label:<22} uploads={index + 1:<6} rss={rss_bytes() / 1024 / 1024:8.1f}MB")
+    return (rss_bytes() - baseline) / 1024 / 1024
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--uploads", type=int, default=10_000)
+    parser.add_argument("--legacy-uploads", type=int, default=1_000)
+    parser.add_argument("--kb", type=int, default=64)
+    parser.add_argument("--max-growth-mb", type=float, default=30.0)
+    args = parser.parse_args()
+
+    report_parser_agent.model = StubLlm(reply=REPLY)
+
+    growth = asyncio.run(run_uploads(args.uploads, args.kb, "ephemeral sessions"))
+    print(f"ephemeral sessions: RSS grew {growth:.1f}MB over {args.uploads} uploads, "
+          f"{api_pdf.session_service.stats()['sessions']} sessions left")
+
+    api_pdf.session_service = InMemorySessionService()
+    api_pdf.runner = Runner(agent=report_parser_agent, app_name="report_parser_app",
+                            session_service=api_pdf.session_service)
+    api_pdf.ephemeral_session = leaky_session
+    legacy = asyncio.run(run_uploads(args.legacy_uploads, args.kb, "sessions never deleted"))
+    print(f"sessions never deleted: RSS grew {legacy:.1f}MB over {args.legacy_uploads} uploads")
+
+    assert growth < args.max_growth_mb, f"RSS grew {growth:.1f}MB with ephemeral sessions"
+    print("OK: RSS stays flat with ephemeral sessions")
+
+
+if __name__ == "__main__":
+    main()
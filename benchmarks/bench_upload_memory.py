@@ -0,0 +1,154 @@
+# benchmarks/bench_upload_memory.py
+"""Peak memory of many concurrent large uploads to /extract/.
+
+Sends --concurrency synthetic --mb MB PDFs at once to the app in-process
+(httpx ASGI transport), once to a copy of the old handler that read the whole
+upload and inlined it, then to the real streaming /extract/ endpoint. The model
+call and the Gemini Files API upload are replaced by stand-ins so only the
+server's own buffering is measured. Peak Python heap is reported via tracemalloc;
+the script fails if the streaming endpoint's peak per request exceeds --max-mb.
+
+A last run sends real multi-page PDFs of the same size as on Vertex AI without
+an upload bucket, where /extract/ splits them into inline-sized page chunks
+(see chunked_extraction); its peak per request must stay under --max-inline-mb.
+
+    python -m benchmarks.bench_upload_memory --concurrency 8 --mb 45
+"""
+import argparse
+import asyncio
+import os
+import tempfile
+import tracemalloc
+from contextlib import asynccontextmanager
+from pathlib import Path
+
+import httpx
+from fastapi import File, UploadFile
+from google.genai import types
+
+import api_pdf
+import pdf_upload
+from benchmarks.sample_reports import pdf_bytes
+from report_parser_agent.agent import ExpectedOutput
+from report_parser_agent.extraction_cache import ExtractionCache
+
+PARSED = ExpectedOutput.model_validate({
+    "user_context": {
+        "user_name": "Benchmark Patient",
+        "personal_info": {"age": 40, "sex": "Male"},
+        "diagnosed_conditions": [],
+        "current_medications": [],
+    },
+    "interaction_history": [],
+})
+
+
+async def fake_parse_report(part: types.Part, prompt: str = None) -> ExpectedOutput:
+    """Stand-in for the model call."""
+    await asyncio.sleep(0.05)
+    return PARSED
+
+
+@asynccontextmanager
+async def fake_pdf_part(pdf):
+    """Stand-in for pdf_upload.pdf_part: large files are read back in chunks, as the Files API upload would."""
+    if pdf.size <= pdf_upload.INLINE_MAX_BYTES:
+        yield types.Part(inline_data={"mime_type": "application/pdf", "data": pdf.read_bytes()})
+        return
+    pdf.file.seek(0)
+    while pdf.file.read(pdf_upload.CHUNK_SIZE):
+        await asyncio.sleep(0)
+    yield types.Part.from_uri(file_uri="files/benchmark", mime_type="application/pdf")
+
+
+@api_pdf.app.post("/bench/legacy-extract/")
+async def legacy_extract(file: UploadFile = File(...)):
+    """The previous handler: whole upload in memory, inlined into the request."""
+    pdf_bytes = await file.read()
+    part = types.Part(inline_data={"mime_type": "application/pdf", "data": pdf_bytes})
+    return await fake_parse_report(part)
+
+
+def write_reports(directory, count, size_mb):
+    """Create `count` distinct synthetic PDFs of `size_mb` MB."""
+    paths = []
+    for index in range(count):
+        path = Path(directory) / f"report-{index}.pdf"
+        with open(path, "wb") as handle:
+            handle.write(b"%PDF-1.4\n")
+            for _ in range(size_mb):
+                handle.write(os.urandom(1024 * 1024))
+            handle.write(b"\n%%EOF\n")
+        paths.append(path)
+    return paths
+
+
+def write_paged_reports(directory, count, size_mb, page_kb=256):
+    """Create `count` distinct multi-page scans (no text layer, so sent whole) of about `size_mb` MB."""
+    paths = []
+    for index in range(count):
+        path = Path(directory) / f"paged-{index}.pdf"
+        pages = [[f"Page {number + 1}"] for number in range(size_mb * 1024 // page_kb)]
+        path.write_bytes(pdf_bytes(pages, scanned=True, pad_bytes=page_kb * 1024))
+        paths.append(path)
+    return paths
+
+
+async def upload_all(url, paths):
+    """POST every report concurrently and return (peak traced bytes, status codes)."""
+    transport = httpx.ASGITransport(app=api_pdf.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+        async def upload(path):
+            with open(path, "rb") as handle:
+                response = await client.post(url, files={"file": (path.name, handle, "application/pdf")})
+            return response.status_code
+
+        tracemalloc.start()
+        statuses = await asyncio.gather(*(upload(path) for path in paths))
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+    return peak, statuses
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--mb", type=int, default=45, help="report size, below AROGYA_MAX_UPLOAD_BYTES")
+    parser.add_argument("--max-mb", type=float, default=8.0, help="allowed peak heap per request, streaming endpoint")
+    parser.add_argument("--max-inline-mb", type=float, default=16.0,
+                        help="allowed peak heap per request, inline-sized chunks (two chunks in flight)")
+    args = parser.parse_args()
+
+    api_pdf.parse_report = fake_parse_report
+    api_pdf.pdf_part = fake_pdf_part
+    # Files API / bucket available: large uploads are passed by reference
+    api_pdf.uploads_by_reference = lambda: True
+
+    with tempfile.TemporaryDirectory() as tmp:
+        api_pdf.extraction_cache = ExtractionCache(Path(tmp) / "cache")
+        paths = write_reports(tmp, args.concurrency, args.mb)
+        for label, url in (("whole upload in memory (old)", "/bench/legacy-extract/"), ("streamed /extract/", "/extract/")):
+            peak, statuses = asyncio.run(upload_all(url, paths))
+            per_request = peak / args.concurrency / 1024 / 1024
+            print(f"{label:<30} statuses={sorted(set(statuses))} peak heap={peak / 1024 / 1024:8.1f}MB "
+                  f"({per_request:.1f}MB per request)")
+        assert statuses == [200] * args.concurrency, statuses
+        assert per_request <= args.max_mb, f"peak {per_request:.1f}MB per request exceeds {args.max_mb}MB"
+
+        # Vertex AI without an upload bucket: every model call carries an inline chunk
+        api_pdf.uploads_by_reference = lambda: False
+        chunked = api_pdf.extraction_stats["chunked"]
+        paths = write_paged_reports(tmp, args.concurrency, args.mb)
+        peak, statuses = asyncio.run(upload_all("/extract/", paths))
+        inline_per_request = peak / args.concurrency / 1024 / 1024
+        print(f"{'inline-sized chunks':<30} statuses={sorted(set(statuses))} peak heap={peak / 1024 / 1024:8.1f}MB "
+              f"({inline_per_request:.1f}MB per request)")
+        assert statuses == [200] * args.concurrency, statuses
+        assert api_pdf.extraction_stats["chunked"] - chunked == args.concurrency, "reports were not chunked"
+        assert inline_per_request <= args.max_inline_mb, \
+            f"peak {inline_per_request:.1f}MB per request exceeds {args.max_inline_mb}MB"
+        print("OK: streaming upload memory is bounded, with and without inline chunking")
+
+
+if __name__ == "__main__":
+    main()
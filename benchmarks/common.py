@@ -0,0 +1,75 @@
+# benchmarks/common.py
+"""Small helpers shared by the benchmark scripts in this folder.
+
+Run every benchmark from the repository root, e.g.
+    python -m benchmarks.bench_db_pool
+"""
+import shutil
+import statistics
+import tempfile
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+SEED_DB = REPO_ROOT / "orchestrator_agent" / "sub_agents" / "appointment_agent" / "doctors.db"
+
+
+def percentile(samples, pct):
+    """Nearest-rank percentile of a list of numbers."""
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    index = max(0, min(len(ordered) - 1, round(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+def summarize(label, samples_s):
+    """Print mean/p50/p95/p99 of a list of durations given in seconds."""
+    ms = [s * 1000 for s in samples_s]
+    print(
+        f"{label:<40} n={len(ms):<6} mean={statistics.fmean(ms):8.3f}ms "
+        f"p50={percentile(ms, 50):8.3f}ms p95={percentile(ms, 95):8.3f}ms "
+        f"p99={percentile(ms, 99):8.3f}ms"
+    )
+
+
+def rss_bytes():
+    """Resident set size of this process (psutil if installed, else /proc)."""
+    try:
+        import psutil
+        return psutil.Process().memory_info().rss
+    except ImportError:
+        import os
+        with open("/proc/self/statm") as statm:
+            return int(statm.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+
+
+def timed(fn, *args, **kwargs):
+    """Call fn and return (result, elapsed seconds)."""
+    start = time.perf_counter()
+    result = fn(*args, **kwargs)
+    return result, time.perf_counter() - start
+
+
+@contextmanager
+def generated_db(doctors, appointments=0, seed=42):
+    """Yield the path of a throwaway database filled by the synthetic data generator."""
+    from orchestrator_agent.sub_agents.appointment_agent.datagen import generate_dataset
+
+    with tempfile.TemporaryDirectory() as tmp:
+        target = Path(tmp) / "doctors.db"
+        started = time.perf_counter()
+        generate_dataset(target, doctors, appointments, seed=seed)
+        print(f"(generated {doctors} doctors / {appointments} appointments "
+              f"in {time.perf_counter() - started:.1f}s)")
+        yield target
+
+
+@contextmanager
+def temp_db_copy(source=SEED_DB):
+    """Yield the path of a throwaway copy of the seeded doctors database."""
+    with tempfile.TemporaryDirectory() as tmp:
+        target = Path(tmp) / "doctors.db"
+        shutil.copyfile(source, target)
+        yield target
@@ -0,0 +1,227 @@
+# benchmarks/sample_reports.py
+"""Deterministic synthetic medical-report PDFs with known ground truth.
+
+Writes small, valid PDFs with a real text layer (or none, for "scanned" reports)
+in a few layouts seen in practice: labelled lab reports, discharge summaries,
+free-text letters. Each report comes with the ExpectedOutput it should parse to,
+so benchmarks can measure accuracy as well as speed.
+
+    python -m benchmarks.sample_reports --out /tmp/reports --count 50
+"""
+import argparse
+import io
+import os
+import json
+import random
+from pathlib import Path
+
+FIRST_NAMES = ["Rahul", "Priya", "Anil", "Sunita", "Vikram", "Meena", "Arjun", "Kavita", "Suresh", "Lakshmi",
+               "Rohan", "Anjali", "Manoj", "Deepa", "Kiran", "Neha"]
+LAST_NAMES = ["Sharma", "Patel", "Iyer", "Reddy", "Gupta", "Nair", "Kulkarni", "Singh", "Das", "Menon", "Joshi"]
+CONDITIONS = ["Type 2 Diabetes Mellitus", "Hypertension", "Hypothyroidism", "Dyslipidemia", "Bronchial Asthma",
+              "Chronic Kidney Disease", "Coronary Artery Disease", "Osteoarthritis", "Anemia", "GERD"]
+MEDICATIONS = [("Metformin", "500mg"), ("Amlodipine", "5mg"), ("Levothyroxine", "50mcg"), ("Atorvastatin", "10mg"),
+               ("Telmisartan", "40mg"), ("Pantoprazole", "40mg"), ("Aspirin", "75mg"), ("Glimepiride", "1mg"),
+               ("Montelukast", "10mg"), ("Folic Acid", "5mg")]
+LAB_TESTS = [("Hemoglobin", "g/dL", 10, 16), ("Fasting Blood Sugar", "mg/dL", 70, 180), ("HbA1c", "%", 5, 10),
+             ("Serum Creatinine", "mg/dL", 0.6, 2.5), ("TSH", "uIU/mL", 0.5, 8), ("Total Cholesterol", "mg/dL", 140, 280),
+             ("LDL Cholesterol", "mg/dL", 70, 190), ("Platelet Count", "lakh/cumm", 1.5, 4.5)]
+HOSPITALS = ["City Care Hospital, Pune", "Sahyadri Diagnostics, Mumbai", "Apollo Clinic, Chennai", "Lifeline Labs, Delhi"]
+
+LAYOUTS = ("lab_report", "discharge_summary", "letter", "scanned")
+# Share of each layout in a generated corpus
+LAYOUT_WEIGHTS = (0.45, 0.3, 0.15, 0.1)
+
+
+# --- Minimal PDF writer (Helvetica text lines, one content stream per page) ---
+
+def _escape(text: str) -> str:
+    return text.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+
+def pdf_bytes(pages, scanned=False, pad_bytes=0) -> bytes:
+    """A PDF with one page per list of text lines. `scanned` pages carry only drawing operators.
+
+    `pad_bytes` adds that many bytes of random comment lines to each page's content
+    stream: large reports whose text layer stays small.
+    """
+    objects = [b"<< /Type /Catalog /Pages 2 0 R >>", None, b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>"]
+    kids = []
+    for lines in pages:
+        if scanned:
+            # Grey bars where the text would be: an image-only page without a text layer
+            ops = [f"0.6 g 50 {780 - 14 * i} {min(500, 6 * len(line))} 9 re f" for i, line in enumerate(lines)]
+        else:
+            ops = ["BT /F1 10 Tf 12 TL 50 790 Td"] + [f"({_escape(line)}) Tj T*" for line in lines] + ["ET"]
+        stream = "\n".join(ops).encode("latin-1", "replace")
+        if pad_bytes:
+            stream += b"".join(b"\n% " + os.urandom(32).hex().encode() for _ in range(pad_bytes // 67))
+        objects.append(b"<< /Length %d >>\nstream\n" % len(stream) + stream + b"\nendstream")
+        content_id = len(objects)
+        objects.append(
+            b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 595 842] "
+            b"/Resources << /Font << /F1 3 0 R >> >> /Contents %d 0 R >>" % content_id
+        )
+        kids.append(len(objects))
+    objects[1] = b"<< /Type /Pages /Kids [%s] /Count %d >>" % (" ".join(f"{k} 0 R" for k in kids).encode(), len(kids))
+
+    out, offsets = bytearray(b"%PDF-1.4\n"), []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += b"%d 0 obj\n" % number + body + b"\nendobj\n"
+    xref = len(out)
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    out += b"".join(b"%010d 00000 n \n" % offset for offset in offsets)
+    out += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref)
+    return bytes(out)
+
+
+def scanned_image_pdf(pages, rng, dpi=300) -> bytes:
+    """A PDF of full-colour A4 page images at `dpi`, like a flatbed scan (requires Pillow)."""
+    from PIL import Image, ImageDraw, ImageFilter
+
+    width, height = round(8.27 * dpi), round(11.69 * dpi)
+    images = []
+    for lines in pages:
+        # Off-white paper with scanner noise, dark-blue text
+        tint = (rng.randint(235, 250), rng.randint(232, 246), rng.randint(220, 238))
+        noise = Image.effect_noise((width, height), 18).convert("RGB")
+        page = Image.blend(Image.new("RGB", (width, height), tint), noise, 0.12)
+        draw = ImageDraw.Draw(page)
+        scale = dpi / 72
+        for i, line in enumerate(lines):
+            draw.text((50 * scale, (52 + 14 * i) * scale), line, fill=(25, 30, 70), font_size=10 * scale)
+        images.append(page.filter(ImageFilter.GaussianBlur(0.6)))
+    out = io.BytesIO()
+    images[0].save(out, "PDF", resolution=dpi, save_all=True, append_images=images[1:], quality=90)
+    return out.getvalue()
+
+
+# --- Report content ---
+
+def random_truth(rng):
+    """A random patient and the ExpectedOutput dict for them."""
+    meds = rng.sample(MEDICATIONS, rng.randint(1, 4))
+    return {
+        "user_context": {
+            "user_name": f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}",
+            "personal_info": {"age": rng.randint(18, 85), "sex": rng.choice(["Male", "Female"])},
+            "diagnosed_conditions": rng.sample(CONDITIONS, rng.randint(1, 3)),
+            "current_medications": [{"name": name, "dosage": dosage} for name, dosage in meds],
+        },
+        "interaction_history": [],
+    }
+
+
+def lab_table(rng, rows=12):
+    """Lines of a results table, the bulk of most lab reports."""
+    lines = ["Test Name                 Result    Units        Reference Range"]
+    for _ in range(rows):
+        name, unit, low, high = rng.choice(LAB_TESTS)
+        lines.append(f"{name:<26}{rng.uniform(low, high):<10.1f}{unit:<13}{low} - {high}")
+    return lines
+
+
+def filler_page(rng, number):
+    """A page with none of the UserContext fields: results, nursing notes, vitals."""
+    kind = rng.choice(["table", "notes", "vitals"])
+    if kind == "table":
+        return [f"Investigations (continued) - page {number}", ""] + lab_table(rng, rows=40)
+    if kind == "vitals":
+        return [f"Vitals chart - page {number}", ""] + [
+            f"Day {day}  08:00  BP {rng.randint(110, 160)}/{rng.randint(70, 100)} mmHg  Pulse {rng.randint(60, 110)}/min  "
+            f"Temp {rng.uniform(97, 100):.1f} F  SpO2 {rng.randint(93, 100)}%"
+            for day in range(1, 45)
+        ]
+    return [f"Progress notes - page {number}", ""] + [
+        f"Patient seen on rounds. Comfortable, afebrile. Plan reviewed with the team and continued ({i})."
+        for i in range(45)
+    ]
+
+
+def report_pages(layout, truth, rng, filler_pages=0):
+    """Pages (lists of lines) of one report in `layout` for the patient in `truth`."""
+    context = truth["user_context"]
+    name, info = context["user_name"], context["personal_info"]
+    title = rng.choice(["Mr.", "Shri"]) if info["sex"] == "Male" else rng.choice(["Mrs.", "Ms."])
+    meds = context["current_medications"]
+    hospital = rng.choice(HOSPITALS)
+
+    if layout in ("lab_report", "scanned"):
+        first = [
+            hospital, "LABORATORY REPORT", "",
+            f"Patient Name: {title} {name.upper()}        UHID: {rng.randint(100000, 999999)}",
+            f"Age/Sex: {info['age']} Y / {info['sex'][0]}        Ref. By: Dr. {rng.choice(LAST_NAMES)}",
+            f"Date: 2025-0{rng.randint(1, 9)}-1{rng.randint(0, 9)}", "",
+            "Clinical History: " + rng.choice(["Routine check-up", "Follow-up", "Fatigue"]), "",
+            f"Diagnosis: {', '.join(context['diagnosed_conditions'])}", "",
+            "Current Medications:",
+        ] + [f"{i}. Tab. {m['name']} {m['dosage'][:-2] if m['dosage'].endswith('mg') else m['dosage']}"
+             f"{' mg' if m['dosage'].endswith('mg') else ''} {rng.choice(['OD', 'BD', 'HS'])}"
+             for i, m in enumerate(meds, start=1)] + ["", "Results:"] + lab_table(rng)
+        pages = [first]
+    elif layout == "discharge_summary":
+        first = [
+            hospital, "DISCHARGE SUMMARY", "",
+            f"Name of Patient: {name}",
+            f"Age: {info['age']} years",
+            f"Sex: {info['sex']}",
+            f"IP No: {rng.randint(10000, 99999)}", "",
+            "Final Diagnosis:",
+        ] + [f"- {c}" for c in context["diagnosed_conditions"]] + [
+            "",
+            "Course in Hospital: Patient was admitted with complaints and managed conservatively.",
+            "",
+        ]
+        discharge = ["Discharge Medications:"] + [
+            f"- {m['name']} {m['dosage']} {rng.choice(['once daily', 'twice daily', 'at night'])}" for m in meds
+        ] + ["", "Follow Up: After 2 weeks in OPD.", "Advice: Low salt diet, regular exercise."]
+        pages = [first, discharge]
+    else:  # letter
+        pronoun = "he" if info["sex"] == "Male" else "she"
+        pages = [[
+            hospital, "", "To Whom It May Concern", "",
+            f"This is to certify that {title} {name}, aged {info['age']}, has been under my care.",
+            f"Over the last year {pronoun} has been treated for "
+            f"{' and '.join(c.lower() for c in context['diagnosed_conditions'])}.",
+            f"{pronoun.capitalize()} is presently taking "
+            f"{', '.join(m['name'] + ' ' + m['dosage'] for m in meds)} as advised.",
+            "", "Dr. " + rng.choice(LAST_NAMES), "Consultant Physician",
+        ]]
+
+    # Long reports: the fields sit on a few pages among many others
+    for number in range(filler_pages):
+        pages.insert(rng.randint(1, len(pages)), filler_page(rng, number + 2))
+    return pages
+
+
+def make_corpus(directory, count=50, seed=7, filler_pages=0):
+    """Write `count` reports (PDF + .json ground truth) and return [(pdf path, truth, layout)]."""
+    rng = random.Random(seed)
+    directory = Path(directory)
+    directory.mkdir(parents=True, exist_ok=True)
+    corpus = []
+    for index in range(count):
+        layout = rng.choices(LAYOUTS, LAYOUT_WEIGHTS)[0]
+        truth = random_truth(rng)
+        pages = report_pages(layout, truth, rng, filler_pages=filler_pages)
+        path = directory / f"report-{index:04d}-{layout}.pdf"
+        path.write_bytes(pdf_bytes(pages, scanned=layout == "scanned"))
+        path.with_suffix(".json").write_text(json.dumps(truth, indent=2))
+        corpus.append((path, truth, layout))
+    return corpus
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--out", required=True)
+    parser.add_argument("--count", type=int, default=50)
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--filler-pages", type=int, default=0)
+    args = parser.parse_args()
+    corpus = make_corpus(args.out, args.count, args.seed, args.filler_pages)
+    print(f"wrote {len(corpus)} reports to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,27 @@
+# benchmarks/stub_llm.py
+"""A stand-in model for driving the real ADK runners without calling Gemini."""
+import asyncio
+from typing import AsyncGenerator, Callable, Union
+
+from google.adk.models.base_llm import BaseLlm
+from google.adk.models.llm_request import LlmRequest
+from google.adk.models.llm_response import LlmResponse
+from google.genai import types
+
+
+class StubLlm(BaseLlm):
+    """Answers every request with a fixed text (or `reply(llm_request)`) after `delay_s` (or `delay_s(llm_request)`) seconds."""
+
+    model: str = "stub"
+    reply: Union[str, Callable[[LlmRequest], str]] = ""
+    delay_s: Union[float, Callable[[LlmRequest], float]] = 0.0
+
+    async def generate_content_async(
+        self, llm_request: LlmRequest, stream: bool = False
+    ) -> AsyncGenerator[LlmResponse, None]:
+        delay = self.delay_s(llm_request) if callable(self.delay_s) else self.delay_s
+        if delay:
+            await asyncio.sleep(delay)
+        text = self.reply(llm_request) if callable(self.reply) else self.reply
+        yield LlmResponse(content=types.Content(role="model", parts=[types.Part(text=text)]))
+
@@ -0,0 +1,105 @@
+# conversation_history.py
+"""Bounded interaction history with a rolling summary.
+
+`state["interaction_history"]` is interpolated into the orchestrator's and every
+sub-agent's instruction on each model call, so it has to stay small however long
+the conversation runs. `HistoryManager.add` keeps the last `recent_turns` turns
+verbatim and folds each turn that falls out of that window into a single summary
+entry at the front of the list:
+
+    [{"role": "summary", "content": "user: <first sentence>\nsymptom_bot: <first sentence>\n..."},
+     {"role": "user", "content": "..."}, {"role": "faq_bot", "content": "..."}, ...]
+
+The summary is refreshed incrementally: only the evicted turns are condensed
+(to their first sentence) and appended; once it is over its share of the token
+budget its oldest lines are dropped. Nothing is recomputed from the full
+conversation, so an update costs the same on turn 200 as on turn 2. A
+`summarize(summary, evicted_turns) -> str` callable can replace the local
+condenser (e.g. with a model call).
+
+Tokens are estimated as characters / 4; no tokenizer is needed.
+"""
+import os
+import re
+
+HISTORY_RECENT_TURNS = int(os.getenv("AROGYA_HISTORY_RECENT_TURNS", "8"))
+HISTORY_TOKEN_BUDGET = int(os.getenv("AROGYA_HISTORY_TOKEN_BUDGET", "1500"))
+# Share of the budget the rolling summary may use
+SUMMARY_SHARE = 0.35
+# Longest gist kept per evicted turn, in characters
+GIST_CHARS = 160
+
+SUMMARY_ROLE = "summary"
+_SENTENCE_END = re.compile(r"(?<=[.!?])\s")
+
+
+def estimate_tokens(value) -> int:
+    """Rough token count of a string (or of its repr, as the instructions interpolate it)."""
+    text = value if isinstance(value, str) else str(value)
+    return (len(text) + 3) // 4
+
+
+def gist(entry: dict) -> str:
+    """One line standing in for a turn in the summary: its role and first sentence."""
+    content = " ".join(str(entry.get("content", "")).split())
+    first = _SENTENCE_END.split(content, maxsplit=1)[0]
+    if len(first) > GIST_CHARS:
+        first = first[:GIST_CHARS - 3].rstrip() + "..."
+    return f"{entry.get('role', 'agent')}: {first}"
+
+
+def condense(summary: str, evicted: list) -> str:
+    """Default summarizer: append the gists of the evicted turns to the summary."""
+    lines = summary.splitlines() if summary else []
+    lines.extend(gist(entry) for entry in evicted)
+    return "\n".join(lines)
+
+
+class HistoryManager:
+    """Keeps an interaction history list within `recent_turns` verbatim turns and `token_budget` tokens."""
+
+    def __init__(self, recent_turns=HISTORY_RECENT_TURNS, token_budget=HISTORY_TOKEN_BUDGET, summarize=None):
+        self.recent_turns = recent_turns
+        self.token_budget = token_budget
+        self.summary_budget = int(token_budget * SUMMARY_SHARE)
+        self.summarize = summarize or condense
+
+    @staticmethod
+    def split(history: list):
+        """(summary text, verbatim turns) of a history list."""
+        if history and history[0].get("role") == SUMMARY_ROLE:
+            return history[0].get("content", ""), list(history[1:])
+        return "", list(history)
+
+    def _trim_summary(self, summary: str) -> str:
+        """Drop the oldest summary lines until it fits its share of the budget."""
+        lines = summary.splitlines()
+        while len(lines) > 1 and estimate_tokens("\n".join(lines)) > self.summary_budget:
+            lines.pop(0)
+        summary = "\n".join(lines)
+        if estimate_tokens(summary) > self.summary_budget:
+            summary = summary[-self.summary_budget * 4:]
+        return summary
+
+    def add(self, history: list, entry: dict) -> list:
+        """The history with `entry` appended, compacted to the window and token budget."""
+        summary, turns = self.split(history or [])
+        turns.append(entry)
+
+        evicted = []
+        if len(turns) > self.recent_turns:
+            evicted = turns[:len(turns) - self.recent_turns]
+            turns = turns[len(turns) - self.recent_turns:]
+        # Long turns: move more of the window into the summary until it fits
+        verbatim_budget = self.token_budget - self.summary_budget
+        while len(turns) > 1 and estimate_tokens(turns) > verbatim_budget:
+            evicted.append(turns.pop(0))
+        if len(turns) == 1 and estimate_tokens(turns) > verbatim_budget:
+            content = str(turns[0].get("content", ""))
+            turns[0] = {**turns[0], "content": content[:verbatim_budget * 4 - 64].rstrip() + " ..."}
+
+        if evicted:
+            summary = self._trim_summary(self.summarize(summary, evicted))
+        if not summary:
+            return turns
+        return [{"role": SUMMARY_ROLE, "content": summary}] + turns
@@ -0,0 +1,260 @@
+# extraction_jobs.py
+"""Durable, asynchronous extraction jobs for the parser API.
+
+Submitting a job stores the PDF under JOBS_DIR and a row in a SQLite job table,
+and returns immediately. A pool of in-process workers claims queued jobs, runs
+the extraction, and records the result. Failed attempts are retried with
+exponential backoff up to `max_attempts`. Jobs that were running when the
+process died are re-queued on the next start. Finished jobs and their PDFs are
+purged every PURGE_INTERVAL once older than JOB_RETENTION_SECONDS. The table and
+the spool directory are created by `start()`, not on import.
+
+The job table assumes a single API process owns JOBS_DB.
+"""
+import asyncio
+import os
+import random
+import shutil
+import sqlite3
+import threading
+import time
+import uuid
+from pathlib import Path
+
+from pdf_upload import SpooledPdf
+
+JOBS_DB = Path(os.getenv("AROGYA_JOBS_DB", Path(__file__).parent / "extraction_jobs.db"))
+JOBS_DIR = Path(os.getenv("AROGYA_JOBS_DIR", Path(__file__).parent / ".extraction_jobs"))
+JOB_WORKERS = int(os.getenv("AROGYA_JOB_WORKERS", "4"))
+JOB_MAX_ATTEMPTS = int(os.getenv("AROGYA_JOB_MAX_ATTEMPTS", "3"))
+JOB_BACKOFF_SECONDS = float(os.getenv("AROGYA_JOB_BACKOFF_SECONDS", "2"))
+JOB_RETENTION_SECONDS = float(os.getenv("AROGYA_JOB_RETENTION_SECONDS", str(24 * 3600)))
+
+# How often idle workers look for retries that became due
+POLL_INTERVAL = 0.5
+# How often expired jobs are purged while the queue runs
+PURGE_INTERVAL = float(os.getenv("AROGYA_JOB_PURGE_INTERVAL", "600"))
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    status TEXT NOT NULL,               -- queued | running | succeeded | failed
+    filename TEXT,
+    pdf_path TEXT NOT NULL,
+    pdf_sha256 TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    next_attempt_at REAL NOT NULL,
+    result TEXT,
+    error TEXT,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_jobs_queue ON jobs (status, next_attempt_at);
+"""
+
+_PUBLIC_FIELDS = ("id", "status", "filename", "size", "attempts", "error", "created_at", "updated_at")
+
+
+class JobQueue:
+    """A SQLite-backed job table plus the asyncio workers that drain it.
+
+    `handler(pdf, filename)` is awaited for each job with a SpooledPdf-like
+    object and must return a pydantic model; its JSON is stored as the result.
+    """
+
+    def __init__(self, handler, db_file=JOBS_DB, spool_dir=JOBS_DIR, workers=JOB_WORKERS,
+                 max_attempts=JOB_MAX_ATTEMPTS, backoff_seconds=JOB_BACKOFF_SECONDS,
+                 retention_seconds=JOB_RETENTION_SECONDS, purge_interval=PURGE_INTERVAL):
+        self.handler = handler
+        self.db_file = db_file
+        self.spool_dir = Path(spool_dir)
+        self.workers = workers
+        self.max_attempts = max_attempts
+        self.backoff_seconds = backoff_seconds
+        self.retention_seconds = retention_seconds
+        self.purge_interval = purge_interval
+        self._conn = None
+        self._lock = threading.Lock()
+        self._wakeup = None
+        self._tasks = []
+
+    # --- Job table (blocking; called through asyncio.to_thread) ---
+
+    def _connect(self):
+        """Create the spool directory and the job table on first use (caller holds the lock)."""
+        if self._conn is None:
+            self.spool_dir.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(self.db_file, check_same_thread=False, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.executescript(_SCHEMA)
+            self._conn = conn
+        return self._conn
+
+    def _execute(self, sql, params=()):
+        with self._lock:
+            return self._connect().execute(sql, params).fetchall()
+
+    def _insert(self, job_id, filename, pdf_path, pdf_sha256, size):
+        now = time.time()
+        self._execute(
+            "INSERT INTO jobs (id, status, filename, pdf_path, pdf_sha256, size, next_attempt_at, created_at, updated_at) "
+            "VALUES (?, 'queued', ?, ?, ?, ?, ?, ?, ?)",
+            (job_id, filename, str(pdf_path), pdf_sha256, size, now, now, now),
+        )
+
+    def _claim(self):
+        """Atomically move the next due job to 'running' and return it, or None."""
+        now = time.time()
+        rows = self._execute(
+            "UPDATE jobs SET status = 'running', attempts = attempts + 1, updated_at = ? "
+            "WHERE id = (SELECT id FROM jobs WHERE status = 'queued' AND next_attempt_at <= ? "
+            "            ORDER BY next_attempt_at LIMIT 1) "
+            "RETURNING id, filename, pdf_path, pdf_sha256, size, attempts",
+            (now, now),
+        )
+        return rows[0] if rows else None
+
+    def _finish(self, job_id, status, result=None, error=None, retry_at=None):
+        now = time.time()
+        if retry_at is not None:
+            self._execute(
+                "UPDATE jobs SET status = 'queued', error = ?, next_attempt_at = ?, updated_at = ? WHERE id = ?",
+                (error, retry_at, now, job_id),
+            )
+        else:
+            self._execute(
+                "UPDATE jobs SET status = ?, result = ?, error = ?, updated_at = ? WHERE id = ?",
+                (status, result, error, now, job_id),
+            )
+
+    def recover(self):
+        """Re-queue jobs left 'running' by a crash and purge expired finished jobs.
+
+        A job that already used all its attempts is failed instead: a report that kills the
+        worker would otherwise be retried on every restart. Returns (re-queued, failed).
+        """
+        now = time.time()
+        interrupted = self._execute(
+            "UPDATE jobs SET "
+            "status = CASE WHEN attempts >= ? THEN 'failed' ELSE 'queued' END, "
+            "error = CASE WHEN attempts >= ? THEN 'Interrupted: the process stopped during the last attempt' "
+            "ELSE error END, "
+            "next_attempt_at = ?, updated_at = ? "
+            "WHERE status = 'running' RETURNING status, pdf_path",
+            (self.max_attempts, self.max_attempts, now, now),
+        )
+        failed = [pdf_path for status, pdf_path in interrupted if status == "failed"]
+        for pdf_path in failed:
+            Path(pdf_path).unlink(missing_ok=True)
+        self.purge()
+        return len(interrupted) - len(failed), len(failed)
+
+    def purge(self):
+        """Delete finished jobs older than `retention_seconds` and their PDFs; return how many."""
+        expired = self._execute(
+            "DELETE FROM jobs WHERE status IN ('succeeded', 'failed') AND updated_at < ? RETURNING pdf_path",
+            (time.time() - self.retention_seconds,),
+        )
+        for (pdf_path,) in expired:
+            Path(pdf_path).unlink(missing_ok=True)
+        return len(expired)
+
+    def get(self, job_id):
+        """Public view of a job (without its result), or None."""
+        rows = self._execute(f"SELECT {', '.join(_PUBLIC_FIELDS)} FROM jobs WHERE id = ?", (job_id,))
+        return dict(zip(_PUBLIC_FIELDS, rows[0])) if rows else None
+
+    def result(self, job_id):
+        """(status, result JSON or None) of a job, or None if it doesn't exist."""
+        rows = self._execute("SELECT status, result FROM jobs WHERE id = ?", (job_id,))
+        return rows[0] if rows else None
+
+    def counts(self):
+        """Number of jobs per status."""
+        return dict(self._execute("SELECT status, COUNT(*) FROM jobs GROUP BY status"))
+
+    # --- Async API ---
+
+    async def submit(self, pdf: SpooledPdf, filename: str) -> str:
+        """Persist an upload as a queued job and return its id."""
+        job_id = uuid.uuid4().hex
+        pdf_path = self.spool_dir / f"{job_id}.pdf"
+
+        def store():
+            with self._lock:
+                self._connect()
+            pdf.file.seek(0)
+            with open(pdf_path, "wb") as target:
+                shutil.copyfileobj(pdf.file, target)
+                target.flush()
+                os.fsync(target.fileno())
+            self._insert(job_id, filename, pdf_path, pdf.sha256, pdf.size)
+
+        await asyncio.to_thread(store)
+        if self._wakeup is not None:
+            self._wakeup.set()
+        return job_id
+
+    async def start(self):
+        """Create the job table, recover interrupted jobs and start the workers and the purge task."""
+        recovered, failed = await asyncio.to_thread(self.recover)
+        if recovered:
+            print(f"♻️ Re-queued {recovered} interrupted extraction job(s)")
+        if failed:
+            print(f"❌ Failed {failed} interrupted extraction job(s) that had no attempts left")
+        self._wakeup = asyncio.Event()
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+        self._tasks.append(asyncio.create_task(self._purger()))
+
+    async def stop(self):
+        """Cancel the workers; running jobs are picked up again by the next start()."""
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    async def _worker(self):
+        while True:
+            job = await asyncio.to_thread(self._claim)
+            if job is None:
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), POLL_INTERVAL)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+            await self._run(*job)
+
+    async def _purger(self):
+        """Purge expired jobs every `purge_interval`, so a long-running server reclaims their disk space."""
+        while True:
+            await asyncio.sleep(self.purge_interval)
+            try:
+                purged = await asyncio.to_thread(self.purge)
+            except sqlite3.Error as e:
+                print(f"⚠️ Purging expired extraction jobs failed: {e}")
+                continue
+            if purged:
+                print(f"🧹 Purged {purged} expired extraction job(s)")
+
+    async def _run(self, job_id, filename, pdf_path, pdf_sha256, size, attempts):
+        try:
+            with SpooledPdf(open(pdf_path, "rb"), size, pdf_sha256) as pdf:
+                output = await self.handler(pdf, filename)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            error = f"{type(e).__name__}: {e}"
+            if attempts < self.max_attempts and not isinstance(e, FileNotFoundError):
+                # Exponential backoff with jitter, so retries of a failing upstream spread out
+                delay = self.backoff_seconds * 2 ** (attempts - 1) * random.uniform(0.5, 1.5)
+                print(f"🔁 Job {job_id} attempt {attempts} failed ({error}); retrying in {delay:.1f}s")
+                await asyncio.to_thread(self._finish, job_id, "queued", error=error, retry_at=time.time() + delay)
+                return
+            print(f"❌ Job {job_id} failed after {attempts} attempt(s): {error}")
+            await asyncio.to_thread(self._finish, job_id, "failed", error=error)
+        else:
+            await asyncio.to_thread(self._finish, job_id, "succeeded", result=output.model_dump_json())
+        Path(pdf_path).unlink(missing_ok=True)
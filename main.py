@@ -3,16 +3,18 @@ import asyncio
 
 # ADAPTED: Import the orchestrator agent for the health app
 from orchestrator_agent.agent import root_agent as orchestrator_agent
+from orchestrator_agent.intent_router import IntentRouter
 
 from dotenv import load_dotenv
 from google.adk.runners import Runner
-from google.adk.sessions import InMemorySessionService
+from session_db import SqliteSessionService
 from utils import add_user_query_to_history, call_agent_async
 
 load_dotenv()
 
-# Using in-memory storage, conversation state will be lost on exit
-session_service = InMemorySessionService()
+
+# Sessions are kept in SQLite (AROGYA_SESSION_DB), so a conversation survives restarts
+session_service = SqliteSessionService()
 
 
 # ADAPTED: Define the initial state for a new user in the health app
@@ -41,14 +43,19 @@ async def main_async():
     APP_NAME = "Arogya Mitra"
     USER_ID = "sample user"
 
-    # Create a new session with the initial health context
-    new_session = session_service.create_session(
-        app_name=APP_NAME,
-        user_id=USER_ID,
-        state=initial_state,
-    )
-    SESSION_ID = new_session.id
-    print(f"Created new session for {USER_ID}: {SESSION_ID}")
+    # Continue the user's most recent session, or create one with the initial health context
+    existing = session_service.list_sessions(app_name=APP_NAME, user_id=USER_ID).sessions
+    if existing:
+        SESSION_ID = existing[-1].id
+        print(f"Continuing session for {USER_ID}: {SESSION_ID}")
+    else:
+        new_session = session_service.create_session(
+            app_name=APP_NAME,
+            user_id=USER_ID,
+            state=initial_state,
+        )
+        SESSION_ID = new_session.id
+        print(f"Created new session for {USER_ID}: {SESSION_ID}")
 
     # ADAPTED: Create a runner with our main orchestrator agent
     runner = Runner(
@@ -57,6 +64,15 @@ async def main_async():
         session_service=session_service,
     )
 
+    # Local intent router: a confident route runs the sub-agent directly over the
+    # same session, skipping the orchestrator's model call; anything else (e.g.
+    # a short follow-up) still goes through the orchestrator runner
+    router = IntentRouter.from_orchestrator(orchestrator_agent)
+    direct_runners = {
+        agent.name: Runner(agent=agent, app_name=APP_NAME, session_service=session_service)
+        for agent in orchestrator_agent.sub_agents
+    }
+
     # --- Interactive Conversation Loop (Identical to your example) ---
     print("\nWelcome to the Arogya Mitra Health Assistant!")
     print("You can ask about symptoms, fitness, or general health questions.")
@@ -68,13 +84,17 @@ async def main_async():
             print("Ending conversation. Goodbye!")
             break
 
-        # Update interaction history with the user's query
+        decision = router.route(user_input)
+        turn_runner = direct_runners.get(decision.agent, runner)
+
+        # Update interaction history with the user's query; on a direct route it is
+        # recorded as the sub-agent's event, so that runner starts from its own agent
         add_user_query_to_history(
-            session_service, APP_NAME, USER_ID, SESSION_ID, user_input
+            session_service, APP_NAME, USER_ID, SESSION_ID, user_input, author=decision.agent or "user"
         )
 
-        # Process the user query through the agent
-        await call_agent_async(runner, USER_ID, SESSION_ID, user_input)
+        # Process the user query through the routed sub-agent or the orchestrator
+        await call_agent_async(turn_runner, USER_ID, SESSION_ID, user_input)
 
     # --- Final State Examination (Identical to your example) ---
     final_session = session_service.get_session(
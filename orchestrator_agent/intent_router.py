@@ -0,0 +1,161 @@
+# orchestrator_agent/intent_router.py
+"""Local fast-path routing in front of the orchestrator model.
+
+Every turn used to cost two model round-trips: one on the orchestrator just to
+pick a sub-agent, then the sub-agent's own. `IntentRouter` classifies the
+newest user message locally from two signals:
+
+- keyword cues per sub-agent, following the orchestrator's routing rules
+  ("what is" / "tell me about" questions go to the FAQ bot, first-person
+  complaints to the SymptomBot, logging and meals to MedCoach, booking and
+  doctors to the appointment agent);
+- word-overlap similarity with the routing examples quoted in the
+  orchestrator instruction, parsed from the instruction itself so the two stay
+  in sync.
+
+`route()` returns the best sub-agent and a confidence (its share of the total
+score). When the confidence is below ROUTER_MIN_CONFIDENCE, or the message has
+too little signal (a follow-up such as "yes, please"), the caller should leave
+the turn to the orchestrator model.
+"""
+import os
+import re
+from dataclasses import dataclass
+
+ROUTER_MIN_CONFIDENCE = float(os.getenv("AROGYA_ROUTER_MIN_CONFIDENCE", "0.7"))
+# Below this score a message is treated as having no routing signal at all
+ROUTER_MIN_SCORE = 2.0
+# Weight of the closest instruction example's word overlap (0..1)
+EXAMPLE_WEIGHT = 3.0
+
+# Section headings of the orchestrator's routing instructions -> sub-agent names
+SECTION_AGENTS = {
+    "FAQ Bot": "faq_bot",
+    "SymptomBot": "symptom_bot",
+    "MedCoach": "med_coach",
+    "Appointment Agent": "appointment_agent",
+}
+
+_SYMPTOMS = (
+    r"pain|pains|ache|aches|aching|headache|migraine|fever|feverish|nausea|nauseous|dizzy|dizziness|"
+    r"vomit\w*|cough\w*|cold|chills|rash|itch\w*|swell\w*|swollen|bleed\w*|cramp\w*|sore|"
+    r"tired|fatigue\w*|exhausted|weak|breathless|short of breath|anxious|anxiety|depressed|stressed|"
+    r"palpitations|numb\w*|tingling|diarrh\w*|constipat\w*|insomnia|can'?t sleep|burning|stiff\w*"
+)
+
+# (pattern, weight) cues per sub-agent, matched on the lower-cased message
+CUES = {
+    "faq_bot": [
+        (r"^(?:what|how|why|which|when|is|are|does|do|can|should)\b.*\?$", 1.0),
+        (r"\b(?:what is|what are|what's|whats)\b", 1.5),
+        (r"\b(?:tell me (?:more )?about|explain|define|definition of|meaning of|how does)\b", 3.0),
+        (r"\b(?:side effects?|symptoms of|causes of|treatment for|risk factors|prevent\w*)\b", 2.0),
+        (r"\b(?:summari[sz]e|my (?:medical )?history|my (?:current )?medications|my (?:diagnosed )?conditions|my reports?)\b", 3.0),
+        (r"\b(?:diabetes|hypertension|cholesterol|bmi|metformin|insulin|vitamin|thyroid|disease)\b", 1.0),
+    ],
+    "symptom_bot": [
+        (rf"\b(?:i|i'?ve|i have|i am|i'?m)\s+(?:\w+\s+)?(?:got|having|have|had|been|feel|feeling|felt)\b.*\b(?:{_SYMPTOMS})\b", 4.0),
+        (rf"\bmy\s+(?:\w+\s+){{0,2}}(?:hurts?|is hurting|has been hurting|aches?|is aching|is swollen|feels)\b", 4.0),
+        (rf"\b(?:{_SYMPTOMS})\b", 1.5),
+        (r"\b(?:since (?:yesterday|morning|last)|for (?:two|three|a few|\d+) (?:days|hours|weeks)|right now|today)\b", 1.0),
+        (r"\b(?:blood pressure|sugar) (?:is|was) (?:high|low|\d+)", 2.0),
+    ],
+    "med_coach": [
+        (r"\b(?:log|logged|track|tracking|record)\b", 3.0),
+        (r"\b(?:calories?|kcal|steps|protein|carbs|water intake|glasses of water)\b", 3.0),
+        (r"\b(?:breakfast|lunch|dinner|snack|meal|meals|diet plan|ate|eaten|eat)\b", 2.0),
+        (r"\b(?:walk|walked|walking|ran|run|running|jog\w*|workout|exercise\w*|gym|yoga|cycl\w*|swim\w*|swam|burn|burned|burnt)\b", 2.0),
+        (r"\b(?:my weight|weigh|weighed|lost \d+|gained \d+)\b", 1.5),
+        (r"\b(?:suggest|recommend|plan)\b", 1.0),
+        (r"\b\d+[\s-]*(?:minutes?|mins?|km|kms|steps|calories|kcal)\b", 2.0),
+    ],
+    "appointment_agent": [
+        (r"\b(?:appointment|appointments|book|booking|bookings|schedule|reschedule|cancel|slot|slots)\b", 4.0),
+        (r"\b(?:doctor|doctors|dr\.?|specialist|physician|consultation|consult|clinic|hospital)\b", 2.0),
+        (r"\b(?:cardiologist|dermatologist|neurologist|orthopedic\w*|pediatrician|gynecologist|endocrinologist|"
+         r"psychiatrist|ent|dentist|gastroenterologist|ophthalmologist|pulmonologist|urologist)\b", 2.0),
+        (r"\b(?:find|see|visit|meet|need)\s+(?:a|an|the|my)?\s*(?:doctor|specialist|\w+ologist)\b", 3.0),
+        (r"\b(?:near me|nearby|earliest|available|availability|next week|tomorrow)\b", 1.0),
+        (r"\b(?:urgent|urgently|emergency|right away|asap|now!)", 2.0),
+    ],
+}
+
+_WORD = re.compile(r"[a-z0-9']+")
+_SECTION = re.compile(r"^\*\*\d+\.\s*(.+?)\s*(?:\(|\*\*)")
+_QUOTED = re.compile(r'^\s*-\s*(?:\([^)]*\)\s*)?"([^"]+)"')
+_STOPWORDS = frozenset(
+    "a an the and or of to for in on at my me i is are am be it this that with please can you your do does "
+    "what how i'm i've".split()
+)
+
+
+def _words(text: str) -> frozenset:
+    return frozenset(word for word in _WORD.findall(text.lower()) if word not in _STOPWORDS)
+
+
+def instruction_examples(instruction: str) -> dict:
+    """{sub-agent name: [example messages]} parsed from the orchestrator's routing section."""
+    examples, agent = {}, None
+    for line in instruction.splitlines():
+        heading = _SECTION.match(line.strip())
+        if heading:
+            agent = SECTION_AGENTS.get(heading.group(1))
+            continue
+        quoted = _QUOTED.match(line)
+        if agent and quoted:
+            examples.setdefault(agent, []).append(quoted.group(1))
+    return examples
+
+
+@dataclass(frozen=True)
+class RouteDecision:
+    """`agent` is None when the turn should be left to the orchestrator model."""
+
+    agent: str
+    confidence: float
+    scores: dict
+
+
+class IntentRouter:
+    """Scores a message against each sub-agent's cues and routing examples."""
+
+    def __init__(self, examples: dict, agents=None, min_confidence=ROUTER_MIN_CONFIDENCE, min_score=ROUTER_MIN_SCORE):
+        self.agents = sorted(agents or set(examples) | set(CUES))
+        self.min_confidence = min_confidence
+        self.min_score = min_score
+        self.examples = {agent: [_words(text) for text in texts] for agent, texts in examples.items()}
+        self.cues = {agent: [(re.compile(pattern), weight) for pattern, weight in cues]
+                     for agent, cues in CUES.items()}
+
+    @classmethod
+    def from_orchestrator(cls, orchestrator, **kwargs):
+        """A router over `orchestrator`'s sub-agents, trained on its instruction's examples."""
+        names = {agent.name for agent in orchestrator.sub_agents}
+        examples = {agent: texts for agent, texts in instruction_examples(orchestrator.instruction).items()
+                    if agent in names}
+        return cls(examples, agents=names, **kwargs)
+
+    def scores(self, message: str) -> dict:
+        text = " ".join(message.lower().split())
+        words = _words(text)
+        scores = {}
+        for agent in self.agents:
+            score = sum(weight for pattern, weight in self.cues.get(agent, ()) if pattern.search(text))
+            if words:
+                overlap = max((len(words & example) / len(words | example)
+                               for example in self.examples.get(agent, ())), default=0.0)
+                score += EXAMPLE_WEIGHT * overlap
+            scores[agent] = score
+        return scores
+
+    def route(self, message: str) -> RouteDecision:
+        """The best sub-agent for `message` and the share of the total score it holds."""
+        scores = self.scores(message)
+        best = max(scores, key=scores.get)
+        total = sum(scores.values())
+        if scores[best] < self.min_score or total <= 0:
+            return RouteDecision(None, 0.0, scores)
+        confidence = scores[best] / total
+        if confidence < self.min_confidence:
+            return RouteDecision(None, confidence, scores)
+        return RouteDecision(best, confidence, scores)
@@ -1,10 +1,10 @@
 from google.adk.agents import Agent
-from .tools import find_doctors, book_appointment, view_my_appointments
+from .tools import find_doctors, book_appointment, view_my_appointments, find_earliest_available
 
 appointment_agent = Agent(
     name="appointment_agent",
     description="Finds, books, and views appointments with doctors.",
-    tools=[find_doctors, book_appointment, view_my_appointments],
+    tools=[find_doctors, book_appointment, view_my_appointments, find_earliest_available],
     instruction="""
     You are an AI assistant that helps users manage their doctor appointments.
     Your goal is to be extremely clear, precise, and helpful.
@@ -20,6 +20,9 @@ appointment_agent = Agent(
     {interaction_history}
     </interaction_history>
 
+    **Reading Tool Results:**
+    The `find_doctors`, `find_earliest_available` and `view_my_appointments` tools may return their results as a table: `columns` lists the field names and each entry in `rows` is one record with its values in that column order. Read each row against the column names; the field names used below are those column names.
+
     **Your Workflow:**
 
     1.  **Find Doctors:**
@@ -39,14 +42,21 @@ appointment_agent = Agent(
         *   After listing all doctors with all their details, ask the user to provide the ID of the doctor they wish to book with.
 
 
-    2.  **Book Appointment:**
+    2.  **Find the Earliest Available Doctor:**
+        *   If the user wants the soonest / earliest / first available appointment (e.g., "find me the soonest cardiologist in Pune"), use the `find_earliest_available` tool instead of `find_doctors`.
+        *   Present each slot in a numbered list with the doctor's ID, name, hospital, fee, date and time, then ask which slot the user wants.
+        *   Book the chosen slot directly with the `book_appointment` tool using the doctor's ID, the slot's date and the slot's time. Do not ask for the date and time again.
+
+
+    3.  **Book Appointment:**
         *   Once the user provides the doctor's ID or name, you MUST ask for the specific date and time for the appointment.
         *   You can accept flexible date formats like  "4 July ", or "July 5" from this year i.e. 2025.
         *   If the user provides a date, confirm it. If they provide a time, confirm it as well.
         *   Once you have the date and the time, use the `book_appointment` tool.
+        *   Appointments are booked in fixed slots within the doctor's visiting hours. If the tool reports that the time is unavailable, show the user the available slots it returns and ask them to pick one.
 
 
-    3.  **View Appointments:**
+    4.  **View Appointments:**
         *   If a user asks to see their appointments (e.g., "show me my appointments"), use the `view_my_appointments` tool.
         *   **CRITICAL:** Present the list of appointments clearly. For each appointment, you MUST display all the details provided by the tool.
         *   **Use this format for each appointment:**
@@ -0,0 +1,128 @@
+# my-health-agent/orchestrator_agent/sub_agents/appointment_agent/connection_pool.py
+import queue
+import sqlite3
+import threading
+from contextlib import contextmanager
+
+# PRAGMAs applied to every pooled connection.
+# WAL lets readers run while a booking is being written, NORMAL sync is safe in WAL
+# mode, and a bigger page cache + mmap keep the hot doctor search pages in memory.
+DEFAULT_PRAGMAS = {
+    "journal_mode": "WAL",
+    "synchronous": "NORMAL",
+    "cache_size": -16000,       # negative = KiB, i.e. ~16 MB per connection
+    "mmap_size": 268435456,     # 256 MB
+    "temp_store": "MEMORY",
+    "busy_timeout": 5000,       # ms to wait on a locked database before failing
+    "foreign_keys": "ON",
+}
+
+# Number of prepared statements sqlite3 keeps per connection. Because pooled
+# connections live for the whole process, every tool query is compiled only once.
+STATEMENT_CACHE_SIZE = 256
+
+
+class PoolTimeoutError(sqlite3.Error):
+    """Raised when no pooled connection becomes free within the timeout."""
+
+
+class ConnectionPool:
+    """A bounded pool of long-lived, tuned SQLite connections.
+
+    Connections are created lazily up to `max_size` and handed out one at a time,
+    so a connection is never used by two threads at once. `initializer`, if given,
+    is called once with the very first connection (e.g. to apply schema migrations).
+    """
+
+    def __init__(self, db_file, max_size=8, timeout=10.0, pragmas=None, initializer=None):
+        self.db_file = db_file
+        self.max_size = max_size
+        self.timeout = timeout
+        self.pragmas = DEFAULT_PRAGMAS if pragmas is None else pragmas
+        self.initializer = initializer
+        self._idle = queue.LifoQueue(maxsize=max_size)
+        self._slots = threading.BoundedSemaphore(max_size)
+        self._lock = threading.Lock()
+        self._all = []
+        self._closed = False
+
+    def _connect(self):
+        """Open a new connection and apply the pool's PRAGMAs."""
+        conn = sqlite3.connect(
+            self.db_file,
+            check_same_thread=False,
+            cached_statements=STATEMENT_CACHE_SIZE,
+        )
+        for name, value in self.pragmas.items():
+            conn.execute(f"PRAGMA {name}={value}")
+        return conn
+
+    def acquire(self):
+        """Take a connection from the pool, opening a new one if none is idle."""
+        if self._closed:
+            raise sqlite3.ProgrammingError("Connection pool is closed.")
+        if not self._slots.acquire(timeout=self.timeout):
+            raise PoolTimeoutError(f"No database connection free after {self.timeout}s.")
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+        try:
+            conn = self._connect()
+        except Exception:
+            self._slots.release()
+            raise
+        with self._lock:
+            if self._closed:
+                conn.close()
+                self._slots.release()
+                raise sqlite3.ProgrammingError("Connection pool is closed.")
+            try:
+                if self.initializer is not None and not self._all:
+                    self.initializer(conn)
+            except Exception:
+                conn.close()
+                self._slots.release()
+                raise
+            self._all.append(conn)
+        return conn
+
+    def release(self, conn):
+        """Return a connection to the pool, rolling back anything left uncommitted.
+
+        Once the pool is closed, the connection is closed instead of re-queued.
+        """
+        with self._lock:
+            if self._closed:
+                if conn in self._all:
+                    self._all.remove(conn)
+                conn.close()
+            else:
+                if conn.in_transaction:
+                    conn.rollback()
+                self._idle.put_nowait(conn)
+        self._slots.release()
+
+    @contextmanager
+    def connection(self):
+        """Context manager yielding a pooled connection."""
+        conn = self.acquire()
+        try:
+            yield conn
+        finally:
+            self.release(conn)
+
+    def close(self):
+        """Close every connection the pool has opened."""
+        with self._lock:
+            self._closed = True
+            for conn in self._all:
+                conn.close()
+            self._all.clear()
+            while not self._idle.empty():
+                self._idle.get_nowait()
+
+    @property
+    def size(self):
+        """Number of connections opened so far."""
+        return len(self._all)
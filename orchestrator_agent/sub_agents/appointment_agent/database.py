@@ -1,16 +1,79 @@
 # my-health-agent/orchestrator_agent/sub_agents/appointment_agent/database.py
+import asyncio
+import functools
 import sqlite3
+import heapq
 import json
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from faker import Faker
-import random
 from datetime import date, timedelta, datetime
 from dateutil.parser import parse
 
+from .connection_pool import ConnectionPool
+from .result_cache import ResultCache
+from . import result_format
+from .result_format import encode_object, encode_records
+from .datagen import insert_doctors
+from .schedule import (
+    SLOT_MINUTES, WEEKDAYS, format_minutes, mask_minutes, parse_visiting_hours, slot_bit,
+    slot_mask, slot_starts,
+)
+
 
 # Define the path for the database in the same directory
 DB_FILE = Path(__file__).parent / "doctors.db"
 
+# Upper bound on concurrently open connections used by the tools
+POOL_SIZE = int(os.getenv("AROGYA_DB_POOL_SIZE", "8"))
+
+_pool = None
+_pool_lock = threading.Lock()
+
+# Distinct canonical specializations/locations, loaded once per pool (see _search_vocabulary)
+_vocabulary = None
+
+# Read-through cache of serialized find_doctors / view_my_appointments results
+TOOL_CACHE_SIZE = int(os.getenv("AROGYA_TOOL_CACHE_SIZE", "1024"))
+TOOL_CACHE_TTL = float(os.getenv("AROGYA_TOOL_CACHE_TTL", "300"))
+_result_cache = ResultCache(max_entries=TOOL_CACHE_SIZE, ttl_seconds=TOOL_CACHE_TTL)
+
+def cache_stats():
+    """Hit/miss counters of the tool result cache, for sizing it."""
+    return _result_cache.stats()
+
+def set_result_format(fmt: str):
+    """Switch the encoding of tool results (see result_format) and drop results cached in the old one."""
+    if fmt not in result_format.FORMATS:
+        raise ValueError(f"Unknown result format {fmt!r}; expected one of {result_format.FORMATS}")
+    result_format.RESULT_FORMAT = fmt
+    _result_cache.clear()
+
+def _cacheable(result: str) -> bool:
+    """Errors are never cached, so a transient failure isn't replayed."""
+    return not result.startswith("Error:")
+
+def get_pool():
+    """Return the process-wide connection pool, creating it on first use."""
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = ConnectionPool(DB_FILE, max_size=POOL_SIZE, initializer=migrate_schema)
+    return _pool
+
+def configure_pool(db_file=DB_FILE, max_size=POOL_SIZE):
+    """Replace the process-wide pool, e.g. to point the tools at another database file."""
+    global _pool, _vocabulary
+    with _pool_lock:
+        if _pool is not None:
+            _pool.close()
+        _pool = ConnectionPool(db_file, max_size=max_size, initializer=migrate_schema)
+        _vocabulary = None
+        _result_cache.clear()
+    return _pool
+
 def create_connection():
     """Create a database connection to the SQLite database."""
     conn = None
@@ -22,7 +85,7 @@ def create_connection():
     return conn
 
 def create_tables(conn):
-    """Create doctors and appointments tables."""
+    """Create doctors, appointments and doctor_schedule tables."""
     try:
         cursor = conn.cursor()
         # Doctor Table
@@ -50,46 +113,203 @@ def create_tables(conn):
                 FOREIGN KEY (doctor_id) REFERENCES doctors (id)
             );
         """)
+        # Visiting hours expanded per weekday, in minutes since midnight
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS doctor_schedule (
+                doctor_id INTEGER NOT NULL,
+                weekday INTEGER NOT NULL,
+                start_minute INTEGER NOT NULL,
+                end_minute INTEGER NOT NULL,
+                specialization_key TEXT,
+                location_key TEXT,
+                experience_years INTEGER,
+                PRIMARY KEY (doctor_id, weekday, start_minute)
+            ) WITHOUT ROWID;
+        """)
+        # Availability index: bitmap of the booked slots of each doctor on each date
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS doctor_day_bookings (
+                doctor_id INTEGER NOT NULL,
+                appointment_date TEXT NOT NULL,
+                booked_mask INTEGER NOT NULL DEFAULT 0,
+                PRIMARY KEY (doctor_id, appointment_date)
+            ) WITHOUT ROWID;
+        """)
         conn.commit()
     except sqlite3.Error as e:
         print(f"Error creating tables: {e}")
 
-def generate_and_populate_doctors(conn, count=1000):
-    """Populate the doctors table with generated data using Faker if it's empty."""
+def _column_names(conn, table):
+    """Return the set of column names of a table, including generated columns."""
+    return {row[1] for row in conn.execute(f"PRAGMA table_xinfo({table})")}
+
+def migrate_schema(conn):
+    """Bring an existing database up to the current schema. Safe to run repeatedly."""
+    create_tables(conn)
+    try:
+        # Canonical (trimmed, lower-cased) search keys. They are VIRTUAL generated
+        # columns, so they never drift from the source columns and need no backfill.
+        columns = _column_names(conn, "doctors")
+        if "specialization_key" not in columns:
+            conn.execute(
+                "ALTER TABLE doctors ADD COLUMN specialization_key TEXT "
+                "GENERATED ALWAYS AS (lower(trim(specialization))) VIRTUAL"
+            )
+        if "location_key" not in columns:
+            conn.execute(
+                "ALTER TABLE doctors ADD COLUMN location_key TEXT "
+                "GENERATED ALWAYS AS (lower(trim(location))) VIRTUAL"
+            )
+        # Top-5 doctor search reads straight off these indexes, already sorted by experience.
+        conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_doctors_search "
+            "ON doctors (specialization_key, location_key, experience_years DESC)"
+        )
+        conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_doctors_specialization "
+            "ON doctors (specialization_key, experience_years DESC)"
+        )
+        conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_doctors_location "
+            "ON doctors (location_key, experience_years DESC)"
+        )
+        conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_doctors_experience "
+            "ON doctors (experience_years DESC)"
+        )
+
+        # Slot-based bookings. Rows booked before the slot model have a NULL
+        # slot_minute and are ignored by the unique slot index.
+        columns = _column_names(conn, "appointments")
+        if "slot_minute" not in columns:
+            conn.execute("ALTER TABLE appointments ADD COLUMN slot_minute INTEGER")
+        if "idempotency_key" not in columns:
+            conn.execute("ALTER TABLE appointments ADD COLUMN idempotency_key TEXT")
+        conn.execute(
+            "CREATE UNIQUE INDEX IF NOT EXISTS idx_appointments_slot "
+            "ON appointments (doctor_id, appointment_date, slot_minute) "
+            "WHERE status = 'Booked' AND slot_minute IS NOT NULL"
+        )
+        conn.execute(
+            "CREATE UNIQUE INDEX IF NOT EXISTS idx_appointments_idempotency "
+            "ON appointments (idempotency_key) WHERE idempotency_key IS NOT NULL"
+        )
+        conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_appointments_patient "
+            "ON appointments (patient_name, appointment_date, appointment_time)"
+        )
+        # The doctor's search keys and experience are copied onto the schedule so the
+        # earliest-slot search can walk one (specialization, location, weekday) range
+        # in (start time, most experienced first) order straight off an index.
+        columns = _column_names(conn, "doctor_schedule")
+        if "specialization_key" not in columns:
+            conn.execute("ALTER TABLE doctor_schedule ADD COLUMN specialization_key TEXT")
+            conn.execute("ALTER TABLE doctor_schedule ADD COLUMN location_key TEXT")
+            conn.execute("ALTER TABLE doctor_schedule ADD COLUMN experience_years INTEGER")
+            conn.execute("""
+                UPDATE doctor_schedule SET
+                    specialization_key = (SELECT specialization_key FROM doctors WHERE id = doctor_id),
+                    location_key = (SELECT location_key FROM doctors WHERE id = doctor_id),
+                    experience_years = (SELECT experience_years FROM doctors WHERE id = doctor_id)
+            """)
+        conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_schedule_search "
+            "ON doctor_schedule (specialization_key, location_key, weekday, start_minute, experience_years DESC)"
+        )
+        conn.commit()
+        sync_doctor_schedule(conn)
+        if not conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'trigger' AND name = 'trg_appointments_booked'"
+        ).fetchone():
+            _create_booking_triggers(conn)
+            rebuild_day_bookings(conn)
+    except sqlite3.Error as e:
+        print(f"Error migrating schema: {e}")
+
+# Recomputes one doctor/date bitmap from its booked appointments (slots are unique, so SUM == OR)
+_RECOMPUTE_DAY_MASK = f"""
+    INSERT OR REPLACE INTO doctor_day_bookings (doctor_id, appointment_date, booked_mask)
+    SELECT {{row}}.doctor_id, {{row}}.appointment_date, COALESCE(SUM(1 << (slot_minute / {SLOT_MINUTES})), 0)
+    FROM appointments
+    WHERE doctor_id = {{row}}.doctor_id AND appointment_date = {{row}}.appointment_date
+      AND status = 'Booked' AND slot_minute IS NOT NULL;
+"""
+
+def _create_booking_triggers(conn):
+    """Keep doctor_day_bookings in step with every write to appointments."""
+    conn.executescript(f"""
+        CREATE TRIGGER IF NOT EXISTS trg_appointments_booked AFTER INSERT ON appointments
+        WHEN NEW.status = 'Booked' AND NEW.slot_minute IS NOT NULL
+        BEGIN
+            INSERT INTO doctor_day_bookings (doctor_id, appointment_date, booked_mask)
+            VALUES (NEW.doctor_id, NEW.appointment_date, 1 << (NEW.slot_minute / {SLOT_MINUTES}))
+            ON CONFLICT (doctor_id, appointment_date)
+            DO UPDATE SET booked_mask = booked_mask | excluded.booked_mask;
+        END;
+        CREATE TRIGGER IF NOT EXISTS trg_appointments_changed
+        AFTER UPDATE OF doctor_id, appointment_date, slot_minute, status ON appointments
+        BEGIN
+            {_RECOMPUTE_DAY_MASK.format(row="OLD")}
+            {_RECOMPUTE_DAY_MASK.format(row="NEW")}
+        END;
+        CREATE TRIGGER IF NOT EXISTS trg_appointments_deleted AFTER DELETE ON appointments
+        BEGIN
+            {_RECOMPUTE_DAY_MASK.format(row="OLD")}
+        END;
+    """)
+
+def rebuild_day_bookings(conn):
+    """Recompute every doctor/date bitmap from the appointments table."""
+    with conn:
+        conn.execute("DELETE FROM doctor_day_bookings")
+        conn.execute(f"""
+            INSERT INTO doctor_day_bookings (doctor_id, appointment_date, booked_mask)
+            SELECT doctor_id, appointment_date, SUM(1 << (slot_minute / {SLOT_MINUTES}))
+            FROM appointments
+            WHERE status = 'Booked' AND slot_minute IS NOT NULL
+            GROUP BY doctor_id, appointment_date
+        """)
+
+def sync_doctor_schedule(conn):
+    """Expand visiting_hours into doctor_schedule for doctors that have no rows yet.
+
+    Doctors are only ever appended, so only ids above the highest scheduled id are read.
+    """
+    last_id = conn.execute("SELECT COALESCE(MAX(doctor_id), 0) FROM doctor_schedule").fetchone()[0]
+    cursor = conn.execute(
+        "SELECT id, visiting_hours, specialization_key, location_key, experience_years FROM doctors WHERE id > ? ORDER BY id",
+        (last_id,),
+    )
+    while True:
+        batch = cursor.fetchmany(50_000)
+        if not batch:
+            break
+        rows = [
+            (doctor_id, weekday, start, end, specialization_key, location_key, experience_years)
+            for doctor_id, visiting_hours, specialization_key, location_key, experience_years in batch
+            for weekday, start, end in parse_visiting_hours(visiting_hours)
+        ]
+        conn.executemany(
+            "INSERT OR IGNORE INTO doctor_schedule"
+            " (doctor_id, weekday, start_minute, end_minute, specialization_key, location_key, experience_years)"
+            " VALUES (?, ?, ?, ?, ?, ?, ?)",
+            rows,
+        )
+    conn.commit()
+
+def generate_and_populate_doctors(conn, count=1000, seed=42):
+    """Populate the doctors table with generated data if it's empty."""
     cursor = conn.cursor()
     cursor.execute("SELECT COUNT(*) FROM doctors")
     if cursor.fetchone()[0] > 0:
         return
 
     print(f"Doctor database is empty. Generating {count} new doctor records...")
-    fake = Faker('en_IN')
-
-    specializations = ['Cardiologist', 'Neurologist', 'Dermatologist', 'Orthopedic Surgeon', 'General Physician', 'Pediatrician', 'Oncologist', 'Endocrinologist', 'Gastroenterologist']
-    locations = ['Mumbai', 'Delhi', 'Bangalore', 'Chennai', 'Kolkata', 'Hyderabad', 'Pune', 'Ahmedabad']
-    hospitals = ["City Hospital", "Apollo Clinic", "Fortis Health", "Manipal Center", "Max Healthcare", "Global Medical", "Sunrise Institute"]
-    days = ["Mon", "Tue", "Wed", "Thu", "Fri", "Sat"]
-
-    doctors_data = []
-    for _ in range(count):
-        spec = random.choice(specializations)
-        name = f"Dr. {fake.first_name()} {fake.last_name()}"
-        exp = random.randint(5, 25)
-        loc = random.choice(locations)
-        hosp = f"{random.choice(hospitals)}, {loc}"
-        fee = random.randint(8, 25) * 100
-        
-        start_hour = random.randint(9, 14)
-        end_hour = start_hour + random.randint(2, 4)
-        visiting_days = sorted(random.sample(days, k=random.randint(3, 5)))
-        hours = {",".join(visiting_days): f"{start_hour:02d}:00-{end_hour:02d}:00"}
-
-        doctors_data.append((name, spec, exp, loc, hosp, fee, json.dumps(hours)))
-
-    cursor.executemany("""
-        INSERT INTO doctors (name, specialization, experience_years, location, hospital_name, consultation_fee, visiting_hours)
-        VALUES (?, ?, ?, ?, ?, ?, ?)
-    """, doctors_data)
-    conn.commit()
+    insert_doctors(conn, count, seed=seed)
+    sync_doctor_schedule(conn)
+    global _vocabulary
+    _vocabulary = None
+    _result_cache.clear()
     print(f"Successfully populated database with {count} doctors.")
 
 
@@ -120,6 +340,122 @@ def _parse_date(date_text: str) -> str:
         return f"Error: Could not understand the date '{date_text}'. Please provide a clear date like 'tomorrow', 'next Thursday', or '2024-10-25'."
 # CHANGE END
 
+def _parse_time(time_text: str):
+    """
+    Parses a natural language time string (e.g. '10 AM', '15:00', '3:30pm')
+    and returns minutes since midnight.
+    Returns an error string on failure.
+    """
+    try:
+        parsed = parse(str(time_text).strip().lower().replace('.', ''))
+        return parsed.hour * 60 + parsed.minute
+    except (ValueError, TypeError, OverflowError):
+        return f"Error: Could not understand the time '{time_text}'. Please provide a clear time like '10 AM' or '15:30'."
+
+def _free_slots(conn, doctor_id: int, appointment_date: str):
+    """Start minutes of the doctor's unbooked slots on a YYYY-MM-DD date."""
+    day = datetime.strptime(appointment_date, '%Y-%m-%d')
+    intervals = conn.execute(
+        "SELECT start_minute, end_minute FROM doctor_schedule WHERE doctor_id = ? AND weekday = ?",
+        (doctor_id, day.weekday()),
+    ).fetchall()
+    booked = {row[0] for row in conn.execute(
+        "SELECT slot_minute FROM appointments WHERE doctor_id = ? AND appointment_date = ? "
+        "AND status = 'Booked' AND slot_minute IS NOT NULL",
+        (doctor_id, appointment_date),
+    )}
+    # Slots earlier today can no longer be booked
+    now = datetime.now()
+    earliest = now.hour * 60 + now.minute if day.date() == now.date() else -1
+    return [
+        minute
+        for start, end in intervals
+        for minute in slot_starts(start, end)
+        if minute not in booked and minute > earliest
+    ]
+
+def _slot_unavailable(conn, doctor_id: int, appointment_date: str, reason: str):
+    """Failure payload for a slot that can't be booked, listing the free alternatives."""
+    free = [format_minutes(m) for m in _free_slots(conn, doctor_id, appointment_date)]
+    suggestion = (
+        f" Available slots on {appointment_date}: {', '.join(free)}."
+        if free else f" The doctor has no free slots on {appointment_date}."
+    )
+    return encode_object({"status": "Failed", "message": reason + suggestion})
+
+def _canonical(text: str) -> str:
+    """Canonical form of a search term, matching the *_key generated columns."""
+    return text.strip().lower()
+
+def _search_vocabulary():
+    """Return (specialization keys, location keys) present in the doctors table."""
+    global _vocabulary
+    if _vocabulary is None:
+        with get_pool().connection() as conn:
+            specializations = [row[0] for row in conn.execute(
+                "SELECT DISTINCT specialization_key FROM doctors")]
+            locations = [row[0] for row in conn.execute(
+                "SELECT DISTINCT location_key FROM doctors WHERE location_key IS NOT NULL")]
+        _vocabulary = (specializations, locations)
+    return _vocabulary
+
+def _matching_keys(term: str, vocabulary: list) -> list:
+    """Resolve a user search term to the canonical keys it matches.
+
+    An exact match wins; otherwise every key containing the term is returned,
+    which keeps the old `LIKE '%term%'` behaviour without scanning the table.
+    """
+    key = _canonical(term)
+    if key in vocabulary:
+        return [key]
+    return sorted(k for k in vocabulary if key in k)
+
+def _resolve_search_keys(specialization: str, location: str):
+    """Resolve search terms to canonical key lists, as (specialization keys, location keys).
+
+    A list is None when that term is empty (no filter). Returns (None, None) together
+    with False when a term matches no known specialization/location.
+    """
+    specialization_keys, location_keys = _search_vocabulary()
+    spec_keys = loc_keys = None
+    if specialization:
+        search_term = 'General Physician' if 'physician' in specialization.lower() else specialization
+        spec_keys = _matching_keys(search_term, specialization_keys)
+        if not spec_keys:
+            return None, None, False
+    if location:
+        loc_keys = _matching_keys(location, location_keys)
+        if not loc_keys:
+            return None, None, False
+    return spec_keys, loc_keys, True
+
+def _doctor_filters(specialization: str, location: str, prefix: str = ""):
+    """SQL conditions restricting doctors to the search terms, as (clause, params).
+
+    Returns (None, None) when a term matches no known specialization/location.
+    """
+    spec_keys, loc_keys, matched = _resolve_search_keys(specialization, location)
+    if not matched:
+        return None, None
+    clause = ""
+    params = []
+    if spec_keys is not None:
+        clause += f" AND {prefix}specialization_key IN ({', '.join('?' * len(spec_keys))})"
+        params.extend(spec_keys)
+    if loc_keys is not None:
+        clause += f" AND {prefix}location_key IN ({', '.join('?' * len(loc_keys))})"
+        params.extend(loc_keys)
+    return clause, params
+
+def _build_doctor_search(specialization: str, location: str):
+    """Build the indexed top-5 doctor search. Returns (None, None) when nothing can match."""
+    clause, params = _doctor_filters(specialization, location)
+    if clause is None:
+        return None, None
+    query = "SELECT id, name, specialization, experience_years, hospital_name, consultation_fee, visiting_hours FROM doctors WHERE 1=1"
+    query += clause + " ORDER BY experience_years DESC LIMIT 5"
+    return query, params
+
 def _find_doctors_in_db(specialization: str, location: str):
     """Searches for doctors based on medical specialization and location. For example, 'find a physician in Mumbai'. Returns a list of the top 5 matching doctors with their details.
 
@@ -127,27 +463,28 @@ def _find_doctors_in_db(specialization: str, location: str):
         specialization: The medical field of the doctor (e.g., 'Cardiologist', 'Physician').
         location: The city where the user is looking for a doctor (e.g., 'Mumbai', 'Delhi').
     """
-    conn = create_connection()
-    if not conn:
+    try:
+        spec_keys, loc_keys, matched = _resolve_search_keys(specialization, location)
+    except sqlite3.Error as e:
+        print(e)
+        return "Error: Could not connect to the database."
+    # Keyed on the resolved canonical keys, so 'Cardiologist'/' cardiologist ' share an entry
+    key = ("find_doctors", matched, spec_keys and tuple(spec_keys), loc_keys and tuple(loc_keys))
+    return _result_cache.get_or_compute(
+        key, lambda: _search_doctors(specialization, location), _cacheable
+    )
+
+def _search_doctors(specialization: str, location: str):
+    """Uncached body of find_doctors."""
+    try:
+        query, params = _build_doctor_search(specialization, location)
+        rows = []
+        if query is not None:
+            with get_pool().connection() as conn:
+                rows = conn.execute(query, params).fetchall()
+    except sqlite3.Error as e:
+        print(e)
         return "Error: Could not connect to the database."
-    
-    cursor = conn.cursor()
-    query = "SELECT id, name, specialization, experience_years, hospital_name, consultation_fee, visiting_hours FROM doctors WHERE 1=1"
-    params = []
-    
-    if specialization:
-        search_term = 'General Physician' if 'physician' in specialization.lower() else specialization
-        query += " AND specialization LIKE ?"
-        params.append(f"%{search_term}%")
-    if location:
-        query += " AND location LIKE ?"
-        params.append(f"%{location}%")
-    
-    query += " ORDER BY experience_years DESC LIMIT 5"
-        
-    cursor.execute(query, params)
-    rows = cursor.fetchall()
-    conn.close()
     
     if not rows:
         return "No doctors found matching your criteria. Please try a different specialization or location."
@@ -159,58 +496,104 @@ def _find_doctors_in_db(specialization: str, location: str):
             "experience_years": row[3], "hospital_name": row[4],
             "consultation_fee": row[5], "visiting_hours": json.loads(row[6])
         })
-    return json.dumps(results, indent=2)
+    return encode_records(results)
 
-def _book_appointment_in_db(doctor_id: int, patient_name: str, date: str, time: str):
-    """Books an appointment with a specific doctor for a user after parsing the date.
+def _booking_payload(row, message):
+    """Success payload for an appointments row (id, doctor name, patient, date, time)."""
+    return encode_object({
+        "status": "Success",
+        "message": message,
+        "appointment_id": row[0],
+        "doctor_name": row[1],
+        "patient_name": row[2],
+        "date": row[3],
+        "time": row[4]
+    })
+
+_BOOKING_BY_KEY = """
+    SELECT a.id, d.name, a.patient_name, a.appointment_date, a.appointment_time
+    FROM appointments a JOIN doctors d ON a.doctor_id = d.id
+    WHERE a.idempotency_key = ?
+"""
+
+_BOOKING_BY_SLOT = """
+    SELECT a.id, d.name, a.patient_name, a.appointment_date, a.appointment_time
+    FROM appointments a JOIN doctors d ON a.doctor_id = d.id
+    WHERE a.doctor_id = ? AND a.appointment_date = ? AND a.slot_minute = ? AND a.status = 'Booked'
+"""
+
+def _booking_by_key(conn, key):
+    """The appointments row booked under an idempotency key, or None."""
+    return conn.execute(_BOOKING_BY_KEY, (key,)).fetchone() if key else None
+
+def _book_appointment_in_db(doctor_id: int, patient_name: str, date: str, time: str, idempotency_key: str = ""):
+    """Books an appointment with a specific doctor for a user after parsing the date and time. The time must fall on one of the doctor's free slots within their visiting hours; if it doesn't, the available slots for that date are returned.
 
     Args:
         doctor_id: The unique ID of the doctor, which is found using the find_doctors tool.
         patient_name: The full name of the patient for whom the appointment is booked.
         date: The desired date for the appointment in 'YYYY-MM-DD' or natural language format (e.g., 'today').
         time: The desired time for the appointment (e.g., '10 AM', '15:00').
+        idempotency_key: Optional unique key for this booking request. Retrying with the same key returns the original booking instead of booking twice.
     """
-    conn = create_connection()
-    if not conn:
-        return "Error: Could not connect to the database."
-
+    key = idempotency_key or None
     try:
-        cursor = conn.cursor()
-        
-        cursor.execute("SELECT name, visiting_hours FROM doctors WHERE id = ?", (doctor_id,))
-        doctor = cursor.fetchone()
-        if not doctor:
-            conn.close()
-            return f"Error: No doctor found with ID {doctor_id}."
-        
-        doctor_name = doctor[0]
-        
-        parsed_date = _parse_date(date)
-       
-        if parsed_date.startswith("Error:"):
-             conn.close()
-             return json.dumps({"status": "Failed", "message": parsed_date})
-        
+        with get_pool().connection() as conn:
+            # Take the write lock up front so the checks and the insert are one atomic step
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                existing = _booking_by_key(conn, key)
+                if existing:
+                    return _booking_payload(existing, "Appointment already booked.")
+
+                doctor = conn.execute(
+                    "SELECT name FROM doctors WHERE id = ?", (doctor_id,)
+                ).fetchone()
+                if not doctor:
+                    return f"Error: No doctor found with ID {doctor_id}."
+
+                parsed_date = _parse_date(date)
+                if parsed_date.startswith("Error:"):
+                    return encode_object({"status": "Failed", "message": parsed_date})
+
+                slot_minute = _parse_time(time)
+                if isinstance(slot_minute, str):
+                    return encode_object({"status": "Failed", "message": slot_minute})
+
+                if slot_minute not in _free_slots(conn, doctor_id, parsed_date):
+                    taken = conn.execute(_BOOKING_BY_SLOT, (doctor_id, parsed_date, slot_minute)).fetchone()
+                    if taken and taken[2] == patient_name:
+                        # A retried call for a slot this patient already holds
+                        return _booking_payload(taken, "Appointment already booked.")
+                    reason = (
+                        f"{format_minutes(slot_minute)} on {parsed_date} is already booked."
+                        if taken else
+                        f"{format_minutes(slot_minute)} on {parsed_date} ({WEEKDAYS[datetime.strptime(parsed_date, '%Y-%m-%d').weekday()]}) "
+                        f"is not a bookable {SLOT_MINUTES}-minute slot within the doctor's visiting hours."
+                    )
+                    return _slot_unavailable(conn, doctor_id, parsed_date, reason)
+
+                cursor = conn.execute(
+                    "INSERT INTO appointments (doctor_id, patient_name, appointment_date, appointment_time, slot_minute, idempotency_key) "
+                    "VALUES (?, ?, ?, ?, ?, ?)",
+                    (doctor_id, patient_name, parsed_date, format_minutes(slot_minute), slot_minute, key)
+                )
+                conn.commit()
+                _result_cache.invalidate(("appointments", patient_name))
+            except sqlite3.IntegrityError:
+                # The unique slot/key indexes are the final guard against double booking
+                conn.rollback()
+                # A collision on the key means this request was already booked: that is a success
+                existing = _booking_by_key(conn, key)
+                if existing:
+                    return _booking_payload(existing, "Appointment already booked.")
+                return encode_object({"status": "Failed", "message": "That slot was just booked by someone else. Please choose another time."})
 
-        cursor.execute(
-            "INSERT INTO appointments (doctor_id, patient_name, appointment_date, appointment_time) VALUES (?, ?, ?, ?)",
-            (doctor_id, patient_name, parsed_date, time)
+        return _booking_payload(
+            (cursor.lastrowid, doctor[0], patient_name, parsed_date, format_minutes(slot_minute)),
+            "Appointment booked successfully!",
         )
-        conn.commit()
-        appointment_id = cursor.lastrowid
-        conn.close()
-        
-        return json.dumps({
-            "status": "Success",
-            "message": "Appointment booked successfully!",
-            "appointment_id": appointment_id,
-            "doctor_name": doctor_name,
-            "patient_name": patient_name,
-            "date": parsed_date,
-            "time": time
-        })
     except sqlite3.Error as e:
-        conn.close()
         return f"Error: Could not book appointment. Reason: {e}"
 
 def _get_appointments_for_user_db(patient_name: str):
@@ -219,11 +602,13 @@ def _get_appointments_for_user_db(patient_name: str):
     Args:
         patient_name: The full name of the patient to retrieve appointments for.
     """
-    conn = create_connection()
-    if not conn:
-        return "Error: Could not connect to the database."
+    # Invalidated by _book_appointment_in_db whenever this patient books
+    return _result_cache.get_or_compute(
+        ("appointments", patient_name), lambda: _query_appointments(patient_name), _cacheable
+    )
 
-    cursor = conn.cursor()
+def _query_appointments(patient_name: str):
+    """Uncached body of view_my_appointments."""
     query = """
         SELECT d.name, d.hospital_name, a.appointment_date, a.appointment_time, d.consultation_fee
         FROM appointments a
@@ -231,9 +616,12 @@ def _get_appointments_for_user_db(patient_name: str):
         WHERE a.patient_name = ?
         ORDER BY a.appointment_date, a.appointment_time
     """
-    cursor.execute(query, (patient_name,))
-    rows = cursor.fetchall()
-    conn.close()
+    try:
+        with get_pool().connection() as conn:
+            rows = conn.execute(query, (patient_name,)).fetchall()
+    except sqlite3.Error as e:
+        print(e)
+        return "Error: Could not connect to the database."
 
     if not rows:
         return f"No appointments found for {patient_name}."
@@ -248,14 +636,126 @@ def _get_appointments_for_user_db(patient_name: str):
             "consultation_fee": row[4]
         })
     
-    return json.dumps(appointments, indent=2)
+    return encode_records(appointments)
+
+# One (specialization, location, weekday) range of visiting hours in start order, with that day's bitmap
+_EARLIEST_SLOTS_QUERY = """
+    SELECT s.start_minute, -COALESCE(s.experience_years, 0), s.doctor_id, s.end_minute, COALESCE(b.booked_mask, 0)
+    FROM doctor_schedule s
+    LEFT JOIN doctor_day_bookings b ON b.doctor_id = s.doctor_id AND b.appointment_date = ?
+    WHERE s.specialization_key = ? AND s.location_key = ? AND s.weekday = ?
+    ORDER BY s.start_minute, s.experience_years DESC, s.doctor_id
+"""
+
+# How far ahead find_earliest_available looks for a free slot
+EARLIEST_SEARCH_DAYS = 30
+
+def _earliest_slots_on_day(conn, day, key_pairs, count, not_before):
+    """The `count` earliest free (minute, -experience, doctor_id) slots on one day.
+
+    Visiting-hour intervals of all matching doctors are merged in (start, most
+    experienced first) order. No slot of an interval can rank before the interval's
+    own (start, -experience), so the scan stops at the first interval that ranks
+    after the worst slot kept and typically reads a handful of rows regardless of
+    table size.
+    """
+    streams = [
+        conn.execute(_EARLIEST_SLOTS_QUERY, (day.isoformat(), spec, loc, day.weekday()))
+        for spec, loc in key_pairs
+    ]
+    best = []  # max-heap of the best `count` slots, stored negated
+    for start, rank, doctor_id, end, booked in heapq.merge(*streams, key=lambda row: row[:3]):
+        if len(best) == count and (start, rank, doctor_id) > tuple(-v for v in best[0]):
+            break
+        free = slot_mask(start, end) & ~booked & ~not_before
+        for minute in mask_minutes(free, count):
+            slot = (minute, rank, doctor_id)
+            if len(best) < count:
+                heapq.heappush(best, tuple(-v for v in slot))
+            elif slot < tuple(-v for v in best[0]):
+                heapq.heapreplace(best, tuple(-v for v in slot))
+    return sorted(tuple(-v for v in slot) for slot in best)
+
+def _earliest_slots(conn, spec_keys, loc_keys, count, days=EARLIEST_SEARCH_DAYS):
+    """Scan day by day from today and return the `count` earliest free slots."""
+    specializations, locations = _search_vocabulary()
+    key_pairs = [
+        (spec, loc)
+        for spec in (specializations if spec_keys is None else spec_keys)
+        for loc in (locations if loc_keys is None else loc_keys)
+    ]
+    now = datetime.now()
+    found = []
+    for offset in range(days):
+        day = now.date() + timedelta(days=offset)
+        # Slots starting at or before the current time are gone for today
+        not_before = slot_bit(now.hour * 60 + now.minute) * 2 - 1 if offset == 0 else 0
+        for minute, _, doctor_id in _earliest_slots_on_day(conn, day, key_pairs, count - len(found), not_before):
+            name, specialization, experience, hospital, fee = conn.execute(
+                "SELECT name, specialization, experience_years, hospital_name, consultation_fee FROM doctors WHERE id = ?",
+                (doctor_id,),
+            ).fetchone()
+            found.append({
+                "doctor_id": doctor_id, "name": name, "specialization": specialization,
+                "experience_years": experience, "hospital_name": hospital,
+                "consultation_fee": fee, "date": day.isoformat(), "time": format_minutes(minute)
+            })
+        if len(found) >= count:
+            break
+    return found
+
+def _find_earliest_slots_in_db(specialization: str, location: str, count: int = 5):
+    """Finds the earliest available appointment slots across all doctors of a specialization in a city. For example, 'find me the soonest cardiologist in Pune'. Returns up to `count` free slots ordered by date and time, each with the doctor's details, ready to be booked with book_appointment.
+
+    Args:
+        specialization: The medical field of the doctor (e.g., 'Cardiologist', 'Physician').
+        location: The city where the user is looking for a doctor (e.g., 'Mumbai', 'Delhi').
+        count: How many of the earliest free slots to return (default 5).
+    """
+    count = max(1, min(int(count or 5), 20))
+    try:
+        spec_keys, loc_keys, matched = _resolve_search_keys(specialization, location)
+        if not matched:
+            return "No doctors found matching your criteria. Please try a different specialization or location."
+        with get_pool().connection() as conn:
+            slots = _earliest_slots(conn, spec_keys, loc_keys, count)
+    except sqlite3.Error as e:
+        print(e)
+        return "Error: Could not connect to the database."
+
+    if not slots:
+        return f"No free slots found in the next {EARLIEST_SEARCH_DAYS} days for your criteria. Please try a different specialization or location."
+    return encode_records(slots)
+
+# --- Async variants for the ADK runners ---
+# Tool calls made from Runner.run_async would otherwise block the event loop on
+# SQLite I/O. The async variants run the same functions on a dedicated executor,
+# sized like the connection pool so threads never queue for a connection.
+_executor = ThreadPoolExecutor(max_workers=POOL_SIZE, thread_name_prefix="appointment-db")
+
+def _offloaded(func):
+    """Wrap a blocking tool function in an async variant that runs on the DB executor.
+
+    The wrapper keeps the function's name, signature and docstring, so the tool
+    declaration the model sees is unchanged.
+    """
+    @functools.wraps(func)
+    async def wrapper(*args, **kwargs):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(_executor, functools.partial(func, *args, **kwargs))
+    return wrapper
+
+_find_doctors_in_db_async = _offloaded(_find_doctors_in_db)
+_book_appointment_in_db_async = _offloaded(_book_appointment_in_db)
+_get_appointments_for_user_db_async = _offloaded(_get_appointments_for_user_db)
+_find_earliest_slots_in_db_async = _offloaded(_find_earliest_slots_in_db)
 
 def initialize_database():
     """Initializes the database, creating tables and populating if needed."""
     print("Initializing doctor database...")
     conn = create_connection()
     if conn is not None:
-        create_tables(conn)
+        migrate_schema(conn)
         generate_and_populate_doctors(conn, 1000)
         conn.close()
         print("Doctor database ready.")
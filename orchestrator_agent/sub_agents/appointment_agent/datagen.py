@@ -0,0 +1,241 @@
+# my-health-agent/orchestrator_agent/sub_agents/appointment_agent/datagen.py
+"""Seeded, deterministic synthetic data for the doctors/appointments tables.
+
+Rows are built in vectorized numpy batches from small precomputed pools (names,
+visiting-hour strings) and streamed into SQLite in large transactions, so millions
+of doctors and tens of millions of appointments can be generated for load tests.
+
+    python -m orchestrator_agent.sub_agents.appointment_agent.datagen \\
+        --db /tmp/doctors.db --doctors 1000000 --appointments 10000000 --seed 42
+"""
+import argparse
+import json
+import sqlite3
+import time
+from datetime import date, timedelta
+
+import numpy as np
+from faker import Faker
+
+from .schedule import SLOT_MINUTES
+
+SPECIALIZATIONS = ['Cardiologist', 'Neurologist', 'Dermatologist', 'Orthopedic Surgeon', 'General Physician', 'Pediatrician', 'Oncologist', 'Endocrinologist', 'Gastroenterologist']
+LOCATIONS = ['Mumbai', 'Delhi', 'Bangalore', 'Chennai', 'Kolkata', 'Hyderabad', 'Pune', 'Ahmedabad']
+HOSPITALS = ["City Hospital", "Apollo Clinic", "Fortis Health", "Manipal Center", "Max Healthcare", "Global Medical", "Sunrise Institute"]
+DAYS = ["Mon", "Tue", "Wed", "Thu", "Fri", "Sat"]
+
+# Shape of the generated visiting hours, as in the original generator
+START_HOURS = range(9, 15)          # 09:00 .. 14:00
+DURATIONS = range(2, 5)             # 2 .. 4 hours
+
+BATCH_SIZE = 100_000
+
+
+def build_name_pools(seed, size=400):
+    """Precompute unique first/last names once instead of calling Faker per row."""
+    fake = Faker('en_IN')
+    fake.seed_instance(seed)
+    first, last = set(), set()
+    # Faker's pools are finite, so stop after a bounded number of attempts
+    for _ in range(size * 20):
+        if len(first) >= size and len(last) >= size:
+            break
+        first.add(fake.first_name())
+        last.add(fake.last_name())
+    return sorted(first)[:size], sorted(last)[:size]
+
+
+def _day_masks(rng, n):
+    """Random sets of 3-5 visiting days per row, as 6-bit masks (bit 0 = Mon)."""
+    order = np.argsort(rng.random((n, len(DAYS))), axis=1)
+    counts = rng.integers(3, 6, size=n)
+    chosen = np.arange(len(DAYS))[None, :] < counts[:, None]
+    bits = np.where(chosen, 1 << order, 0)
+    return bits.sum(axis=1)
+
+
+def _visiting_hours_table():
+    """Pre-rendered visiting_hours JSON for every (day mask, start hour, duration)."""
+    table = {}
+    for mask in range(1 << len(DAYS)):
+        # Keep the original generator's alphabetical day ordering
+        days = ",".join(sorted(d for i, d in enumerate(DAYS) if mask >> i & 1))
+        for start in START_HOURS:
+            for duration in DURATIONS:
+                table[mask, start, duration] = json.dumps({days: f"{start:02d}:00-{start + duration:02d}:00"})
+    return table
+
+
+def doctor_batches(count, seed=42, batch_size=BATCH_SIZE):
+    """Yield (rows, schedule) batches; schedule holds each doctor's day mask/start/duration."""
+    rng = np.random.default_rng(seed)
+    first_names, last_names = build_name_pools(seed)
+    names = np.array([f"Dr. {f} {l}" for f in first_names for l in last_names], dtype=object)
+    specializations = np.array(SPECIALIZATIONS, dtype=object)
+    locations = np.array(LOCATIONS, dtype=object)
+    hospitals = np.array(
+        [f"{h}, {loc}" for loc in LOCATIONS for h in HOSPITALS], dtype=object
+    ).reshape(len(LOCATIONS), len(HOSPITALS))
+    hours_table = _visiting_hours_table()
+
+    for offset in range(0, count, batch_size):
+        n = min(batch_size, count - offset)
+        name = names[rng.integers(0, len(names), size=n)]
+        spec = rng.integers(0, len(specializations), size=n)
+        exp = rng.integers(5, 26, size=n)
+        loc = rng.integers(0, len(locations), size=n)
+        hosp = hospitals[loc, rng.integers(0, len(HOSPITALS), size=n)]
+        fee = rng.integers(8, 26, size=n) * 100.0
+        start = rng.integers(START_HOURS.start, START_HOURS.stop, size=n)
+        duration = rng.integers(DURATIONS.start, DURATIONS.stop, size=n)
+        masks = _day_masks(rng, n)
+        hours = [hours_table[key] for key in zip(masks.tolist(), start.tolist(), duration.tolist())]
+
+        rows = list(zip(
+            name.tolist(), specializations[spec].tolist(), exp.tolist(), locations[loc].tolist(),
+            hosp.tolist(), fee.tolist(), hours,
+        ))
+        yield rows, (masks, start, duration)
+
+
+def appointment_batches(schedules, first_doctor_id=1, seed=42,
+                        start_date=None, days=90, patients=250_000, batch_size=BATCH_SIZE):
+    """Endlessly yield appointment rows that fall on each doctor's visiting days and hours.
+
+    `schedules` is the (masks, start hours, durations) arrays of the doctors whose
+    ids run consecutively from `first_doctor_id`. Rows may collide on a slot; the
+    caller drops those with INSERT OR IGNORE.
+    """
+    rng = np.random.default_rng(seed + 1)
+    first_names, last_names = build_name_pools(seed)
+    patient_names = np.array(
+        [f"{f} {l}" for f in first_names for l in last_names][:patients], dtype=object
+    )
+    masks, starts, durations = schedules
+    start_date = start_date or date.today() - timedelta(days=days // 3)
+    dates = np.array([(start_date + timedelta(days=i)).isoformat() for i in range(days)], dtype=object)
+    weekdays = np.array([(start_date + timedelta(days=i)).weekday() for i in range(days)])
+    times = np.array([f"{m // 60:02d}:{m % 60:02d}" for m in range(0, 24 * 60, SLOT_MINUTES)], dtype=object)
+    slots_per_hour = 60 // SLOT_MINUTES
+
+    while True:
+        # Oversample, then keep the draws that land on one of the doctor's visiting days
+        doctor = rng.integers(0, len(masks), size=batch_size * 2)
+        day = rng.integers(0, days, size=batch_size * 2)
+        keep = (masks[doctor] >> weekdays[day]) & 1 == 1
+        doctor, day = doctor[keep][:batch_size], day[keep][:batch_size]
+        n = len(doctor)
+        slot = starts[doctor] * slots_per_hour + (
+            rng.random(n) * durations[doctor] * slots_per_hour
+        ).astype(np.int64)
+        patient = patient_names[rng.integers(0, len(patient_names), size=n)]
+
+        yield list(zip(
+            (doctor + first_doctor_id).tolist(), patient.tolist(),
+            dates[day].tolist(), times[slot].tolist(), (slot * SLOT_MINUTES).tolist(),
+        ))
+
+
+def insert_doctors(conn, count, seed=42, batch_size=BATCH_SIZE):
+    """Stream `count` generated doctors into the table. Returns their (first id, schedules)."""
+    first_id = (conn.execute("SELECT COALESCE(MAX(id), 0) FROM doctors").fetchone()[0]) + 1
+    schedules = []
+    for rows, schedule in doctor_batches(count, seed=seed, batch_size=batch_size):
+        with conn:
+            conn.executemany("""
+                INSERT INTO doctors (name, specialization, experience_years, location, hospital_name, consultation_fee, visiting_hours)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+            """, rows)
+        schedules.append(schedule)
+    if not schedules:
+        return first_id, (np.array([], dtype=np.int64),) * 3
+    return first_id, tuple(np.concatenate(parts) for parts in zip(*schedules))
+
+
+def insert_appointments(conn, count, schedules, first_doctor_id=1, seed=42, batch_size=BATCH_SIZE, **kwargs):
+    """Stream `count` generated appointments for the given doctors into the table.
+
+    Slot collisions are skipped by the unique slot index, so batches are drawn
+    until `count` rows have actually been inserted.
+    """
+    inserted = 0
+    for rows in appointment_batches(schedules, first_doctor_id, seed=seed, batch_size=batch_size, **kwargs):
+        attempted = rows[:count - inserted]
+        before = conn.total_changes
+        with conn:
+            conn.executemany(
+                "INSERT OR IGNORE INTO appointments (doctor_id, patient_name, appointment_date, appointment_time, slot_minute)"
+                " VALUES (?, ?, ?, ?, ?)",
+                attempted,
+            )
+        added = conn.total_changes - before
+        inserted += added
+        if inserted >= count:
+            return
+        # A whole batch without a single free slot means the slot space is exhausted
+        if added == 0 and len(attempted) == len(rows):
+            raise ValueError(f"Only {inserted} free slots could be filled; widen --days or add doctors.")
+
+
+def _drop_secondary_indexes(conn):
+    """Drop non-unique indexes and triggers so bulk inserts don't maintain them row by row.
+
+    migrate_schema() recreates both afterwards (and rebuilds the availability bitmaps).
+    """
+    names = conn.execute(
+        "SELECT type, name FROM sqlite_master WHERE sql IS NOT NULL"
+        " AND (type = 'trigger' OR (type = 'index' AND sql NOT LIKE 'CREATE UNIQUE%'))"
+        " AND tbl_name IN ('doctors', 'appointments')"
+    ).fetchall()
+    for kind, name in names:
+        conn.execute(f"DROP {kind.upper()} {name}")
+
+
+def generate_dataset(db_file, doctors, appointments, seed=42, batch_size=BATCH_SIZE, **kwargs):
+    """Create (or extend) a database with generated doctors and appointments."""
+    from .database import migrate_schema
+
+    conn = sqlite3.connect(db_file)
+    try:
+        # Durability doesn't matter for a throwaway load-test database
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=OFF")
+        conn.execute("PRAGMA cache_size=-262144")
+        migrate_schema(conn)
+        _drop_secondary_indexes(conn)
+        first_id, schedules = insert_doctors(conn, doctors, seed=seed, batch_size=batch_size)
+        if appointments and doctors:
+            insert_appointments(conn, appointments, schedules, first_id, seed=seed, batch_size=batch_size, **kwargs)
+        migrate_schema(conn)
+        conn.execute("ANALYZE")
+        conn.commit()
+    finally:
+        conn.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate a synthetic doctors/appointments database.")
+    parser.add_argument("--db", required=True, help="SQLite file to create or extend")
+    parser.add_argument("--doctors", type=int, default=1000)
+    parser.add_argument("--appointments", type=int, default=0)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--start-date", type=date.fromisoformat, default=None,
+                        help="First day of the appointment window (YYYY-MM-DD); defaults to 30 days ago")
+    parser.add_argument("--days", type=int, default=90, help="Width of the appointment date window")
+    parser.add_argument("--patients", type=int, default=250_000, help="Number of distinct patient names")
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    generate_dataset(
+        args.db, args.doctors, args.appointments, seed=args.seed, batch_size=args.batch_size,
+        start_date=args.start_date, days=args.days, patients=args.patients,
+    )
+    elapsed = time.perf_counter() - started
+    total = args.doctors + args.appointments
+    print(f"Generated {args.doctors} doctors and {args.appointments} appointments in {elapsed:.1f}s "
+          f"({total / max(elapsed, 1e-9):,.0f} rows/s) -> {args.db}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+# my-health-agent/orchestrator_agent/sub_agents/appointment_agent/result_cache.py
+import threading
+import time
+from collections import OrderedDict
+
+
+class ResultCache:
+    """A thread-safe, in-process LRU cache with per-entry TTL for serialized tool results.
+
+    `get_or_compute` is read-through. Invalidating a key while its value is being
+    computed stops that (now stale) value from being stored.
+    """
+
+    def __init__(self, max_entries=1024, ttl_seconds=300.0):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries = OrderedDict()   # key -> (expires_at, value)
+        self._pending = {}              # key -> tokens of computations still allowed to store
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    def get_or_compute(self, key, compute, cacheable=lambda value: True):
+        """Return the cached value for `key`, or compute, store and return it."""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if entry[0] > now:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return entry[1]
+                del self._entries[key]
+                self.expirations += 1
+            self.misses += 1
+            token = object()
+            self._pending.setdefault(key, set()).add(token)
+
+        try:
+            value = compute()
+        except BaseException:
+            with self._lock:
+                self._discard_pending(key, token)
+            raise
+
+        with self._lock:
+            fresh = token in self._pending.get(key, ())
+            self._discard_pending(key, token)
+            if fresh and cacheable(value):
+                self._entries[key] = (time.monotonic() + self.ttl_seconds, value)
+                self._entries.move_to_end(key)
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+                    self.evictions += 1
+        return value
+
+    def _discard_pending(self, key, token):
+        tokens = self._pending.get(key)
+        if tokens is not None:
+            tokens.discard(token)
+            if not tokens:
+                del self._pending[key]
+
+    def invalidate(self, key):
+        """Drop `key` and make any in-flight computation of it uncacheable."""
+        with self._lock:
+            self._pending.pop(key, None)
+            if self._entries.pop(key, None) is not None:
+                self.invalidations += 1
+
+    def clear(self):
+        """Drop every entry (counters are kept)."""
+        with self._lock:
+            self._pending.clear()
+            self.invalidations += len(self._entries)
+            self._entries.clear()
+
+    def stats(self):
+        """Hit/miss counters and current size, for sizing the cache."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl_seconds,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": self.hits / lookups if lookups else 0.0,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "invalidations": self.invalidations,
+            }
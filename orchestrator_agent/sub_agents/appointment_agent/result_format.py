@@ -0,0 +1,66 @@
+# my-health-agent/orchestrator_agent/sub_agents/appointment_agent/result_format.py
+"""Encodings for tool results that are fed back to the model.
+
+Every byte of a tool result becomes input tokens on the next model call, so the
+default encoding is a minified header + rows table:
+
+    pretty   json.dumps(records, indent=2), nested values kept (the original output)
+    compact  minified list of objects, nested values pre-rendered as strings
+    table    {"columns": [...], "rows": [[...], ...]}, minified, nested values pre-rendered
+"""
+import json
+import os
+
+FORMATS = ("pretty", "compact", "table")
+RESULT_FORMAT = os.getenv("AROGYA_TOOL_RESULT_FORMAT", "table")
+
+_SEPARATORS = (",", ":")
+
+
+def render_value(value):
+    """Flatten a nested value, e.g. {"Mon,Wed": "09:00-12:00"} -> "Mon,Wed 09:00-12:00"."""
+    if isinstance(value, dict):
+        return "; ".join(f"{key} {render_value(item)}" for key, item in value.items())
+    if isinstance(value, list):
+        return ", ".join(str(render_value(item)) for item in value)
+    if isinstance(value, float) and value.is_integer():
+        return int(value)
+    return value
+
+
+def encode_records(records: list, fmt: str = None) -> str:
+    """Serialize a list of flat-ish dicts that share the same keys."""
+    fmt = fmt or RESULT_FORMAT
+    if fmt == "pretty":
+        return json.dumps(records, indent=2)
+    if fmt == "compact":
+        return json.dumps(
+            [{key: render_value(value) for key, value in record.items()} for record in records],
+            separators=_SEPARATORS, ensure_ascii=False,
+        )
+    if fmt == "table":
+        columns = list(records[0]) if records else []
+        return json.dumps(
+            {"columns": columns, "rows": [[render_value(record[c]) for c in columns] for record in records]},
+            separators=_SEPARATORS, ensure_ascii=False,
+        )
+    raise ValueError(f"Unknown result format {fmt!r}; expected one of {FORMATS}")
+
+
+def encode_object(payload: dict, fmt: str = None) -> str:
+    """Serialize a single result object (e.g. a booking confirmation)."""
+    fmt = fmt or RESULT_FORMAT
+    if fmt == "pretty":
+        return json.dumps(payload)
+    return json.dumps(
+        {key: render_value(value) for key, value in payload.items()},
+        separators=_SEPARATORS, ensure_ascii=False,
+    )
+
+
+def decode_records(text: str) -> list:
+    """Inverse of encode_records (nested values stay pre-rendered), for scripts that inspect results."""
+    data = json.loads(text)
+    if isinstance(data, dict):
+        return [dict(zip(data["columns"], row)) for row in data["rows"]]
+    return data
@@ -0,0 +1,77 @@
+# my-health-agent/orchestrator_agent/sub_agents/appointment_agent/schedule.py
+"""Slot model shared by the booking tools and the data generator.
+
+Visiting hours are stored per doctor and weekday as [start_minute, end_minute)
+intervals (minutes since midnight). Appointments start on a fixed SLOT_MINUTES grid
+inside those intervals.
+"""
+import json
+
+SLOT_MINUTES = 30
+SLOTS_PER_DAY = 24 * 60 // SLOT_MINUTES
+WEEKDAYS = ["Mon", "Tue", "Wed", "Thu", "Fri", "Sat", "Sun"]
+
+
+def to_minutes(hhmm: str) -> int:
+    """'09:30' -> 570"""
+    hours, minutes = hhmm.strip().split(":")
+    return int(hours) * 60 + int(minutes)
+
+
+def format_minutes(minute: int) -> str:
+    """570 -> '09:30'"""
+    return f"{minute // 60:02d}:{minute % 60:02d}"
+
+
+def parse_visiting_hours(visiting_hours: str):
+    """Expand the doctors.visiting_hours JSON into (weekday, start_minute, end_minute) rows.
+
+    e.g. '{"Fri,Mon": "12:00-14:00"}' -> [(4, 720, 840), (0, 720, 840)]
+    Unknown day names and malformed entries are skipped.
+    """
+    try:
+        ranges = json.loads(visiting_hours or "{}")
+    except ValueError:
+        return []
+    rows = []
+    for days, hours in ranges.items():
+        try:
+            start, end = (to_minutes(part) for part in hours.split("-"))
+        except ValueError:
+            continue
+        for day in days.split(","):
+            day = day.strip()[:3].title()
+            if day in WEEKDAYS and start < end:
+                rows.append((WEEKDAYS.index(day), start, end))
+    return rows
+
+
+def slot_starts(start_minute: int, end_minute: int):
+    """Start minutes of the bookable slots in [start_minute, end_minute)."""
+    first = -(-start_minute // SLOT_MINUTES) * SLOT_MINUTES
+    return range(first, end_minute - SLOT_MINUTES + 1, SLOT_MINUTES)
+
+
+# --- Day bitmaps: bit i set <=> the slot starting at minute i * SLOT_MINUTES ---
+
+def slot_bit(minute: int) -> int:
+    """Bit of the slot starting at `minute`."""
+    return 1 << (minute // SLOT_MINUTES)
+
+
+def slot_mask(start_minute: int, end_minute: int) -> int:
+    """Bitmap of the bookable slots in [start_minute, end_minute)."""
+    mask = 0
+    for minute in slot_starts(start_minute, end_minute):
+        mask |= slot_bit(minute)
+    return mask
+
+
+def mask_minutes(mask: int, limit: int = SLOTS_PER_DAY):
+    """Start minutes of the (at most `limit`) earliest slots set in a bitmap."""
+    minutes = []
+    while mask and len(minutes) < limit:
+        lowest = mask & -mask
+        minutes.append((lowest.bit_length() - 1) * SLOT_MINUTES)
+        mask ^= lowest
+    return minutes
@@ -1,6 +1,14 @@
 from google.adk.tools import FunctionTool
-from .database import _find_doctors_in_db, _book_appointment_in_db, _get_appointments_for_user_db
+from .database import (
+    _find_doctors_in_db_async,
+    _book_appointment_in_db_async,
+    _get_appointments_for_user_db_async,
+    _find_earliest_slots_in_db_async,
+)
 
-find_doctors = FunctionTool(_find_doctors_in_db)
-book_appointment = FunctionTool(_book_appointment_in_db)
-view_my_appointments = FunctionTool(_get_appointments_for_user_db)
\ No newline at end of file
+# The async variants run the SQLite work on a dedicated thread pool, so a slow
+# query never stalls other sessions sharing the runner's event loop.
+find_doctors = FunctionTool(_find_doctors_in_db_async)
+book_appointment = FunctionTool(_book_appointment_in_db_async)
+view_my_appointments = FunctionTool(_get_appointments_for_user_db_async)
+find_earliest_available = FunctionTool(_find_earliest_slots_in_db_async)
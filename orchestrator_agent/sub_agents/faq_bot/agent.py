@@ -1,4 +1,5 @@
 from google.adk.agents import Agent
+from .answer_cache import after_model_callback, before_model_callback
 
 faq_bot = Agent(
     name="faq_bot",
@@ -23,5 +24,8 @@ faq_bot = Agent(
      'Based on my health conditions, am i healthy enough (give a surface level answer)?')'
      'summarize my all health reports or previous chats'
      Do not give personalized medical advice.
-    """
+    """,
+    # General questions are answered from a cache shared across users
+    before_model_callback=before_model_callback,
+    after_model_callback=after_model_callback,
 )
\ No newline at end of file
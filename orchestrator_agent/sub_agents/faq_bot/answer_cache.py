@@ -0,0 +1,287 @@
+# orchestrator_agent/sub_agents/faq_bot/answer_cache.py
+"""Shared answer cache for general (non-personalized) faq_bot questions.
+
+Many users ask the same general questions ("what are the symptoms of
+hypertension", "side effects of Metformin"). `AnswerCache` keeps faq_bot's
+answers to those, shared across users and sessions, and serves them again for
+the same question or a near-duplicate of it:
+
+- questions are normalized (case, punctuation, filler words such as "please"
+  or "can you tell me") and compared by the Jaccard similarity of their
+  character trigrams, through an inverted trigram index;
+- a near-duplicate must also have the same content words, up to inflection
+  ("symptom"/"symptoms"): similar spellings of different terms
+  ("hyperkalemia"/"hypokalemia"), numbers ("type 1"/"type 2") and negations
+  ("not", "without") never answer each other;
+- entries expire after `ttl_seconds` and the least recently used are evicted
+  beyond `max_entries`.
+
+faq_bot's instruction carries the user's `user_context`, so only answers that
+cannot depend on it are shared. A question is bypassed (neither served from nor
+stored in the cache) when it refers to the user ("my", "I", "should I") or to
+earlier turns ("what about its side effects?"). An answer is not stored when
+it mentions something from the user's context that the question did not
+(their name, a condition, a medication) or addresses them personally
+("your condition", "since you have").
+
+`before_model_callback` / `after_model_callback` plug the cache into the
+faq_bot agent: a hit returns the cached answer instead of calling the model.
+"""
+import os
+import re
+import threading
+import time
+from collections import Counter, OrderedDict
+from typing import Optional
+
+from google.adk.agents.callback_context import CallbackContext
+from google.adk.models.llm_request import LlmRequest
+from google.adk.models.llm_response import LlmResponse
+from google.genai import types
+
+FAQ_CACHE_ENTRIES = int(os.getenv("AROGYA_FAQ_CACHE_ENTRIES", "2048"))
+FAQ_CACHE_TTL_SECONDS = float(os.getenv("AROGYA_FAQ_CACHE_TTL_SECONDS", str(24 * 60 * 60)))
+# Minimum trigram Jaccard similarity for a near-duplicate to be served
+FAQ_CACHE_SIMILARITY = float(os.getenv("AROGYA_FAQ_CACHE_SIMILARITY", "0.8"))
+# Set to 0 to turn the cache off
+FAQ_CACHE = os.getenv("AROGYA_FAQ_CACHE", "1") != "0"
+
+_FILLER = re.compile(
+    r"\b(?:please|kindly|hi|hello|hey|thanks|thank you|could you|can you|would you|will you|"
+    r"tell me|let me know|explain|i want to know|i would like to know|i'd like to know|do you know|"
+    r"a|an|the|about|of|for|is|are|what's|whats|what|me|more|common|main|usual)\b"
+)
+_NON_WORD = re.compile(r"[^a-z0-9]+")
+# Inflection endings ignored when comparing content words ("symptoms", "treated", "allergies")
+_INFLECTION = re.compile(r"(?<=[a-z]{3})(?:(ies)|(?:(?<=[sxz])|(?<=[cs]h))es|(?<![su])s|ed|ing)$")
+# Ways of asking that mention the asker without being about them
+_ASKING = re.compile(
+    r"\b(?:tell me|let me know|give me|show me|help me understand|i want to know|i would like to know|"
+    r"i'd like to know|can you|could you|would you)\b"
+)
+# The question is about the user or continues an earlier turn
+_PERSONAL_QUESTION = re.compile(
+    r"\b(?:i|i'm|im|i've|ive|i'd|me|my|mine|myself|we|our|us)\b|"
+    r"\b(?:its|it's|that|this|these|those|they|them|their|he|she|his|her)\b|(?<!\bis )\bit\b(?! is\b)"
+)
+# The answer speaks to the user's own situation
+_PERSONAL_ANSWER = re.compile(
+    r"\b(?:your (?:condition|conditions|medication|medications|report|reports|history|health|results?|diagnosis|case)|"
+    r"you have|you are taking|you're taking|since you|in your case|given your|based on your|for you)\b",
+    re.IGNORECASE,
+)
+# Words of a condition or medication name too common to identify the user
+_GENERIC_TERMS = frozenset({
+    "acute", "chronic", "disease", "disorder", "syndrome", "type", "high", "level", "levels",
+    "mild", "moderate", "severe", "stage", "grade", "tablet", "tablets", "capsule", "capsules",
+    "daily", "with", "without", "infection", "deficiency", "history",
+})
+
+
+def normalize_question(text: str) -> str:
+    """Lower-cased question without punctuation or filler words."""
+    text = text.lower().replace("’", "'")
+    return " ".join(_NON_WORD.sub(" ", _FILLER.sub(" ", text)).split())
+
+
+def content_terms(normalized: str) -> frozenset:
+    """The words of a normalized question without inflection endings; numbers and negations kept as they are."""
+    return frozenset(_INFLECTION.sub(lambda match: "y" if match.group(1) else "", word) for word in normalized.split())
+
+
+def trigrams(normalized: str) -> frozenset:
+    padded = f" {normalized} "
+    return frozenset(padded[index:index + 3] for index in range(len(padded) - 2))
+
+
+def is_personalized(question: str) -> bool:
+    """True when the answer may depend on who asks or on earlier turns."""
+    question = _ASKING.sub(" ", question.lower().replace("’", "'"))
+    return bool(_PERSONAL_QUESTION.search(question))
+
+
+def context_terms(user_context) -> set:
+    """Lower-cased names, conditions and medications from a user_context dict.
+
+    Accepts the parser's schema (`diagnosed_conditions`, `current_medications`),
+    the camelCase spelling used in older sample states, and a whole
+    `ExpectedOutput` dump (`{"user_context": {...}, "interaction_history": []}`).
+    """
+    if isinstance(user_context, dict) and isinstance(user_context.get("user_context"), dict):
+        user_context = user_context["user_context"]
+    if not isinstance(user_context, dict):
+        return set()
+    terms = {user_context.get("user_name")}
+    for key in ("diagnosed_conditions", "diagnosedConditions"):
+        terms.update(user_context.get(key) or [])
+    for key in ("current_medications", "currentMedications"):
+        for medication in user_context.get(key) or []:
+            if isinstance(medication, dict):
+                terms.add(medication.get("name"))
+            else:
+                terms.add(medication)
+    # Single words too ("Kidney" out of "Chronic Kidney Disease"), except generic ones
+    terms.update(
+        part for term in list(terms) if isinstance(term, str)
+        for part in term.split() if len(part) > 3 and part.lower() not in _GENERIC_TERMS
+    )
+    return {term.lower() for term in terms if isinstance(term, str) and term.strip()}
+
+
+def is_shareable(question: str, answer: str, user_context=None) -> bool:
+    """True when `answer` does not draw on the asking user's own context."""
+    if _PERSONAL_ANSWER.search(answer):
+        return False
+    question, answer = question.lower(), answer.lower()
+    return not any(term in answer and term not in question for term in context_terms(user_context))
+
+
+class AnswerCache:
+    """A thread-safe LRU + TTL cache of answers, looked up by near-duplicate question."""
+
+    def __init__(self, max_entries=FAQ_CACHE_ENTRIES, ttl_seconds=FAQ_CACHE_TTL_SECONDS, similarity=FAQ_CACHE_SIMILARITY):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.similarity = similarity
+        self._entries = OrderedDict()   # normalized question -> (expires_at, answer, trigrams, content terms)
+        self._index = {}                # trigram -> normalized questions containing it
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.near_hits = 0
+        self.misses = 0
+        self.bypassed = 0
+        self.not_stored = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def _remove(self, key):
+        _, _, grams, _ = self._entries.pop(key)
+        for gram in grams:
+            keys = self._index.get(gram)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._index[gram]
+
+    def _closest(self, key, grams, terms):
+        """(key, similarity) of the most similar live entry with the same content terms, or (None, 0)."""
+        if key in self._entries:
+            return key, 1.0
+        shared = Counter(other for gram in grams for other in self._index.get(gram, ()))
+        best, best_score = None, 0.0
+        for other, common in shared.items():
+            _, _, other_grams, other_terms = self._entries[other]
+            score = common / (len(grams) + len(other_grams) - common)
+            if score > best_score and other_terms == terms:
+                best, best_score = other, score
+        return best, best_score
+
+    def get(self, question: str) -> Optional[str]:
+        """The cached answer for `question` or a near-duplicate of it, if any."""
+        if is_personalized(question):
+            with self._lock:
+                self.bypassed += 1
+            return None
+        key = normalize_question(question)
+        grams, terms = trigrams(key), content_terms(key)
+        now = time.monotonic()
+        with self._lock:
+            while True:
+                match, score = self._closest(key, grams, terms)
+                if match is None or score < self.similarity:
+                    self.misses += 1
+                    return None
+                expires_at, answer, _, _ = self._entries[match]
+                if expires_at > now:
+                    break
+                self._remove(match)
+                self.expirations += 1
+            self._entries.move_to_end(match)
+            self.hits += 1
+            if match != key:
+                self.near_hits += 1
+            return answer
+
+    def put(self, question: str, answer: str, user_context=None) -> bool:
+        """Store `answer` if both it and the question are general; True if stored."""
+        if is_personalized(question):
+            return False
+        if not answer.strip() or not is_shareable(question, answer, user_context):
+            with self._lock:
+                self.not_stored += 1
+            return False
+        key = normalize_question(question)
+        if not key:
+            return False
+        grams = trigrams(key)
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (time.monotonic() + self.ttl_seconds, answer, grams, content_terms(key))
+            for gram in grams:
+                self._index.setdefault(gram, set()).add(key)
+            while len(self._entries) > self.max_entries:
+                self._remove(next(iter(self._entries)))
+                self.evictions += 1
+        return True
+
+    def clear(self):
+        """Drop every entry (counters are kept)."""
+        with self._lock:
+            self._entries.clear()
+            self._index.clear()
+
+    def stats(self):
+        """Hit/miss/bypass counters and current size."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl_seconds,
+                "similarity": self.similarity,
+                "hits": self.hits,
+                "near_hits": self.near_hits,
+                "misses": self.misses,
+                "hit_ratio": self.hits / lookups if lookups else 0.0,
+                "bypassed": self.bypassed,
+                "not_stored": self.not_stored,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+            }
+
+
+answer_cache = AnswerCache()
+
+
+def _question(callback_context: CallbackContext) -> Optional[str]:
+    content = callback_context.user_content
+    if not content or not content.parts:
+        return None
+    text = " ".join(part.text for part in content.parts if part.text).strip()
+    return text or None
+
+
+def before_model_callback(callback_context: CallbackContext, llm_request: LlmRequest) -> Optional[LlmResponse]:
+    """Answer from the cache instead of calling the model, when possible."""
+    question = _question(callback_context)
+    # Only the turn's first model call answers the user's question directly
+    if not FAQ_CACHE or not question or not llm_request.contents or llm_request.contents[-1].role != "user":
+        return None
+    answer = answer_cache.get(question)
+    if answer is None:
+        return None
+    return LlmResponse(content=types.Content(role="model", parts=[types.Part(text=answer)]))
+
+
+def after_model_callback(callback_context: CallbackContext, llm_response: LlmResponse) -> Optional[LlmResponse]:
+    """Store a final, text-only answer to a general question."""
+    question = _question(callback_context)
+    content = llm_response.content
+    if not FAQ_CACHE or not question or llm_response.partial or not content or not content.parts:
+        return None
+    if any(part.function_call for part in content.parts):
+        return None
+    answer = "".join(part.text for part in content.parts if part.text)
+    answer_cache.put(question, answer, callback_context.state.get("user_context"))
+    return None
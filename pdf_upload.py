@@ -0,0 +1,174 @@
+# pdf_upload.py
+"""Streaming, size-bounded handling of uploaded PDF reports.
+
+Uploads are copied in fixed-size chunks into a spooled temp file (in memory up to
+SPOOL_MEMORY_BYTES, on disk beyond), hashing and validating them on the way, so a
+request never holds more than one chunk of the upload in memory. Reports larger
+than INLINE_MAX_BYTES are handed to the model by reference instead of being
+inlined into the request: through the Gemini Files API with the Developer
+client, or through a Cloud Storage object in GCS_UPLOAD_BUCKET on Vertex AI
+(which has no Files API). On Vertex AI without a bucket nothing larger than
+INLINE_MAX_BYTES is sent at all: callers check `uploads_by_reference()` and
+split such reports into page chunks that fit inline (see chunked_extraction).
+"""
+import asyncio
+import hashlib
+import os
+import tempfile
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+
+from fastapi import UploadFile
+from google import genai
+from google.genai import types
+
+MAX_UPLOAD_BYTES = int(os.getenv("AROGYA_MAX_UPLOAD_BYTES", str(50 * 1024 * 1024)))
+INLINE_MAX_BYTES = int(os.getenv("AROGYA_INLINE_PDF_MAX_BYTES", str(4 * 1024 * 1024)))
+# Cloud Storage bucket for large reports on Vertex AI; unset = send them inline
+GCS_UPLOAD_BUCKET = os.getenv("AROGYA_GCS_UPLOAD_BUCKET", "")
+GCS_UPLOAD_PREFIX = "arogya-uploads/"
+SPOOL_MEMORY_BYTES = 1024 * 1024
+CHUNK_SIZE = 256 * 1024
+
+PDF_MAGIC = b"%PDF-"
+PDF_EOF = b"%%EOF"
+# Readers accept the header within the first 1 KB and %%EOF within the last 1 KB
+_HEAD_WINDOW = 1024
+_TAIL_WINDOW = 1024
+
+
+class UploadTooLarge(ValueError):
+    """The upload exceeds the configured maximum size."""
+
+
+class InvalidPdf(ValueError):
+    """The upload is not a PDF document."""
+
+
+@dataclass
+class SpooledPdf:
+    """A validated upload: its spooled contents, size and SHA-256."""
+    file: tempfile.SpooledTemporaryFile
+    size: int
+    sha256: str
+
+    def read_bytes(self) -> bytes:
+        self.file.seek(0)
+        return self.file.read()
+
+    def close(self):
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+async def spool_pdf(upload: UploadFile, max_bytes: int = MAX_UPLOAD_BYTES) -> SpooledPdf:
+    """Copy an upload into a spooled temp file chunk by chunk, hashing and validating it.
+
+    Raises UploadTooLarge as soon as more than `max_bytes` have been read, and
+    InvalidPdf if the PDF header or trailer is missing.
+    """
+    spool = tempfile.SpooledTemporaryFile(max_size=SPOOL_MEMORY_BYTES)
+    digest = hashlib.sha256()
+    head, tail, size = b"", b"", 0
+    try:
+        while chunk := await upload.read(CHUNK_SIZE):
+            size += len(chunk)
+            if size > max_bytes:
+                raise UploadTooLarge(f"File exceeds the {max_bytes // (1024 * 1024)} MB upload limit.")
+            if len(head) < _HEAD_WINDOW:
+                head += chunk[:_HEAD_WINDOW - len(head)]
+                if len(head) >= _HEAD_WINDOW and PDF_MAGIC not in head:
+                    raise InvalidPdf("File is not a PDF document.")
+            tail = (tail + chunk)[-_TAIL_WINDOW:]
+            digest.update(chunk)
+            spool.write(chunk)
+        if PDF_MAGIC not in head or PDF_EOF not in tail:
+            raise InvalidPdf("File is not a complete PDF document.")
+    except BaseException:
+        spool.close()
+        raise
+    spool.seek(0)
+    return SpooledPdf(spool, size, digest.hexdigest())
+
+
+_files_client = None
+_storage_client = None
+
+
+def _client():
+    global _files_client
+    if _files_client is None:
+        _files_client = genai.Client()
+    return _files_client
+
+
+def _storage():
+    global _storage_client
+    if _storage_client is None:
+        from google.cloud import storage
+        _storage_client = storage.Client()
+    return _storage_client
+
+
+def uploads_by_reference() -> bool:
+    """Whether reports over INLINE_MAX_BYTES can be passed by reference (Files API or GCS_UPLOAD_BUCKET)."""
+    return not _client().vertexai or bool(GCS_UPLOAD_BUCKET)
+
+
+def _inline_part(pdf: SpooledPdf) -> types.Part:
+    return types.Part(inline_data={"mime_type": "application/pdf", "data": pdf.read_bytes()})
+
+
+@asynccontextmanager
+async def _gcs_part(pdf: SpooledPdf):
+    """Stream the spool to a Cloud Storage object, yield its gs:// Part, delete it on exit."""
+    blob = _storage().bucket(GCS_UPLOAD_BUCKET).blob(f"{GCS_UPLOAD_PREFIX}{pdf.sha256}-{os.urandom(4).hex()}.pdf")
+    pdf.file.seek(0)
+    await asyncio.to_thread(blob.upload_from_file, pdf.file, size=pdf.size, content_type="application/pdf")
+    try:
+        yield types.Part.from_uri(file_uri=f"gs://{GCS_UPLOAD_BUCKET}/{blob.name}", mime_type="application/pdf")
+    finally:
+        try:
+            await asyncio.to_thread(blob.delete)
+        except Exception as e:
+            print(f"⚠️ Could not delete uploaded object {blob.name}: {e}")
+
+
+@asynccontextmanager
+async def pdf_part(pdf: SpooledPdf):
+    """Yield the Part that carries a spooled PDF to the model.
+
+    Small reports are inlined. Larger ones are streamed from the spool to the
+    Gemini Files API (Developer client) or to GCS_UPLOAD_BUCKET (Vertex AI),
+    referenced by URI and deleted again on exit. On Vertex AI without a bucket
+    they raise UploadTooLarge rather than being read into memory whole.
+    """
+    if pdf.size <= INLINE_MAX_BYTES:
+        yield _inline_part(pdf)
+        return
+    if _client().vertexai:
+        if not GCS_UPLOAD_BUCKET:
+            raise UploadTooLarge(
+                f"Report part exceeds the {INLINE_MAX_BYTES // (1024 * 1024)} MB inline limit; "
+                "set AROGYA_GCS_UPLOAD_BUCKET to send large reports to Vertex AI."
+            )
+        async with _gcs_part(pdf) as part:
+            yield part
+        return
+
+    pdf.file.seek(0)
+    uploaded = await asyncio.to_thread(
+        _client().files.upload, file=pdf.file, config={"mime_type": "application/pdf"}
+    )
+    try:
+        yield types.Part.from_uri(file_uri=uploaded.uri, mime_type="application/pdf")
+    finally:
+        try:
+            await asyncio.to_thread(_client().files.delete, name=uploaded.name)
+        except Exception as e:
+            print(f"⚠️ Could not delete uploaded file {uploaded.name}: {e}")
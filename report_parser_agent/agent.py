@@ -1,5 +1,7 @@
 # report_parser_agent/agent.py
 
+from typing import Optional
+
 from google.adk.agents import Agent
 from pydantic import BaseModel, Field
 
@@ -13,7 +15,7 @@ class Medication(BaseModel):
 
 class PersonalInfo(BaseModel):
     """Describes the patient's personal details."""
-    age: int = Field(description="The age of the patient as a number")
+    age: Optional[int] = Field(None, description="The age of the patient as a number (null if the report does not state it)")
     sex: str = Field(description="The sex of the patient ('Male' or 'Female')")
 
 class UserContext(BaseModel):
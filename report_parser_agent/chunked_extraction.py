@@ -0,0 +1,185 @@
+# report_parser_agent/chunked_extraction.py
+"""Parallel extraction over page chunks of very large reports, with a deterministic merge.
+
+A 200-page report is split into chunks of CHUNK_PAGES pages. Each chunk is
+extracted on its own (concurrently, at most `concurrency` at a time) and the
+partial ExpectedOutputs are merged:
+
+  * user_name        - the most frequent non-empty name, ties to the earliest chunk
+  * personal_info    - the most supported valid age and, separately, the most supported
+                       non-empty sex, each tied to the earliest chunk
+  * diagnosed_conditions - deduplicated case/space/punctuation-insensitively, first spelling kept
+  * current_medications  - reconciled by normalized name and dosage; a dose-less
+                           entry is dropped when the same drug appears with a dose
+
+The merge depends only on the partials and their chunk order, never on which
+chunk finished first, so it can be checked offline with a stub model.
+
+With `max_bytes` (reports that must be sent inline, see pdf_upload), chunks are
+also sized from the average page size, and a chunk still over the limit is
+split in halves until each part fits or is a single page. Those chunks are
+extracted INLINE_CHUNK_CONCURRENCY at a time, so a request holds a bounded
+number of inline payloads whatever the report's size.
+"""
+import asyncio
+import gc
+import io
+import os
+import re
+from collections import Counter
+
+from .agent import ExpectedOutput
+
+try:
+    from pypdf import PdfReader, PdfWriter
+except ImportError:  # pragma: no cover - optional dependency
+    PdfReader = PdfWriter = None
+
+CHUNK_PAGES = int(os.getenv("AROGYA_CHUNK_PAGES", "20"))
+CHUNK_CONCURRENCY = int(os.getenv("AROGYA_CHUNK_CONCURRENCY", "8"))
+# Chunks extracted at once when they must be sent inline (`max_bytes`): each holds up to
+# max_bytes in memory until its model call returns
+INLINE_CHUNK_CONCURRENCY = int(os.getenv("AROGYA_INLINE_CHUNK_CONCURRENCY", "2"))
+# Attempts per chunk before the whole extraction fails
+CHUNK_ATTEMPTS = 2
+
+
+def _key(text: str) -> str:
+    """Normalized form used to compare conditions and medication names."""
+    return re.sub(r"[^a-z0-9]+", " ", text.casefold()).strip()
+
+
+def _dosage_key(dosage: str) -> str:
+    return re.sub(r"\s+", "", dosage or "").casefold()
+
+
+def merge_outputs(partials: list) -> ExpectedOutput:
+    """Merge per-chunk ExpectedOutputs, given in chunk order, into one."""
+    contexts = [partial.user_context for partial in partials]
+
+    names = [context.user_name.strip() for context in contexts if context.user_name.strip()]
+    name_votes = Counter(_key(name) for name in names)
+    user_name = max(names, key=lambda name: (name_votes[_key(name)], -names.index(name)), default="")
+
+    # Age and sex are voted on separately: a chunk may carry only one of them
+    ages = [context.personal_info.age for context in contexts
+            if context.personal_info.age is not None and 0 < context.personal_info.age < 125]
+    age_votes = Counter(ages)
+    age = max(ages, key=lambda value: (age_votes[value], -ages.index(value)), default=None)
+    sexes = [context.personal_info.sex.strip() for context in contexts if context.personal_info.sex.strip()]
+    sex_votes = Counter(sex.casefold() for sex in sexes)
+    sex = max(sexes, key=lambda value: (sex_votes[value.casefold()], -sexes.index(value)), default="")
+
+    conditions, seen = [], set()
+    for context in contexts:
+        for condition in context.diagnosed_conditions:
+            key = _key(condition)
+            if key and key not in seen:
+                seen.add(key)
+                conditions.append(condition.strip())
+
+    # name key -> {dosage key -> first Medication seen}, in first-seen order
+    medications = {}
+    for context in contexts:
+        for medication in context.current_medications:
+            name_key = _key(medication.name)
+            if name_key:
+                medications.setdefault(name_key, {}).setdefault(_dosage_key(medication.dosage), medication)
+    merged_medications = []
+    for doses in medications.values():
+        dosed = [medication for dose, medication in doses.items() if dose]
+        merged_medications.extend(dosed or list(doses.values())[:1])
+
+    return ExpectedOutput.model_validate({
+        "user_context": {
+            "user_name": user_name,
+            "personal_info": {"age": age, "sex": sex},
+            "diagnosed_conditions": conditions,
+            "current_medications": [medication.model_dump() for medication in merged_medications],
+        },
+        "interaction_history": [],
+    })
+
+
+def page_count(source) -> int:
+    """Number of pages of a PDF (path, bytes or binary file); 0 if it can't be read."""
+    if PdfReader is None:
+        return 0
+    try:
+        return len(_reader(source).pages)
+    except Exception:
+        return 0
+
+
+def _reader(source):
+    if isinstance(source, (bytes, bytearray)):
+        source = io.BytesIO(source)
+    elif hasattr(source, "seek"):
+        source.seek(0)
+    return PdfReader(source)
+
+
+def _size(source) -> int:
+    if isinstance(source, (bytes, bytearray)):
+        return len(source)
+    if hasattr(source, "seek"):
+        return source.seek(0, io.SEEK_END)
+    return os.path.getsize(source)
+
+
+def _chunk_bytes(source, start: int, stop: int) -> bytes:
+    # A fresh reader per chunk: pypdf caches every object it resolves, so a shared one
+    # would end up holding the whole report. Reader and writer objects reference each
+    # other, so the young generations are collected to free the page data now (~2 ms)
+    reader = _reader(source)
+    writer = PdfWriter()
+    for index in range(start, stop):
+        writer.add_page(reader.pages[index])
+    out = io.BytesIO()
+    writer.write(out)
+    del writer, reader
+    gc.collect(1)
+    return out.getvalue()
+
+
+async def extract_chunked(source, extract_chunk, chunk_pages: int = None, concurrency: int = None,
+                          max_bytes: int = None) -> ExpectedOutput:
+    """Split a PDF into page chunks, run `await extract_chunk(pdf_bytes, first_page, last_page, total)`
+    on each concurrently, and merge the results in chunk order.
+
+    With `max_bytes`, no chunk of more than one page is passed on larger than that, and at
+    most INLINE_CHUNK_CONCURRENCY chunks are extracted at a time.
+    """
+    chunk_pages = chunk_pages or CHUNK_PAGES
+    size = await asyncio.to_thread(_size, source) if max_bytes else 0
+    total = len((await asyncio.to_thread(_reader, source)).pages)
+    if max_bytes and size > max_bytes:
+        chunk_pages = max(1, min(chunk_pages, total * max_bytes // size))
+    ranges = [(start, min(start + chunk_pages, total)) for start in range(0, total, chunk_pages)]
+    concurrency = concurrency or CHUNK_CONCURRENCY
+    if max_bytes:
+        concurrency = min(concurrency, INLINE_CHUNK_CONCURRENCY)
+    slots = asyncio.Semaphore(concurrency)
+    reader_lock = asyncio.Lock()
+
+    async def run(start, stop):
+        """Partials of pages start..stop-1, in page order."""
+        async with slots:
+            # Chunks are cut lazily, so only `concurrency` of them are in memory at a time
+            async with reader_lock:
+                data = await asyncio.to_thread(_chunk_bytes, source, start, stop)
+            if not (max_bytes and len(data) > max_bytes and stop - start > 1):
+                for attempt in range(1, CHUNK_ATTEMPTS + 1):
+                    try:
+                        return [await extract_chunk(data, start + 1, stop, total)]
+                    except Exception as e:
+                        if attempt == CHUNK_ATTEMPTS:
+                            raise
+                        print(f"🔁 Pages {start + 1}-{stop} failed ({e}); retrying")
+        # Over max_bytes (pages vary in size): extract each half instead, outside this slot
+        middle = (start + stop) // 2
+        first, second = await asyncio.gather(run(start, middle), run(middle, stop))
+        return first + second
+
+    chunks = await asyncio.gather(*(run(start, stop) for start, stop in ranges))
+    return merge_outputs([partial for partials in chunks for partial in partials])
@@ -0,0 +1,132 @@
+# report_parser_agent/extraction_cache.py
+"""Persistent, content-addressed cache of report_parser_agent results.
+
+An entry is keyed on the SHA-256 of the PDF bytes plus the parser's model and
+schema fingerprint, so re-uploading the same report skips the model call, and
+changing the model, the output schema or the instruction invalidates every entry.
+
+Entries are validated ExpectedOutput JSON files in one directory. The cache is
+bounded by total size and evicts the least recently used entries (recency is
+the file's mtime, which a hit refreshes), so it survives restarts and can be
+shared by several worker processes.
+"""
+import hashlib
+import json
+import os
+import tempfile
+import threading
+from pathlib import Path
+
+from .agent import ExpectedOutput, report_parser_agent
+
+CACHE_DIR = Path(os.getenv("AROGYA_EXTRACT_CACHE_DIR", Path(__file__).parent / ".extract_cache"))
+CACHE_MAX_BYTES = int(os.getenv("AROGYA_EXTRACT_CACHE_MAX_BYTES", str(256 * 1024 * 1024)))
+
+
+def parser_fingerprint(agent=report_parser_agent, schema=ExpectedOutput) -> str:
+    """Short hash of everything besides the PDF that determines the parser's output."""
+    material = json.dumps(
+        {"model": agent.model, "instruction": agent.instruction, "schema": schema.model_json_schema()},
+        sort_keys=True,
+    )
+    return hashlib.sha256(material.encode("utf-8")).hexdigest()[:16]
+
+
+class ExtractionCache:
+    """Size-bounded LRU directory of parsed reports, addressed by PDF digest."""
+
+    def __init__(self, directory=CACHE_DIR, max_bytes=CACHE_MAX_BYTES, fingerprint=None):
+        self.directory = Path(directory)
+        self.max_bytes = max_bytes
+        self.fingerprint = fingerprint or parser_fingerprint()
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._sizes = {}        # entry path -> size in bytes, for the eviction budget
+        self._total = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.bytes_saved = 0    # PDF bytes that did not have to be sent to the model
+        for path in self.directory.glob("*.json"):
+            self._track(path, path.stat().st_size)
+
+    def key(self, pdf_sha256: str) -> str:
+        """Cache key of a PDF, given the hex SHA-256 of its bytes."""
+        return hashlib.sha256(f"{pdf_sha256}:{self.fingerprint}".encode("ascii")).hexdigest()
+
+    def _path(self, pdf_sha256: str) -> Path:
+        return self.directory / f"{self.key(pdf_sha256)}.json"
+
+    def _track(self, path, size):
+        self._total += size - self._sizes.get(path, 0)
+        self._sizes[path] = size
+
+    def _forget(self, path):
+        self._total -= self._sizes.pop(path, 0)
+
+    def get(self, pdf_sha256: str, pdf_size: int = 0):
+        """Return the cached ExpectedOutput for a PDF, or None."""
+        path = self._path(pdf_sha256)
+        try:
+            data = path.read_bytes()
+            output = ExpectedOutput.model_validate_json(data)
+            os.utime(path)      # mark as most recently used
+        except FileNotFoundError:
+            output = None
+        except ValueError:
+            # Truncated or from an incompatible writer: drop it and re-parse
+            path.unlink(missing_ok=True)
+            output = None
+        with self._lock:
+            if output is None:
+                self._forget(path)
+                self.misses += 1
+            else:
+                self.hits += 1
+                self.bytes_saved += pdf_size
+        return output
+
+    def put(self, pdf_sha256: str, output: ExpectedOutput):
+        """Store a validated result, evicting least recently used entries past max_bytes."""
+        path = self._path(pdf_sha256)
+        data = output.model_dump_json().encode("utf-8")
+        # Write-then-rename, so concurrent readers never see a partial file
+        fd, tmp = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        with os.fdopen(fd, "wb") as handle:
+            handle.write(data)
+        os.replace(tmp, path)
+        with self._lock:
+            self._track(path, len(data))
+            if self._total > self.max_bytes:
+                self._evict()
+
+    def _evict(self):
+        """Drop least recently used entries until the cache fits in max_bytes (lock held)."""
+        entries = []
+        for path in list(self._sizes):
+            try:
+                entries.append((path.stat().st_mtime, path))
+            except FileNotFoundError:
+                self._forget(path)  # evicted by another process
+        for _, path in sorted(entries):
+            if self._total <= self.max_bytes:
+                break
+            path.unlink(missing_ok=True)
+            self._forget(path)
+            self.evictions += 1
+
+    def stats(self):
+        """Hit ratio, bytes saved and current size, for reporting."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._sizes),
+                "size_bytes": self._total,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": self.hits / lookups if lookups else 0.0,
+                "evictions": self.evictions,
+                "bytes_saved": self.bytes_saved,
+                "fingerprint": self.fingerprint,
+            }
@@ -0,0 +1,233 @@
+# report_parser_agent/local_extractor.py
+"""Rule-based extraction from the PDF text layer, tried before the model.
+
+Digitally generated lab reports and discharge summaries carry a text layer with
+labelled fields ("Patient Name:", "Age/Sex:", "Diagnosis:", "Medications:").
+`extract_locally` reads that layer, fills ExpectedOutput from pattern matches and
+scores how much of it was found ("Medications: None" or "Impression: NAD" list
+nothing, and a single clinical section adds nothing to the score). Callers use
+the result only when the confidence reaches MIN_CONFIDENCE, and fall back to
+report_parser_agent otherwise.
+
+pypdf is optional: without it every report goes to the model.
+"""
+import io
+import os
+import re
+from dataclasses import dataclass, field
+
+from pydantic import ValidationError
+
+from .agent import ExpectedOutput
+
+try:
+    from pypdf import PdfReader
+    from pypdf.errors import PyPdfError
+except ImportError:  # pragma: no cover - optional dependency
+    PdfReader = None
+    PyPdfError = Exception
+
+MIN_CONFIDENCE = float(os.getenv("AROGYA_LOCAL_EXTRACT_MIN_CONFIDENCE", "0.8"))
+# Fewer characters than this means a scanned (image-only) report
+MIN_TEXT_CHARS = 80
+
+# Weight of each field in the confidence score
+FIELD_WEIGHTS = {
+    "user_name": 0.3,
+    "age": 0.15,
+    "sex": 0.15,
+    "diagnosed_conditions": 0.2,
+    "current_medications": 0.2,
+}
+
+
+@dataclass
+class LocalExtraction:
+    """Outcome of the local stage: the output (if complete enough to validate) and its confidence."""
+    output: ExpectedOutput = None
+    confidence: float = 0.0
+    missing: list = field(default_factory=list)
+    text_chars: int = 0
+    pages: list = field(default_factory=list)   # text layer per page, reused by page selection
+
+
+def read_text_pages(source) -> list:
+    """Text of each page of a PDF (path, bytes or binary file), or [] if it has no usable text layer."""
+    if PdfReader is None:
+        return []
+    if isinstance(source, (bytes, bytearray)):
+        source = io.BytesIO(source)
+    elif hasattr(source, "seek"):
+        source.seek(0)
+    try:
+        reader = PdfReader(source)
+        if reader.is_encrypted:
+            return []
+        pages = []
+        for page in reader.pages:
+            pages.append(page.extract_text() or "")
+            # pypdf caches every object it reads: drop this page's content before the next,
+            # so a large report is never held in memory whole
+            reader.resolved_objects.clear()
+        return pages
+    except (PyPdfError, ValueError, KeyError, OSError):
+        return []
+
+
+# --- Field patterns ---
+
+_LABEL_END = r"[ \t]*[:\-][ \t]*"
+_NAME = re.compile(
+    # A bare "Name:" only when no other word precedes it ("Doctor Name:", "Referring name:")
+    r"(?:patient'?s?\s*name|name\s+of\s+(?:the\s+)?patient|patient|(?<![A-Za-z.'] )(?<![A-Za-z.'])name)" + _LABEL_END +
+    r"(?:(?:mr|mrs|ms|miss|master|baby|dr|shri|smt)\.?\s+)?"
+    r"([A-Za-z][A-Za-z.'\-]*(?:[ \t]+[A-Za-z][A-Za-z.'\-]*){0,3})",
+    re.IGNORECASE,
+)
+# Words that end a name captured from a line holding several labels ("Name: X Age: 45")
+_NAME_STOP = re.compile(r"\b(?:age|sex|gender|dob|uhid|mrn|id|date|ref|years?|yrs?)\b.*$", re.IGNORECASE)
+_AGE_SEX = re.compile(r"age\s*/\s*(?:sex|gender)" + _LABEL_END + r"(\d{1,3})\s*(?:y(?:ea)?rs?|y)?\s*/\s*([MF]|male|female)\b", re.IGNORECASE)
+_AGE = re.compile(r"\bage" + _LABEL_END + r"(\d{1,3})\b", re.IGNORECASE)
+_SEX = re.compile(r"\b(?:sex|gender)" + _LABEL_END + r"([MF]|male|female)\b", re.IGNORECASE)
+
+_SECTION = re.compile(
+    r"^[ \t]*(?P<label>(?:final\s+|provisional\s+|primary\s+|secondary\s+)?diagnos[ie]s|impression|known\s+case\s+of|"
+    r"(?:current|discharge|home)?\s*medications?|medicines|rx|treatment\s+(?:advised|on\s+discharge)|prescription)"
+    r"[ \t]*:?[ \t]*(?P<rest>.*)$",
+    re.IGNORECASE | re.MULTILINE,
+)
+# Any other "Heading:" line ends a section
+_HEADING = re.compile(r"^[ \t]*[A-Z][A-Za-z /&()]{2,40}:[ \t]*", re.MULTILINE)
+_BULLET = re.compile(r"^[ \t]*(?:[-*•]|\d+[.)])[ \t]*")
+_DOSAGE_FORM = re.compile(r"^(?:tab|tablet|cap|capsule|inj|injection|syp|syrup|oint|drops?)\.?\s+", re.IGNORECASE)
+_DOSAGE = re.compile(r"\b\d+(?:\.\d+)?\s*(?:mg|mcg|g|ml|iu|units?)\b(?:\s*/\s*\d*\s*(?:mg|mcg|g|ml)\b)?", re.IGNORECASE)
+# Frequency/route words that end a medication name when no dosage is given
+_FREQUENCY = re.compile(r"\s+(?:od|bd|bid|tds|tid|qid|hs|sos|once|twice|thrice|daily|at|after|before|with|x)\b.*$", re.IGNORECASE)
+# Section values that state there is nothing to list ("None", "NAD", "No abnormality detected")
+_NIL = re.compile(
+    r"^(?:none|nil|nad|n\.?/?a\.?|unknown|nothing|negative|normal(?:\s+study)?|wnl|"
+    r"(?:study\s+)?within\s+normal\s+limits|no(?:\s.*)?|not\s.*|-+)[\s.!]*$",
+    re.IGNORECASE,
+)
+_MEDICATION_NAME = re.compile(r"^[A-Za-z][A-Za-z0-9\-]*(?:\s+[A-Za-z][A-Za-z0-9\-]*){0,3}$")
+
+
+def _first_group(pattern, text):
+    match = pattern.search(text)
+    return match.group(1) if match else None
+
+
+def _sex(value: str) -> str:
+    return "Male" if value.lower().startswith("m") else "Female"
+
+
+def _section_items(text: str, kind: str) -> list:
+    """Items listed under the diagnosis or medication sections, one per line or comma."""
+    items, lines = [], text.splitlines()
+    for match in _SECTION.finditer(text):
+        label = match.group("label").lower()
+        is_diagnosis = "diagnos" in label or "impression" in label or "known case" in label
+        if is_diagnosis != (kind == "diagnosis"):
+            continue
+        block = [match.group("rest")]
+        start = text.count("\n", 0, match.start()) + 1
+        for line in lines[start:]:
+            if not line.strip() or _HEADING.match(line) or _SECTION.match(line):
+                break
+            block.append(line)
+        for line in block:
+            line = _BULLET.sub("", line).strip().rstrip(".")
+            if not line:
+                continue
+            parts = [line] if kind == "medication" else re.split(r"[;,]|\s+and\s+", line)
+            items.extend(part.strip() for part in parts if part.strip() and not _NIL.match(part.strip()))
+    return items
+
+
+def _medications(text: str) -> list:
+    medications, seen = [], set()
+    for item in _section_items(text, "medication"):
+        item = _DOSAGE_FORM.sub("", item)
+        dosage = _DOSAGE.search(item)
+        name = item[:dosage.start()] if dosage else _FREQUENCY.sub("", item)
+        name = name.strip(" -:")
+        if not _MEDICATION_NAME.match(name):
+            continue
+        dosage = re.sub(r"\s+", "", dosage.group(0)) if dosage else ""
+        if name.lower() not in seen:
+            seen.add(name.lower())
+            medications.append({"name": name, "dosage": dosage})
+    return medications
+
+
+def _conditions(text: str) -> list:
+    conditions, seen = [], set()
+    for item in _section_items(text, "diagnosis"):
+        if item.lower() not in seen and len(item) <= 80:
+            seen.add(item.lower())
+            conditions.append(item)
+    return conditions
+
+
+def extract_fields(text: str) -> LocalExtraction:
+    """Fill ExpectedOutput from report text and score the result."""
+    found = {}
+
+    names = []
+    for match in _NAME.finditer(text):
+        name = _NAME_STOP.sub("", match.group(1)).strip(" .")
+        if name and name.lower() not in ("of", "the"):
+            names.append(name.title() if name.isupper() or name.islower() else name)
+    if names:
+        found["user_name"] = names[0]
+
+    age_sex = _AGE_SEX.search(text)
+    age = age_sex.group(1) if age_sex else _first_group(_AGE, text)
+    sex = age_sex.group(2) if age_sex else _first_group(_SEX, text)
+    if age and 0 < int(age) < 125:
+        found["age"] = int(age)
+    if sex:
+        found["sex"] = _sex(sex)
+
+    conditions = _conditions(text)
+    if conditions:
+        found["diagnosed_conditions"] = conditions
+    medications = _medications(text)
+    if medications:
+        found["current_medications"] = medications
+
+    confidence = sum(weight for key, weight in FIELD_WEIGHTS.items() if key in found)
+    # One clinical list on its own (a stray "Impression:" line) is no evidence the report was
+    # read fully: it only counts together with the other one
+    clinical = [key for key in ("diagnosed_conditions", "current_medications") if key in found]
+    if len(clinical) == 1:
+        confidence -= FIELD_WEIGHTS[clinical[0]]
+    # Conflicting patient names usually mean a multi-patient or unusual layout
+    if len({name.lower() for name in names}) > 1:
+        confidence *= 0.5
+    missing = [key for key in FIELD_WEIGHTS if key not in found]
+
+    try:
+        output = ExpectedOutput.model_validate({
+            "user_context": {
+                "user_name": found.get("user_name", ""),
+                "personal_info": {"age": found.get("age"), "sex": found.get("sex", "")},
+                "diagnosed_conditions": found.get("diagnosed_conditions", []),
+                "current_medications": found.get("current_medications", []),
+            },
+            "interaction_history": [],
+        })
+    except ValidationError:
+        return LocalExtraction(confidence=0.0, missing=missing, text_chars=len(text))
+    return LocalExtraction(output, round(confidence, 3), missing, len(text))
+
+
+def extract_locally(source) -> LocalExtraction:
+    """Run the local stage on a PDF (path, bytes or binary file)."""
+    pages = read_text_pages(source)
+    text = "\n".join(pages)
+    if len(text.strip()) < MIN_TEXT_CHARS:
+        return LocalExtraction(missing=list(FIELD_WEIGHTS), text_chars=len(text), pages=pages)
+    result = extract_fields(text)
+    result.pages = pages
+    return result
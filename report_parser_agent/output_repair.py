@@ -0,0 +1,247 @@
+# report_parser_agent/output_repair.py
+"""Local repair and validation of report_parser_agent's JSON reply.
+
+The reply is validated straight from the raw string against ExpectedOutput. When
+that fails, the usual LLM defects are repaired locally instead of paying for
+another model call:
+
+  * text around the JSON, or ```json fences
+  * trailing commas, comments, Python literals (None/True/False), smart quotes
+  * single-quoted strings
+  * types: "45 years" -> 45, a missing age stays null, "M" -> "Male", null lists -> [],
+    a comma-separated string of conditions, "Metformin 500mg" as a medication,
+    the UserContext fields without their `user_context` wrapper
+
+A reply with none of the UserContext fields (`{}`, `{"error": "..."}`,
+`{"user_context": null}`) is not repaired into an empty output: it raises
+OutputRepairError like any other unusable reply.
+
+Callers re-prompt the model only when `parse_output` raises OutputRepairError.
+`repair_stats` counts how each reply was handled.
+"""
+import json
+import re
+from typing import Optional
+
+from pydantic import ValidationError
+
+from .agent import ExpectedOutput
+
+# valid: validated as returned; repaired: fixed locally (a model call avoided);
+# failed: beyond repair; reprompts: follow-up model calls made by callers
+repair_stats = {"valid": 0, "repaired": 0, "failed": 0, "reprompts": 0}
+
+
+class OutputRepairError(ValueError):
+    """The reply could not be turned into a valid ExpectedOutput."""
+
+
+# --- Syntax repairs ---
+
+_FENCE = re.compile(r"```(?:json)?\s*(.*?)```", re.DOTALL | re.IGNORECASE)
+_TRAILING_COMMA = re.compile(r",(\s*[}\]])")
+_PY_LITERALS = {"None": "null", "True": "true", "False": "false"}
+_SMART_QUOTES = str.maketrans({"“": '"', "”": '"', "‘": "'", "’": "'"})
+
+
+def _outer_object(text: str) -> str:
+    """The first balanced {...} in text (string-aware), or text itself."""
+    start = text.find("{")
+    if start < 0:
+        return text
+    depth, in_string, escaped = 0, None, False
+    for index in range(start, len(text)):
+        char = text[index]
+        if in_string:
+            if escaped:
+                escaped = False
+            elif char == "\\":
+                escaped = True
+            elif char == in_string:
+                in_string = None
+        elif char in "\"'":
+            in_string = char
+        elif char == "{":
+            depth += 1
+        elif char == "}":
+            depth -= 1
+            if depth == 0:
+                return text[start:index + 1]
+    return text[start:]
+
+
+def _rewrite_tokens(text: str) -> str:
+    """Outside of strings: drop comments, map Python literals, turn 'single' into "double" quotes."""
+    out, index = [], 0
+    while index < len(text):
+        char = text[index]
+        if char in "\"'":
+            end, escaped = index + 1, False
+            while end < len(text):
+                if escaped:
+                    escaped = False
+                elif text[end] == "\\":
+                    escaped = True
+                elif text[end] == char:
+                    break
+                end += 1
+            body = text[index + 1:end]
+            if char == "'":
+                body = body.replace('\\\'', "'").replace('"', '\\"')
+            out.append('"' + body + '"')
+            index = end + 1
+        elif text.startswith("//", index):
+            index = text.find("\n", index) if "\n" in text[index:] else len(text)
+        elif text.startswith("/*", index):
+            end = text.find("*/", index + 2)
+            index = len(text) if end < 0 else end + 2
+        else:
+            word = re.match(r"[A-Za-z_]+", text[index:])
+            if word:
+                out.append(_PY_LITERALS.get(word.group(0), word.group(0)))
+                index += len(word.group(0))
+            else:
+                out.append(char)
+                index += 1
+    return "".join(out)
+
+
+def repair_json(text: str):
+    """Parse an LLM's JSON reply, repairing syntax defects. Raises ValueError if it can't."""
+    text = (text or "").translate(_SMART_QUOTES).strip()
+    fenced = _FENCE.search(text)
+    if fenced:
+        text = fenced.group(1)
+    text = _outer_object(text)
+    try:
+        return json.loads(text)
+    except json.JSONDecodeError:
+        pass
+    text = _TRAILING_COMMA.sub(r"\1", _rewrite_tokens(text))
+    return json.loads(_close_brackets(text))
+
+
+def _close_brackets(text: str) -> str:
+    """Close the objects and arrays a truncated reply left open."""
+    stack, in_string, escaped = [], False, False
+    for char in text:
+        if in_string:
+            if escaped:
+                escaped = False
+            elif char == "\\":
+                escaped = True
+            elif char == '"':
+                in_string = False
+        elif char == '"':
+            in_string = True
+        elif char in "{[":
+            stack.append("}" if char == "{" else "]")
+        elif char in "}]" and stack:
+            stack.pop()
+    if not stack:
+        return text
+    return _TRAILING_COMMA.sub(r"\1", text.rstrip().rstrip(",") + "".join(reversed(stack)))
+
+
+# --- Type coercion ---
+
+_INT = re.compile(r"\d+")
+_DOSAGE = re.compile(r"\b\d+(?:\.\d+)?\s*(?:mg|mcg|g|ml|iu|units?)\b", re.IGNORECASE)
+
+
+def _text(value) -> str:
+    return "" if value is None else str(value).strip()
+
+
+def _age(value) -> Optional[int]:
+    if value is None or isinstance(value, bool):
+        return None
+    if isinstance(value, (int, float)):
+        return int(value)
+    match = _INT.search(_text(value))
+    return int(match.group(0)) if match else None
+
+
+def _sex(value) -> str:
+    value = _text(value)
+    if value.lower() in ("m", "male", "man"):
+        return "Male"
+    if value.lower() in ("f", "female", "woman"):
+        return "Female"
+    return value
+
+
+def _list(value) -> list:
+    if value is None or value == "":
+        return []
+    if isinstance(value, list):
+        return value
+    if isinstance(value, str):
+        return [part.strip() for part in re.split(r"[;,\n]", value) if part.strip()]
+    return [value]
+
+
+def _medication(value) -> dict:
+    if isinstance(value, dict):
+        name = value.get("name") or value.get("medication") or value.get("drug")
+        dosage = value.get("dosage") or value.get("dose")
+        return {"name": _text(name), "dosage": _text(dosage)}
+    value = _text(value)
+    dosage = _DOSAGE.search(value)
+    if dosage:
+        return {"name": value[:dosage.start()].strip(" -:"), "dosage": re.sub(r"\s+", "", dosage.group(0))}
+    return {"name": value, "dosage": ""}
+
+
+# Keys that show a reply is an extraction at all (the UserContext fields, and the aliases coerced below)
+_CONTEXT_KEYS = ("user_name", "name", "personal_info", "age", "sex", "gender",
+                 "diagnosed_conditions", "current_medications")
+
+
+def _has_value(value) -> bool:
+    return value not in (None, "", [], {})
+
+
+def coerce_output(data) -> dict:
+    """Reshape a parsed reply into the ExpectedOutput structure and types."""
+    if not isinstance(data, dict):
+        raise ValueError(f"expected a JSON object, got {type(data).__name__}")
+    context = data.get("user_context")
+    if not isinstance(context, dict):
+        # The UserContext fields at the top level
+        context = data
+    if not any(_has_value(context.get(key)) for key in _CONTEXT_KEYS):
+        raise ValueError(f"no user_context fields in the reply (keys: {sorted(data)})")
+    info = context.get("personal_info") if isinstance(context.get("personal_info"), dict) else context
+    medications = [_medication(item) for item in _list(context.get("current_medications"))]
+    return {
+        "user_context": {
+            "user_name": _text(context.get("user_name") or context.get("name")),
+            "personal_info": {"age": _age(info.get("age")), "sex": _sex(info.get("sex") or info.get("gender"))},
+            "diagnosed_conditions": [
+                _text(item.get("name") if isinstance(item, dict) else item)
+                for item in _list(context.get("diagnosed_conditions")) if item
+            ],
+            "current_medications": [medication for medication in medications if medication["name"]],
+        },
+        "interaction_history": [],
+    }
+
+
+def parse_output(text: str) -> ExpectedOutput:
+    """Validate the agent's raw reply against ExpectedOutput, repairing it locally if needed."""
+    try:
+        output = ExpectedOutput.model_validate_json(text or "")
+        repair_stats["valid"] += 1
+        # Schema-valid, but "M"/"F" still read better downstream as "Male"/"Female"
+        output.user_context.personal_info.sex = _sex(output.user_context.personal_info.sex)
+        return output
+    except ValidationError:
+        pass
+    try:
+        output = ExpectedOutput.model_validate(coerce_output(repair_json(text)))
+    except (ValueError, ValidationError) as e:
+        repair_stats["failed"] += 1
+        raise OutputRepairError(str(e)) from e
+    repair_stats["repaired"] += 1
+    return output
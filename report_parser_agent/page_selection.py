@@ -0,0 +1,102 @@
+# report_parser_agent/page_selection.py
+"""Relevant-page pruning for long reports before they are sent to the model.
+
+The UserContext fields (name, demographics, diagnoses, medications) usually sit
+on a few pages of a long discharge summary; the rest is results tables, vitals
+charts and progress notes. Pages are scored from their text layer with keyword
+and layout cues, and only the first page plus the best-scoring pages are kept in
+a reduced PDF.
+
+Reports without a usable text layer, or shorter than PRUNE_MIN_PAGES, are sent
+whole. Requires pypdf (optional).
+"""
+import io
+import os
+import re
+from dataclasses import dataclass
+
+from .local_extractor import read_text_pages
+
+try:
+    from pypdf import PdfReader, PdfWriter
+except ImportError:  # pragma: no cover - optional dependency
+    PdfReader = PdfWriter = None
+
+PRUNE_MIN_PAGES = int(os.getenv("AROGYA_PRUNE_MIN_PAGES", "4"))
+PRUNE_MAX_PAGES = int(os.getenv("AROGYA_PRUNE_MAX_PAGES", "8"))
+# Pages scoring below this are never kept (except the first page)
+MIN_PAGE_SCORE = 3.0
+
+# (pattern, weight per hit, cap on that pattern's total)
+KEYWORD_CUES = [
+    (re.compile(r"diagnos[ie]s|impression|known case of", re.I), 3.0, 6.0),
+    (re.compile(r"medications?|medicines|prescription|\brx\b|treatment advised", re.I), 3.0, 6.0),
+    (re.compile(r"\b(?:tab|tablet|cap|capsule|inj|syp)\b\.?", re.I), 1.0, 4.0),
+    (re.compile(r"\b\d+(?:\.\d+)?\s?(?:mg|mcg|iu)\b", re.I), 0.5, 3.0),
+    (re.compile(r"patient'?s?\s*name|name of (?:the )?patient|age\s*/\s*sex|\bsex\b|\bgender\b|\bage\b", re.I), 2.0, 4.0),
+    (re.compile(r"discharge summary|chief complaints?|history of|allerg", re.I), 1.0, 2.0),
+]
+_NUMBER = re.compile(r"\b\d+(?:\.\d+)?\b")
+
+
+@dataclass
+class PrunedPdf:
+    """A reduced PDF (None if unchanged) and which of the original pages it contains."""
+    data: bytes
+    kept_pages: list
+    total_pages: int
+
+    @property
+    def pruned(self) -> bool:
+        return len(self.kept_pages) < self.total_pages
+
+
+def score_page(text: str) -> float:
+    """Relevance of one page's text to the UserContext fields."""
+    score = sum(min(cap, weight * len(pattern.findall(text))) for pattern, weight, cap in KEYWORD_CUES)
+    lines = [line for line in text.splitlines() if line.strip()]
+    if lines:
+        # Layout cue: results tables and vitals charts are mostly numeric rows
+        numeric_rows = sum(1 for line in lines if len(_NUMBER.findall(line)) >= 3)
+        if numeric_rows / len(lines) > 0.5:
+            score -= 3.0
+    return score
+
+
+def select_pages(page_texts: list, max_pages: int = None) -> list:
+    """Indexes (in document order) of the pages worth sending: the first page plus the best-scoring ones."""
+    max_pages = max_pages or PRUNE_MAX_PAGES
+    scored = sorted(
+        ((score_page(text), index) for index, text in enumerate(page_texts) if index > 0),
+        key=lambda item: (-item[0], item[1]),
+    )
+    keep = {0} | {index for score, index in scored[:max_pages - 1] if score >= MIN_PAGE_SCORE}
+    return sorted(keep)
+
+
+def prune_pdf(source, page_texts: list = None) -> PrunedPdf:
+    """Drop the pages unlikely to hold UserContext fields from a PDF (path, bytes or binary file).
+
+    `data` is None when nothing was dropped, so callers send the original.
+    `page_texts` can pass in a text layer that was already read.
+    """
+    if page_texts is None:
+        page_texts = read_text_pages(source)
+    total = len(page_texts)
+    if PdfWriter is None or total < PRUNE_MIN_PAGES or not any(text.strip() for text in page_texts):
+        return PrunedPdf(None, list(range(total)), total)
+
+    kept = select_pages(page_texts)
+    if len(kept) == total:
+        return PrunedPdf(None, kept, total)
+    if isinstance(source, (bytes, bytearray)):
+        source = io.BytesIO(source)
+    elif hasattr(source, "seek"):
+        source.seek(0)
+    reader = PdfReader(source)
+    writer = PdfWriter()
+    for index in kept:
+        writer.add_page(reader.pages[index])
+    out = io.BytesIO()
+    writer.write(out)
+    return PrunedPdf(out.getvalue(), kept, total)
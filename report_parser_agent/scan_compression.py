@@ -0,0 +1,196 @@
+# report_parser_agent/scan_compression.py
+"""Downsampling and recompression of the page images in scanned reports.
+
+Scanned reports arrive as 300-600 DPI full-colour page images and are often tens
+of MB. The model reads them just as well at OCR resolution, so before upload each
+embedded image is resampled to SCAN_TARGET_DPI (relative to the page it sits on),
+converted to grayscale and re-encoded as JPEG at SCAN_JPEG_QUALITY. An image is
+only replaced when the result is smaller, and the PDF only when it shrank by at
+least SCAN_MIN_SAVING.
+
+The work is CPU bound, so `compress_scan` runs `compress_file` in a process pool
+(SCAN_WORKERS processes) to keep the event loop free. The report goes to the
+worker as a temp file path, copied from the upload's spool in chunks, and the
+result comes back the same way, so neither is ever held in memory whole nor
+pickled. Requires pypdf and Pillow (both optional); without them reports are
+sent unchanged.
+"""
+import asyncio
+import io
+import os
+import shutil
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+
+try:
+    from PIL import Image
+    from pypdf import PdfReader, PdfWriter
+except ImportError:  # pragma: no cover - optional dependencies
+    Image = PdfReader = PdfWriter = None
+
+SCAN_COMPRESSION = os.getenv("AROGYA_SCAN_COMPRESSION", "1") == "1"
+SCAN_TARGET_DPI = int(os.getenv("AROGYA_SCAN_TARGET_DPI", "200"))
+SCAN_JPEG_QUALITY = int(os.getenv("AROGYA_SCAN_JPEG_QUALITY", "70"))
+SCAN_GRAYSCALE = os.getenv("AROGYA_SCAN_GRAYSCALE", "1") == "1"
+SCAN_WORKERS = int(os.getenv("AROGYA_SCAN_WORKERS", str(min(4, os.cpu_count() or 1))))
+# Smaller PDFs are sent as they are
+SCAN_MIN_BYTES = int(os.getenv("AROGYA_SCAN_MIN_BYTES", str(1024 * 1024)))
+# Keep the original unless the recompressed PDF is at least this much smaller
+SCAN_MIN_SAVING = 0.1
+COPY_CHUNK_BYTES = 256 * 1024
+
+
+@dataclass
+class CompressedPdf:
+    """A recompressed PDF (None if the original should be sent) and what it took.
+
+    compress_pdf returns it as `data`; compress_scan as an open temp `file`,
+    which the caller closes (deleting it).
+    """
+    data: bytes
+    original_bytes: int
+    compressed_bytes: int
+    images: int = 0
+    seconds: float = 0.0
+    file: object = None
+
+    @property
+    def bytes_saved(self) -> int:
+        return self.original_bytes - self.compressed_bytes
+
+
+def _recompress(image, page_inches: float, target_dpi: int, grayscale: bool):
+    """Downsampled (and grayscale) copy of a PIL image, or None if it is already small enough."""
+    if image.mode == "1":
+        return None  # bilevel scans are already compact (CCITT/JBIG2)
+    dpi = image.width / page_inches if page_inches else 0
+    changed = False
+    if dpi > target_dpi * 1.1:
+        scale = target_dpi / dpi
+        image = image.resize((max(1, round(image.width * scale)), max(1, round(image.height * scale))), Image.LANCZOS)
+        changed = True
+    if grayscale and image.mode != "L":
+        image = image.convert("L")
+        changed = True
+    elif image.mode not in ("L", "RGB"):
+        image = image.convert("RGB")
+    return image if changed or image.format != "JPEG" else None
+
+
+def _compress(source, size: int, out, target_dpi: int, quality: int, grayscale: bool) -> CompressedPdf:
+    """Recompress the PDF read from `source` (a path or binary file) into `out`.
+
+    Returns compressed_bytes < original_bytes when `out` holds the smaller PDF to send.
+    """
+    target_dpi = target_dpi or SCAN_TARGET_DPI
+    quality = quality or SCAN_JPEG_QUALITY
+    grayscale = SCAN_GRAYSCALE if grayscale is None else grayscale
+    start = time.perf_counter()
+    unchanged = CompressedPdf(None, size, size)
+    if PdfWriter is None or Image is None:
+        return unchanged
+    try:
+        writer = PdfWriter(clone_from=PdfReader(source))
+        replaced = 0
+        for page in writer.pages:
+            page_inches = float(page.mediabox.width) / 72
+            for image_file in page.images:
+                # Inline images and unusual colour spaces are left as they are
+                try:
+                    original = image_file.image
+                    new_image = _recompress(original, page_inches, target_dpi, grayscale)
+                    if new_image is None:
+                        continue
+                    encoded = io.BytesIO()
+                    new_image.save(encoded, "JPEG", quality=quality)
+                    if encoded.tell() >= len(image_file.data):
+                        continue
+                    image_file.replace(new_image, quality=quality)
+                    replaced += 1
+                except Exception:
+                    continue
+        if not replaced:
+            unchanged.seconds = time.perf_counter() - start
+            return unchanged
+        writer.compress_identical_objects(remove_identicals=True, remove_orphans=True)
+        writer.write(out)
+    except Exception as e:
+        print(f"⚠️ Could not recompress scan: {e}")
+        return unchanged
+
+    seconds = time.perf_counter() - start
+    if out.tell() > size * (1 - SCAN_MIN_SAVING):
+        return CompressedPdf(None, size, size, replaced, seconds)
+    return CompressedPdf(None, size, out.tell(), replaced, seconds)
+
+
+def compress_pdf(data: bytes, target_dpi: int = None, quality: int = None, grayscale: bool = None) -> CompressedPdf:
+    """Resample and re-encode the images of a PDF given as bytes."""
+    out = io.BytesIO()
+    result = _compress(io.BytesIO(data), len(data), out, target_dpi, quality, grayscale)
+    if result.compressed_bytes < result.original_bytes:
+        result.data = out.getvalue()
+    return result
+
+
+def compress_file(source_path: str, size: int, target_path: str) -> CompressedPdf:
+    """Recompress the PDF at `source_path` into `target_path` (runs in a worker process)."""
+    with open(target_path, "wb") as out:
+        return _compress(source_path, size, out, None, None, None)
+
+
+_pool = None
+
+
+def _executor() -> ProcessPoolExecutor:
+    global _pool
+    if _pool is None:
+        _pool = ProcessPoolExecutor(max_workers=SCAN_WORKERS)
+    return _pool
+
+
+def _copy_to_temp(file) -> tempfile.NamedTemporaryFile:
+    source = tempfile.NamedTemporaryFile(suffix=".pdf")
+    try:
+        file.seek(0)
+        shutil.copyfileobj(file, source, COPY_CHUNK_BYTES)
+        source.flush()
+    except BaseException:
+        source.close()
+        raise
+    return source
+
+
+async def compress_scan(file, size: int) -> CompressedPdf:
+    """Run compress_file in the process pool on a seekable binary PDF file of `size` bytes.
+
+    When the PDF shrank, the result's `file` is an open temp file holding it.
+    Reports below SCAN_MIN_BYTES (or with compression off) are skipped.
+    """
+    if not SCAN_COMPRESSION or size < SCAN_MIN_BYTES or PdfWriter is None or Image is None:
+        return CompressedPdf(None, size, size)
+    target = tempfile.NamedTemporaryFile(suffix=".pdf")
+    try:
+        with await asyncio.to_thread(_copy_to_temp, file) as source:
+            result = await asyncio.get_running_loop().run_in_executor(
+                _executor(), compress_file, source.name, size, target.name
+            )
+    except BaseException:
+        target.close()
+        raise
+    if result.compressed_bytes >= result.original_bytes:
+        target.close()
+        return result
+    target.seek(0)
+    result.file = target
+    return result
+
+
+def shutdown():
+    """Stop the worker processes (on application shutdown)."""
+    global _pool
+    if _pool is not None:
+        _pool.shutdown(cancel_futures=True)
+        _pool = None
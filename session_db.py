@@ -0,0 +1,431 @@
+# session_db.py
+"""A durable ADK session service on SQLite (WAL mode).
+
+InMemorySessionService loses every conversation and `user_context` on restart
+and cannot be shared between processes. `SqliteSessionService` keeps sessions
+in SESSION_DB instead, which any number of processes (e.g. uvicorn workers)
+can open at once: WAL lets readers run alongside the single writer, and
+busy_timeout makes writers wait for each other instead of failing.
+
+Everything is stored as append-only rows, so a turn writes only what changed:
+
+- `events`: one row per event, without its state_delta (state lives in
+  `state_log`, so e.g. the whole interaction history is not repeated in every
+  event row);
+- `state_log`: one row per changed state key. A key is written in full
+  ('set') when it changes (`user_context` only does when a report is
+  uploaded). A list that mostly overlaps its previous value, such as
+  `interaction_history`, is written as a 'splice' - new = head + old[start:stop]
+  + tail, with the rolling summary entry stored as its added lines - so a turn
+  stores the new entry, not the whole list. Every
+  SNAPSHOT_EVERY splices the full value is written again and the rows it
+  supersedes are deleted, which bounds both storage and the replay on load;
+- `app_state` / `user_state`: the "app:" and "user:" prefixed keys, as in
+  InMemorySessionService ("temp:" keys are never stored).
+
+A splice is only written against the value this process last wrote or loaded
+for that key; if another process wrote the key in between, the full value is
+written instead.
+
+Every method is blocking, as ADK's BaseSessionService is, and the Runner calls
+get_session and append_event straight from its async generator. An async caller
+wraps each turn in `async with service.turn(...)`: the session is loaded in a
+worker thread and served from memory for the rest of the turn, and its writes
+(including a BEGIN IMMEDIATE that may wait up to BUSY_TIMEOUT_MS for another
+process) go to a single background writer thread, in order. Leaving the block
+waits for those writes without blocking the event loop.
+"""
+import asyncio
+import copy
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager, contextmanager
+from pathlib import Path
+from typing import Any, Optional
+
+from google.adk.events import Event
+from google.adk.sessions import BaseSessionService, Session, State
+from google.adk.sessions.base_session_service import GetSessionConfig, ListEventsResponse, ListSessionsResponse
+
+SESSION_DB = Path(os.getenv("AROGYA_SESSION_DB", Path(__file__).parent / "sessions.db"))
+# Splice rows per key before its full value is written again
+SNAPSHOT_EVERY = int(os.getenv("AROGYA_SESSION_SNAPSHOT_EVERY", "32"))
+# Last written value kept per (session, key) to compute splices, least recently used dropped
+MAX_CACHED_KEYS = 10_000
+# ms a writer waits for another process's write to finish
+BUSY_TIMEOUT_MS = 5000
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS sessions (
+    app_name TEXT NOT NULL,
+    user_id TEXT NOT NULL,
+    session_id TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL,
+    PRIMARY KEY (app_name, user_id, session_id)
+);
+CREATE TABLE IF NOT EXISTS events (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    app_name TEXT NOT NULL,
+    user_id TEXT NOT NULL,
+    session_id TEXT NOT NULL,
+    timestamp REAL NOT NULL,
+    data TEXT NOT NULL                  -- Event JSON without actions.state_delta
+);
+CREATE INDEX IF NOT EXISTS idx_events_session ON events (app_name, user_id, session_id, id);
+CREATE TABLE IF NOT EXISTS state_log (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    app_name TEXT NOT NULL,
+    user_id TEXT NOT NULL,
+    session_id TEXT NOT NULL,
+    key TEXT NOT NULL,
+    kind TEXT NOT NULL,                 -- set | splice
+    value TEXT NOT NULL                 -- JSON value, or {"start", "stop", "head", "tail"}
+);
+CREATE INDEX IF NOT EXISTS idx_state_log_key ON state_log (app_name, user_id, session_id, key, id);
+CREATE TABLE IF NOT EXISTS app_state (
+    app_name TEXT NOT NULL,
+    key TEXT NOT NULL,
+    value TEXT NOT NULL,
+    PRIMARY KEY (app_name, key)
+);
+CREATE TABLE IF NOT EXISTS user_state (
+    app_name TEXT NOT NULL,
+    user_id TEXT NOT NULL,
+    key TEXT NOT NULL,
+    value TEXT NOT NULL,
+    PRIMARY KEY (app_name, user_id, key)
+);
+"""
+
+
+def _dumps(value) -> str:
+    return json.dumps(value, ensure_ascii=False, separators=(",", ":"))
+
+
+def _patch(old: dict, new: dict) -> dict:
+    """Changed fields of `new` relative to `old`; changed strings as line splices."""
+    fields = {}
+    for key, value in new.items():
+        if old[key] == value:
+            continue
+        lines = list_splice(old[key].splitlines(True), value.splitlines(True)) \
+            if isinstance(old[key], str) and isinstance(value, str) else None
+        fields[key] = {"lines": lines} if lines is not None else {"value": value}
+    return fields
+
+
+def list_splice(old: list, new: list) -> Optional[dict]:
+    """{start, stop, head, tail, patches} with new == head + old[start:stop] + tail, or
+    None if that is no smaller than writing `new` itself.
+
+    A dict in `head` that differs from the dict at the same position of `old` only
+    in some fields (e.g. the rolling summary entry of the interaction history) is
+    stored in `patches` as those fields, instead of in full.
+    """
+    positions = {}
+    for index, item in enumerate(old):
+        positions.setdefault(_dumps(item) if isinstance(item, (dict, list)) else item, []).append(index)
+    best = (0, 0, 0)   # (length, start in old, start in new)
+    for new_start, item in enumerate(new):
+        for old_start in positions.get(_dumps(item) if isinstance(item, (dict, list)) else item, ()):
+            if new_start and old_start and new[new_start - 1] == old[old_start - 1]:
+                continue    # inside a run already measured from an earlier start
+            length = 0
+            while (new_start + length < len(new) and old_start + length < len(old)
+                   and new[new_start + length] == old[old_start + length]):
+                length += 1
+            if length > best[0]:
+                best = (length, old_start, new_start)
+    length, old_start, new_start = best
+    if length == 0:
+        return None
+    head, patches = list(new[:new_start]), {}
+    for index, item in enumerate(head):
+        base = old[index] if index < len(old) else None
+        if isinstance(item, dict) and isinstance(base, dict) and item.keys() == base.keys():
+            patch = _patch(base, item)
+            if len(_dumps(patch)) < len(_dumps(item)):
+                patches[str(index)] = patch
+                head[index] = None
+    splice = {
+        "start": old_start,
+        "stop": old_start + length,
+        "head": head,
+        "tail": new[new_start + length:],
+    }
+    if patches:
+        splice["patches"] = patches
+    return splice if len(_dumps(splice)) < len(_dumps(new)) else None
+
+
+def apply_splice(old: list, splice: dict) -> list:
+    head = list(splice["head"])
+    for index, fields in splice.get("patches", {}).items():
+        item = dict(old[int(index)])
+        for key, change in fields.items():
+            if "lines" in change:
+                item[key] = "".join(apply_splice(item[key].splitlines(True), change["lines"]))
+            else:
+                item[key] = change["value"]
+        head[int(index)] = item
+    return head + old[splice["start"]:splice["stop"]] + splice["tail"]
+
+
+class SqliteSessionService(BaseSessionService):
+    """A BaseSessionService storing sessions, events and state deltas in SQLite."""
+
+    def __init__(self, db_file=SESSION_DB, snapshot_every=SNAPSHOT_EVERY):
+        self.db_file = db_file
+        self.snapshot_every = snapshot_every
+        self._conn = sqlite3.connect(db_file, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(f"PRAGMA busy_timeout={BUSY_TIMEOUT_MS}")
+        self._conn.executescript(_SCHEMA)
+        self._lock = threading.RLock()
+        # (app, user, session, key) -> (state_log id, value, splices since the last 'set')
+        self._latest = OrderedDict()
+        # Sessions inside `turn()`, and the writes queued for them (event loop thread only)
+        self._open = {}
+        self._pending = {}
+        self._writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="session-db-writer")
+        self.rows_written = 0
+        self.bytes_written = 0
+        self.snapshots = 0
+
+    # --- Storage (blocking) ---
+
+    def _execute(self, sql, params=()):
+        with self._lock:
+            return self._conn.execute(sql, params).fetchall()
+
+    @contextmanager
+    def _transaction(self):
+        """BEGIN IMMEDIATE ... COMMIT around a block (takes the write lock up front)."""
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+            self._conn.execute("COMMIT")
+
+    def _remember(self, cache_key, entry):
+        self._latest[cache_key] = entry
+        self._latest.move_to_end(cache_key)
+        while len(self._latest) > MAX_CACHED_KEYS:
+            self._latest.popitem(last=False)
+
+    def _write(self, sql, params):
+        cursor = self._conn.execute(sql, params)
+        self.rows_written += 1
+        self.bytes_written += sum(len(param) for param in params if isinstance(param, str))
+        return cursor.lastrowid
+
+    def _write_state(self, ids, key, value):
+        """Append one state_log row for `key` (caller holds a transaction)."""
+        cache_key = (*ids, key)
+        last_id = self._conn.execute(
+            "SELECT MAX(id) FROM state_log WHERE app_name = ? AND user_id = ? AND session_id = ? AND key = ?",
+            (*ids, key),
+        ).fetchone()[0]
+        cached = self._latest.get(cache_key)
+        splice = None
+        if (isinstance(value, list) and cached is not None and cached[0] == last_id
+                and isinstance(cached[1], list) and cached[2] < self.snapshot_every):
+            splice = list_splice(cached[1], value)
+        if splice is not None:
+            row_id = self._write("INSERT INTO state_log (app_name, user_id, session_id, key, kind, value) "
+                                 "VALUES (?, ?, ?, ?, 'splice', ?)", (*ids, key, _dumps(splice)))
+            self._remember(cache_key, (row_id, value, cached[2] + 1))
+            return
+        row_id = self._write("INSERT INTO state_log (app_name, user_id, session_id, key, kind, value) "
+                             "VALUES (?, ?, ?, ?, 'set', ?)", (*ids, key, _dumps(value)))
+        if last_id is not None:
+            # The full value supersedes every earlier row of this key
+            self._conn.execute("DELETE FROM state_log WHERE app_name = ? AND user_id = ? AND session_id = ? "
+                               "AND key = ? AND id < ?", (*ids, key, row_id))
+            self.snapshots += 1
+        self._remember(cache_key, (row_id, value, 0))
+
+    def _load_state(self, ids) -> dict:
+        """Session state rebuilt from each key's last 'set' row and the splices after it."""
+        heads = self._execute(
+            "SELECT key, MAX(id) FROM state_log WHERE app_name = ? AND user_id = ? AND session_id = ? GROUP BY key",
+            ids,
+        )
+        with self._lock:
+            cached = [self._latest.get((*ids, key)) for key, _ in heads]
+            if all(entry is not None and entry[0] == last_id for entry, (_, last_id) in zip(cached, heads)):
+                # Nothing was written since this process last saw these keys
+                return {key: copy.deepcopy(entry[1]) for entry, (key, _) in zip(cached, heads)}
+        rows = self._execute(
+            "SELECT id, key, kind, value FROM state_log WHERE app_name = ? AND user_id = ? AND session_id = ? "
+            "ORDER BY id",
+            ids,
+        )
+        state, latest = {}, {}
+        for row_id, key, kind, value in rows:
+            if kind == "set":
+                state[key] = json.loads(value)
+                latest[key] = (row_id, 0)
+            else:
+                state[key] = apply_splice(state.get(key) or [], json.loads(value))
+                latest[key] = (row_id, latest[key][1] + 1)
+        with self._lock:
+            for key, (row_id, splices) in latest.items():
+                self._remember((*ids, key), (row_id, state[key], splices))
+        return state
+
+    def _merge_shared_state(self, app_name, user_id, state: dict) -> dict:
+        for key, value in self._execute("SELECT key, value FROM app_state WHERE app_name = ?", (app_name,)):
+            state[State.APP_PREFIX + key] = json.loads(value)
+        for key, value in self._execute("SELECT key, value FROM user_state WHERE app_name = ? AND user_id = ?",
+                                        (app_name, user_id)):
+            state[State.USER_PREFIX + key] = json.loads(value)
+        return state
+
+    # --- BaseSessionService ---
+
+    def create_session(self, *, app_name: str, user_id: str, state: Optional[dict[str, Any]] = None,
+                       session_id: Optional[str] = None) -> Session:
+        session_id = session_id.strip() if session_id and session_id.strip() else str(uuid.uuid4())
+        ids = (app_name, user_id, session_id)
+        now = time.time()
+        with self._transaction():
+            self._write("INSERT INTO sessions (app_name, user_id, session_id, created_at, updated_at) "
+                        "VALUES (?, ?, ?, ?, ?)", (*ids, now, now))
+            self._write_state_delta(ids, state or {})
+        session = Session(app_name=app_name, user_id=user_id, id=session_id, state={}, last_update_time=now)
+        session.state = self._merge_shared_state(app_name, user_id, self._load_state(ids))
+        return session
+
+    def get_session(self, *, app_name: str, user_id: str, session_id: str,
+                    config: Optional[GetSessionConfig] = None) -> Optional[Session]:
+        ids = (app_name, user_id, session_id)
+        if ids in self._open:
+            # Inside turn(): the loaded session, kept current by append_event
+            return self._open[ids]
+        found = self._execute("SELECT updated_at FROM sessions WHERE app_name = ? AND user_id = ? AND session_id = ?",
+                              ids)
+        if not found:
+            return None
+        sql = "SELECT data FROM events WHERE app_name = ? AND user_id = ? AND session_id = ?"
+        params = ids
+        if config and config.num_recent_events:
+            sql = ("SELECT data FROM (SELECT id, data FROM events WHERE app_name = ? AND user_id = ? AND session_id = ? "
+                   "ORDER BY id DESC LIMIT ?) ORDER BY id")
+            params = (*ids, config.num_recent_events)
+        elif config and config.after_timestamp:
+            sql += " AND timestamp >= ? ORDER BY id"
+            params = (*ids, config.after_timestamp)
+        else:
+            sql += " ORDER BY id"
+        events = [Event.model_validate_json(data) for (data,) in self._execute(sql, params)]
+        state = self._merge_shared_state(app_name, user_id, self._load_state(ids))
+        return Session(app_name=app_name, user_id=user_id, id=session_id, state=state, events=events,
+                       last_update_time=found[0][0])
+
+    def list_sessions(self, *, app_name: str, user_id: str) -> ListSessionsResponse:
+        rows = self._execute("SELECT session_id, updated_at FROM sessions WHERE app_name = ? AND user_id = ? "
+                             "ORDER BY updated_at", (app_name, user_id))
+        return ListSessionsResponse(sessions=[
+            Session(app_name=app_name, user_id=user_id, id=session_id, state={}, last_update_time=updated_at)
+            for session_id, updated_at in rows
+        ])
+
+    def delete_session(self, *, app_name: str, user_id: str, session_id: str) -> None:
+        ids = (app_name, user_id, session_id)
+        with self._transaction():
+            for table in ("events", "state_log", "sessions"):
+                self._conn.execute(f"DELETE FROM {table} WHERE app_name = ? AND user_id = ? AND session_id = ?", ids)
+            for key in [key for key in self._latest if key[:3] == ids]:
+                del self._latest[key]
+
+    def list_events(self, *, app_name: str, user_id: str, session_id: str) -> ListEventsResponse:
+        rows = self._execute("SELECT data FROM events WHERE app_name = ? AND user_id = ? AND session_id = ? "
+                             "ORDER BY id", (app_name, user_id, session_id))
+        return ListEventsResponse(events=[Event.model_validate_json(data) for (data,) in rows])
+
+    def _write_state_delta(self, ids, delta: dict):
+        app_name, user_id, _ = ids
+        for key, value in delta.items():
+            if key.startswith(State.TEMP_PREFIX):
+                continue
+            if key.startswith(State.APP_PREFIX):
+                self._write("INSERT OR REPLACE INTO app_state (app_name, key, value) VALUES (?, ?, ?)",
+                            (app_name, key.removeprefix(State.APP_PREFIX), _dumps(value)))
+            elif key.startswith(State.USER_PREFIX):
+                self._write("INSERT OR REPLACE INTO user_state (app_name, user_id, key, value) VALUES (?, ?, ?, ?)",
+                            (app_name, user_id, key.removeprefix(State.USER_PREFIX), _dumps(value)))
+            else:
+                self._write_state(ids, key, value)
+
+    def append_event(self, session: Session, event: Event) -> Event:
+        if event.partial:
+            return event
+        super().append_event(session=session, event=event)
+        session.last_update_time = event.timestamp
+        ids = (session.app_name, session.user_id, session.id)
+        data = event.model_dump_json(exclude_none=True, exclude={"actions": {"state_delta"}})
+        delta = event.actions.state_delta if event.actions else None
+        if ids in self._open:
+            # The delta may still be mutated in place by the caller before the writer gets to it
+            future = self._writer.submit(self._store_event, ids, event.timestamp, data, copy.deepcopy(delta))
+            self._pending.setdefault(ids, []).append(future)
+        else:
+            self._store_event(ids, event.timestamp, data, delta)
+        return event
+
+    def _store_event(self, ids, timestamp, data, delta):
+        with self._transaction():
+            self._write("INSERT INTO events (app_name, user_id, session_id, timestamp, data) VALUES (?, ?, ?, ?, ?)",
+                        (*ids, timestamp, data))
+            if delta:
+                self._write_state_delta(ids, delta)
+            self._conn.execute("UPDATE sessions SET updated_at = ? WHERE app_name = ? AND user_id = ? "
+                               "AND session_id = ?", (timestamp, *ids))
+
+    @asynccontextmanager
+    async def turn(self, app_name: str, user_id: str, session_id: str):
+        """Serve one session from memory for a turn, with its writes off the event loop.
+
+        Yields the session (None if it does not exist). Turns of one session
+        must not overlap; api_chat holds a per-session lock around them.
+        """
+        ids = (app_name, user_id, session_id)
+        session = await asyncio.to_thread(self.get_session, app_name=app_name, user_id=user_id, session_id=session_id)
+        if session is None:
+            yield None
+            return
+        self._open[ids] = session
+        try:
+            yield session
+        finally:
+            del self._open[ids]
+            pending = self._pending.pop(ids, [])
+            if pending:
+                await asyncio.gather(*(asyncio.wrap_future(future) for future in pending))
+
+    def close(self):
+        self._writer.shutdown(wait=True)
+        with self._lock:
+            self._conn.close()
+
+    def stats(self):
+        """Rows and bytes written so far, and full-value snapshots taken."""
+        with self._lock:
+            return {
+                "rows_written": self.rows_written,
+                "bytes_written": self.bytes_written,
+                "snapshots": self.snapshots,
+                "cached_keys": len(self._latest),
+            }
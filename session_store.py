@@ -0,0 +1,119 @@
+# session_store.py
+"""Session lifecycle helpers for the ADK runners.
+
+InMemorySessionService keeps every session (and every event, including inline
+PDF bytes) until it is deleted. `ephemeral_session` tears a one-shot session down
+as soon as its request is done, and `BoundedSessionService` caps how long and
+how many sessions are kept for everything else.
+"""
+import os
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+
+from google.adk.sessions import InMemorySessionService
+
+SESSION_TTL_SECONDS = float(os.getenv("AROGYA_SESSION_TTL_SECONDS", str(60 * 60)))
+SESSION_MAX_COUNT = int(os.getenv("AROGYA_SESSION_MAX_COUNT", "10000"))
+
+
+class BoundedSessionService(InMemorySessionService):
+    """An InMemorySessionService whose sessions expire after `ttl_seconds` without
+    use and are evicted least recently used first beyond `max_sessions`."""
+
+    def __init__(self, max_sessions=SESSION_MAX_COUNT, ttl_seconds=SESSION_TTL_SECONDS):
+        super().__init__()
+        self.max_sessions = max_sessions
+        self.ttl_seconds = ttl_seconds
+        self._last_used = OrderedDict()     # (app_name, user_id, session_id) -> last use (monotonic)
+        self._lock = threading.RLock()
+        self.evictions = 0
+        self.expirations = 0
+
+    def _touch(self, key):
+        with self._lock:
+            self._last_used[key] = time.monotonic()
+            self._last_used.move_to_end(key)
+
+    def _drop(self, key):
+        """Remove a session from storage, pruning containers left empty."""
+        app_name, user_id, session_id = key
+        self._last_used.pop(key, None)
+        users = self.sessions.get(app_name, {})
+        sessions = users.get(user_id, {})
+        sessions.pop(session_id, None)
+        if not sessions:
+            users.pop(user_id, None)
+        if not users:
+            self.sessions.pop(app_name, None)
+
+    def _evict(self):
+        """Expire idle sessions, then evict the least recently used beyond max_sessions."""
+        with self._lock:
+            cutoff = time.monotonic() - self.ttl_seconds
+            while self._last_used:
+                key, last_used = next(iter(self._last_used.items()))
+                if last_used > cutoff:
+                    break
+                self._drop(key)
+                self.expirations += 1
+            while len(self._last_used) > self.max_sessions:
+                self._drop(next(iter(self._last_used)))
+                self.evictions += 1
+
+    def create_session(self, *, app_name, user_id, state=None, session_id=None):
+        with self._lock:
+            session = super().create_session(
+                app_name=app_name, user_id=user_id, state=state, session_id=session_id
+            )
+            self._touch((app_name, user_id, session.id))
+            self._evict()
+        return session
+
+    def get_session(self, *, app_name, user_id, session_id, config=None):
+        with self._lock:
+            self._evict()
+            session = super().get_session(
+                app_name=app_name, user_id=user_id, session_id=session_id, config=config
+            )
+            if session is not None:
+                self._touch((app_name, user_id, session_id))
+        return session
+
+    def list_sessions(self, *, app_name, user_id):
+        with self._lock:
+            self._evict()
+            return super().list_sessions(app_name=app_name, user_id=user_id)
+
+    def delete_session(self, *, app_name, user_id, session_id):
+        with self._lock:
+            self._drop((app_name, user_id, session_id))
+
+    def append_event(self, session, event):
+        with self._lock:
+            key = (session.app_name, session.user_id, session.id)
+            if key in self._last_used:
+                self._touch(key)
+            return super().append_event(session=session, event=event)
+
+    def stats(self):
+        """Live session count and eviction counters."""
+        with self._lock:
+            return {
+                "sessions": len(self._last_used),
+                "max_sessions": self.max_sessions,
+                "ttl_seconds": self.ttl_seconds,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+            }
+
+
+@contextmanager
+def ephemeral_session(session_service, *, app_name, user_id, state=None):
+    """A session that exists only for the duration of the `with` block."""
+    session = session_service.create_session(app_name=app_name, user_id=user_id, state=state)
+    try:
+        yield session
+    finally:
+        session_service.delete_session(app_name=app_name, user_id=user_id, session_id=session.id)
@@ -12,6 +12,8 @@ from dotenv import load_dotenv
 
 # --- 1. Import your custom report_parser_agent ---
 from report_parser_agent.agent import report_parser_agent
+from report_parser_agent.output_repair import parse_output
+from report_parser_agent.page_selection import prune_pdf
 
 # Load environment variables
 load_dotenv()
@@ -44,6 +46,13 @@ async def main():
         print(f"❌ ERROR: File not found at '{PDF_FILE_PATH}'. Please check the path.")
         return
 
+    # Long reports: only send the pages likely to hold the UserContext fields
+    pdf_bytes = pdf_path.read_bytes()
+    pruned = prune_pdf(pdf_bytes)
+    if pruned.data is not None:
+        print(f"✂️ Sending {len(pruned.kept_pages)} of {pruned.total_pages} pages: {[i + 1 for i in pruned.kept_pages]}")
+        pdf_bytes = pruned.data
+
     # 💡 --- FIX APPLIED HERE --- 💡
     # Instead of creating a Blob object, we pass a dictionary directly
     # to the 'inline_data' parameter of the Part.
@@ -54,7 +63,7 @@ async def main():
             types.Part(
                 inline_data={
                     "mime_type": "application/pdf",
-                    "data": pdf_path.read_bytes()
+                    "data": pdf_bytes
                 }
             )
         ]
@@ -70,7 +79,7 @@ async def main():
         ):
             if chunk.is_final_response and chunk.content and chunk.content.parts:
                 json_string = chunk.content.parts[0].text
-                final_json_response = json.loads(json_string)
+                final_json_response = parse_output(json_string).model_dump()
                 break
 
     except Exception as e:
@@ -1,8 +1,15 @@
 # utils.py
 from datetime import datetime
+from google.adk.events import Event, EventActions
+from google.adk.sessions.base_session_service import GetSessionConfig
 from google.genai import types
 import json
 
+from conversation_history import HistoryManager
+
+# Keeps state["interaction_history"] (interpolated into every agent's instruction) bounded
+history_manager = HistoryManager()
+
 # ANSI color codes for terminal output
 class Colors:
     RESET = "\033[0m"
@@ -54,11 +61,17 @@ async def process_agent_response(event):
 
     return final_response
 
-def add_user_query_to_history(session_service, app_name, user_id, session_id, query):
-    """Adds a user query to the interaction history."""
+def add_user_query_to_history(session_service, app_name, user_id, session_id, query, author="user"):
+    """Adds a user query to the interaction history.
+
+    `author` is the author of the state-only event that records it. When the turn
+    runs a sub-agent directly (see intent_router), pass that agent's name: the
+    Runner picks the agent to run from the latest non-user event, and an author
+    it knows keeps it from scanning back to other agents' events.
+    """
     entry = {"role": "user", "content": query}
     _update_interaction_history(
-        session_service, app_name, user_id, session_id, entry
+        session_service, app_name, user_id, session_id, entry, author
     )
 
 
@@ -73,23 +86,28 @@ def add_agent_response_to_history(
 
 
 def _update_interaction_history(
-    session_service, app_name, user_id, session_id, entry
+    session_service, app_name, user_id, session_id, entry, author=None
 ):
     """Internal function to update the interaction history in state."""
     try:
+        # Only the state is needed, not the session's (ever growing) event list
         session = session_service.get_session(
-            app_name=app_name, user_id=user_id, session_id=session_id
+            app_name=app_name,
+            user_id=user_id,
+            session_id=session_id,
+            config=GetSessionConfig(num_recent_events=1),
         )
         if not session:
             return
 
-        # Get the history list from the session's state
-        history = session.state.get("interaction_history", [])
-        # Append the new entry
-        history.append(entry)
-        # The change is automatically reflected since we are modifying the object by reference
-        
-        # REMOVED: session_service.save_session(session) - This line was incorrect and is not needed.
+        # Append the new entry; older turns are folded into the rolling summary
+        history = history_manager.add(session.state.get("interaction_history", []), entry)
+
+        # get_session returns a copy, so the new history is saved as a state delta
+        session_service.append_event(
+            session,
+            Event(author=author or entry["role"], actions=EventActions(state_delta={"interaction_history": history})),
+        )
 
     except Exception as e:
         print(f"{Colors.RED}Error updating interaction history: {e}{Colors.RESET}")